@@ -0,0 +1,188 @@
+# backend/admission.py
+"""Admission control and graceful degradation for /api/predict.
+
+Every request goes through ``AdmissionController.admit`` before any work
+is done. It can be shed:
+
+- 429 when its client's token bucket is empty (``rate`` requests/s
+  sustained, ``burst`` at once), with Retry-After set to when the next
+  token arrives;
+- 503 when ``max_in_flight`` requests are already being served, with
+  Retry-After 1.
+
+Requests that are admitted get a service level from the degradation
+ladder: ``full`` (Gemini suggestions), ``basic`` (rule-based suggestions,
+no Gemini call) or ``prediction_only``. The level goes up immediately when
+the requests in flight or the smoothed latency reach a step's threshold. It
+comes down one step at a time, only after both signals have stayed below
+``recover_fraction`` of the thresholds for ``recover_seconds``. That
+hysteresis keeps it from flapping around a threshold.
+
+The signals are per process: under gunicorn each worker admits and
+degrades on its own load.
+"""
+
+import math
+import threading
+import time
+
+FULL, BASIC, PREDICTION_ONLY = 0, 1, 2
+LEVELS = ("full", "basic", "prediction_only")
+
+# Weight of the newest request in the smoothed latency
+LATENCY_ALPHA = 0.2
+
+
+class Rejected(Exception):
+    """The request was shed: answer ``status`` with ``Retry-After: retry_after``."""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBuckets:
+    """One token bucket per client, refilled at ``rate`` tokens/s up to ``burst``."""
+
+    def __init__(self, rate, burst, max_clients=100000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._clock = clock
+        self._buckets = {}  # client -> [tokens, last refill time]
+        self._lock = threading.Lock()
+
+    def take(self, client):
+        """Take a token: 0 if there was one, else seconds until there will be."""
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                if len(self._buckets) >= self.max_clients:
+                    self._prune(now)
+                bucket = self._buckets[client] = [self.burst, now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+    def _prune(self, now):
+        # A bucket that has refilled completely is the same as no bucket
+        full_after = self.burst / self.rate
+        self._buckets = {c: b for c, b in self._buckets.items() if now - b[1] < full_after}
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class AdmissionController:
+    """Rate limits, an in-flight cap and the degradation ladder (0 disables each part).
+
+    ``in_flight_thresholds`` and ``latency_thresholds`` are
+    ``(basic, prediction_only)`` pairs; latency is in seconds.
+    """
+
+    def __init__(self, rate=0, burst=20, max_in_flight=0, in_flight_thresholds=(0, 0),
+                 latency_thresholds=(0, 0), recover_seconds=10, recover_fraction=0.5, clock=time.monotonic):
+        self.buckets = TokenBuckets(rate, burst, clock=clock) if rate > 0 else None
+        self.max_in_flight = max_in_flight
+        self.in_flight_thresholds = in_flight_thresholds
+        self.latency_thresholds = latency_thresholds
+        self.recover_seconds = recover_seconds
+        self.recover_fraction = recover_fraction
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._latency = None
+        self._level = FULL
+        self._calm_since = None
+        self.counters = {
+            "admitted": 0,
+            "rate_limited": 0,
+            "overloaded": 0,
+            "degraded_basic": 0,
+            "degraded_prediction_only": 0,
+            "level_changes": 0,
+        }
+
+    @property
+    def level(self):
+        return self._level
+
+    def admit(self, client):
+        """Admit a request from ``client``: returns its service level, or raises ``Rejected``."""
+        if self.buckets is not None:
+            wait = self.buckets.take(client)
+            if wait:
+                with self._lock:
+                    self.counters["rate_limited"] += 1
+                raise Rejected(429, "Rate limit exceeded", math.ceil(wait))
+        with self._lock:
+            if self.max_in_flight and self._in_flight >= self.max_in_flight:
+                self.counters["overloaded"] += 1
+                raise Rejected(503, "Server overloaded, try again shortly", 1)
+            self._in_flight += 1
+            self._update_level()
+            level = self._level
+            self.counters["admitted"] += 1
+            if level != FULL:
+                self.counters["degraded_" + LEVELS[level]] += 1
+        return level
+
+    def release(self, latency):
+        """An admitted request finished after ``latency`` seconds."""
+        with self._lock:
+            self._in_flight -= 1
+            if self._latency is None:
+                self._latency = latency
+            else:
+                self._latency += LATENCY_ALPHA * (latency - self._latency)
+            self._update_level()
+
+    def _pressure(self, scale):
+        """Highest level whose in-flight or latency threshold (times ``scale``) is reached."""
+        level = FULL
+        for step in (BASIC, PREDICTION_ONLY):
+            in_flight_limit = self.in_flight_thresholds[step - 1]
+            latency_limit = self.latency_thresholds[step - 1]
+            if ((in_flight_limit and self._in_flight >= in_flight_limit * scale)
+                    or (latency_limit and self._latency is not None and self._latency >= latency_limit * scale)):
+                level = step
+        return level
+
+    def _update_level(self):
+        now = self._clock()
+        target = self._pressure(1.0)
+        if target > self._level:
+            self._set_level(target)
+            self._calm_since = None
+        elif self._pressure(self.recover_fraction) < self._level:
+            if self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.recover_seconds:
+                self._set_level(self._level - 1)
+                self._calm_since = now
+        else:
+            self._calm_since = None
+
+    def _set_level(self, level):
+        print(f"Service level {LEVELS[self._level]} -> {LEVELS[level]}")
+        self._level = level
+        self.counters["level_changes"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["level"] = self._level
+            stats["level_name"] = LEVELS[self._level]
+            stats["in_flight"] = self._in_flight
+            stats["latency_ms"] = round(self._latency * 1000, 1) if self._latency is not None else None
+        stats["shed"] = stats["rate_limited"] + stats["overloaded"]
+        stats["max_in_flight"] = self.max_in_flight
+        stats["clients"] = len(self.buckets) if self.buckets is not None else 0
+        return stats
@@ -68,88 +68,524 @@
 #     app.run(host="127.0.0.1", port=5000, debug=True)
 # backend/app.py
 
+import time
+
+_import_started = time.perf_counter()
+
+import atexit
 import os
-from flask import Flask, request, send_from_directory, jsonify
+import csv
+import functools
+import hmac
+import io
+import json
+import threading
+from flask import Flask, Response, request, send_from_directory, jsonify, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import joblib
-import google.generativeai as genai
+
+from cache import MISSING, TTLCache
+from compiled_model import UnsupportedPipeline, compile_pipeline, verify_compiled
+from model_registry import ModelLoadError, ModelRegistry, UnknownModelVersion
+from resilience import AsyncGuardedCall, CallRejected, DeadlineExceeded, GuardedCall
+from suggestion_jobs import SuggestionJobs
+from suggestion_cache import SuggestionStore, profile_key
+from fast_json import FastJSONProvider
+from feature_schema import RecordDecoder, SchemaError
+from metrics import MetricsRegistry
+from static_assets import AssetManifest
+from whatif import GridTooLarge, parse_sweeps, score_grid
+from cohort_stats import GROUP_FIELDS, CohortAnalysis
+from admission import BASIC, FULL, LEVELS, AdmissionController, Rejected
+from audit_log import AuditLog
+from micro_batch import MicroBatcher
+from profiler import ProfilerBusy, SamplingProfiler
+from shadow import ShadowScorer
+from suggestion_rules import SuggestionRanker, columns_from_frame, headline
+from suggestion_stream import SuggestionParser, sse_event
+from scoring import CATEGORICAL_FIELDS, FEATURE_COLUMNS, clamp_scores, feature_key, iter_csv_chunks, normalize_str, parse_record, predict_frame, predict_record, prepare_frame, score_frame
+
+# --------------------------
+#  Metrics (rendered on /metrics)
+# --------------------------
+metrics = MetricsRegistry()
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests by endpoint, method and status", ("endpoint", "method", "status"))
+http_latency = metrics.histogram(
+    "http_request_duration_seconds", "Time to produce a response (first byte for streams)", ("endpoint",))
+stage_latency = metrics.histogram(
+    "request_stage_duration_seconds", "Time spent per processing stage", ("endpoint", "stage"))
+suggestion_sources = metrics.counter(
+    "suggestions_total", "Suggestion lists produced, by where they came from", ("source",))
+predictions_total = metrics.counter(
+    "predictions_total", "Records scored, by model version", ("model_version",))
+app_errors = metrics.counter(
+    "app_errors_total", "Errors the app handled instead of failing the request", ("kind",))
+
+# Stage timers bound once so the hot path skips the label lookup
+PREDICT_STAGES = {s: stage_latency.labels("/api/predict", s) for s in ("parse", "predict", "suggestions", "serialize")}
+BATCH_STAGES = {s: stage_latency.labels("/api/predict/batch", s) for s in ("parse", "build", "predict", "suggestions", "serialize")}
+WHATIF_STAGES = {s: stage_latency.labels("/api/predict/whatif", s) for s in ("parse", "predict", "serialize")}
 
 # Base paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 FRONTEND_DIR = os.path.join(BASE_DIR, "frontend")
-MODEL_PATH = os.path.join(BASE_DIR, "models", "ridge_pipeline.joblib")
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+# Version served by default: models/<MODEL_VERSION>.joblib
+MODEL_VERSION = os.environ.get('MODEL_VERSION', 'ridge_pipeline')
+MODEL_PATH = os.path.join(MODELS_DIR, MODEL_VERSION + ".joblib")
 
 # Check model
 if not os.path.exists(MODEL_PATH):
     raise FileNotFoundError(f"Model not found at {MODEL_PATH}")
 
-model = joblib.load(MODEL_PATH)
+# "compiled" scores with a flattened NumPy copy of the pipeline (verified against
+# model.predict at startup), "sklearn" always goes through the pipeline itself
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'compiled')
+
+
+def build_predictor(pipeline):
+    """Return the object used for scoring: compiled fast path or the pipeline."""
+    if MODEL_BACKEND != 'compiled':
+        return pipeline
+    try:
+        compiled = compile_pipeline(pipeline)
+        verify_compiled(compiled, pipeline)
+    except UnsupportedPipeline as e:
+        print(f"Compiled model unavailable, using sklearn pipeline: {e}")
+        return pipeline
+    return compiled
+
+
+# The model is loaded, compiled and warmed up off the import path: "background"
+# (default) lets the server bind immediately and /api/ready report when it's
+# warm, "sync" loads before the module finishes importing
+MODEL_WARMUP = os.environ.get('MODEL_WARMUP', 'background')
+# Longest a request waits for a model that is still loading before getting a 503
+MODEL_READY_TIMEOUT = float(os.environ.get('MODEL_READY_TIMEOUT', '30'))
+
+# Representative input used to prime the scoring code paths during warm-up
+WARMUP_RECORD = {
+    "age": 20,
+    "gender": "Male",
+    "study_hours_per_day": 5.5,
+    "social_media_hours": 2.0,
+    "part_time_job": "No",
+    "attendance_percentage": 90,
+    "sleep_hours": 7.5,
+    "diet_quality": "Good",
+    "exercise_frequency": 3,
+    "parental_education_level": "Bachelor",
+    "internet_Resource_accessibility": "Good",
+    "extracurricular_participation": "Yes"
+}
+
+# "r" memory-maps the model arrays read-only (shared between forked workers);
+# replace model files by renaming a new file into place, never by rewriting them
+MODEL_MMAP_MODE = os.environ.get('MODEL_MMAP_MODE') or None
+
+# Seconds before a model version that failed to load is tried again (sooner if its file changes)
+MODEL_LOAD_RETRY_SECONDS = float(os.environ.get('MODEL_LOAD_RETRY_SECONDS', '30'))
+
+model_registry = ModelRegistry(
+    MODELS_DIR, MODEL_VERSION, build_predictor, WARMUP_RECORD, mmap_mode=MODEL_MMAP_MODE,
+    retry_failed_after=MODEL_LOAD_RETRY_SECONDS
+)
+model_ready = threading.Event()
+# Seconds spent in each startup phase, filled in as they complete
+startup_report = {}
+
+
+class ModelNotReady(Exception):
+    pass
+
+
+def load_model():
+    """Load, validate and warm up the default model version, then mark the app ready."""
+    try:
+        entry = model_registry.activate(MODEL_VERSION)
+    except Exception as e:
+        startup_report["error"] = str(e)
+        app_errors.inc("model_warmup")
+        print(f"Model warm-up failed: {e}")
+        raise
+    startup_report.update(entry.timings)
+    startup_report.update({
+        "ready_seconds": round(time.perf_counter() - _import_started, 4),
+        "backend": entry.backend
+    })
+    model_ready.set()
+    print(f"Model ready {startup_report['ready_seconds']:.2f}s after import started")
+
+
+def require_model(version=None):
+    """The active model (or a pinned version), waiting up to MODEL_READY_TIMEOUT
+    for the startup warm-up."""
+    if not model_ready.wait(MODEL_READY_TIMEOUT):
+        raise ModelNotReady(startup_report.get("error") or "Model is still loading")
+    return model_registry.get(version)
+
+
+def requested_model_version():
+    """Model version pinned by the client via X-Model-Version or ?model_version=."""
+    return request.headers.get("X-Model-Version") or request.args.get("model_version") or None
+
+
+# Frontend files are served from an in-memory manifest with precompressed
+# variants. STATIC_WATCH=1 rebuilds it when files change (development).
+STATIC_WATCH = os.environ.get('STATIC_WATCH', '') == '1'
+# Cache-Control max-age (seconds) for files without a content hash in the
+# name; 0 makes browsers revalidate with the ETag every time
+STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', '0'))
+frontend_assets = AssetManifest(FRONTEND_DIR)
+
+if MODEL_WARMUP == 'sync':
+    load_model()
+    frontend_assets.load()
+else:
+    threading.Thread(target=load_model, name="model-warmup", daemon=True).start()
+    threading.Thread(target=frontend_assets.load, name="static-assets", daemon=True).start()
+
+# Cache of (prediction, suggestions) per model version and canonical feature
+# tuple; size 0 disables it
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', '10000'))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', '300'))
+# How often (seconds) to stat loaded model files for changes
+MODEL_CHECK_INTERVAL = float(os.environ.get('MODEL_CHECK_INTERVAL', '2'))
+
+prediction_cache = TTLCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+
+_model_state = {"checked_at": time.monotonic(), "reloading": False, "failed": {}}
+_model_lock = threading.Lock()
+
+
+def reload_model_if_changed(wait=False):
+    """Hot-reload loaded model versions whose files changed on disk.
+
+    Files are stat()ed at most once every MODEL_CHECK_INTERVAL seconds. The
+    reload runs on a background thread (unless ``wait``), so requests keep
+    using the current model until the new one has been validated and swapped
+    in. Returns True when a reload was started.
+    """
+    now = time.monotonic()
+    if now - _model_state["checked_at"] < MODEL_CHECK_INTERVAL or not model_ready.is_set():
+        return False
+    with _model_lock:
+        if now - _model_state["checked_at"] < MODEL_CHECK_INTERVAL or _model_state["reloading"]:
+            return False
+        _model_state["checked_at"] = now
+        changed = {
+            version: signature
+            for version, signature in model_registry.changed_versions().items()
+            if _model_state["failed"].get(version) != signature
+        }
+        if not changed:
+            return False
+        _model_state["reloading"] = True
+    worker = threading.Thread(target=_reload_versions, args=(changed,), name="model-reload", daemon=True)
+    worker.start()
+    if wait:
+        worker.join()
+    return True
+
 
-# Initialize Gemini AI (optional - will work without API key but suggestions won't be generated)
+def _reload_versions(changed):
+    try:
+        for version, signature in changed.items():
+            try:
+                model_registry.reload(version)
+                print(f"Model file changed, reloaded version {version}")
+            except (ModelLoadError, UnknownModelVersion) as e:
+                # Keep serving the old model; don't retry until the file changes again
+                _model_state["failed"][version] = signature
+                app_errors.inc("model_reload")
+                print(f"Model reload failed, keeping current {version}: {e}")
+        prediction_cache.clear()
+    finally:
+        _model_state["reloading"] = False
+
+
+# Gemini AI is optional - the app works without an API key but suggestions won't be
+# generated. google.generativeai is only imported when a suggestion is requested.
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+
+# On-disk cache of Gemini suggestions keyed on a bucketed profile, e.g.
+# /var/lib/student-app/suggestions.sqlite3 (off unless a path is given)
+SUGGESTION_CACHE_PATH = os.environ.get('SUGGESTION_CACHE_PATH', '')
+SUGGESTION_CACHE_TTL = float(os.environ.get('SUGGESTION_CACHE_TTL', str(7 * 24 * 3600)))
+
+suggestion_store = SuggestionStore(SUGGESTION_CACHE_PATH, SUGGESTION_CACHE_TTL)
+
+# Append-only log of every prediction served, written in batches by a background
+# thread, e.g. /var/lib/student-app/predictions.sqlite3 (off unless a path is given)
+AUDIT_LOG_PATH = os.environ.get('AUDIT_LOG_PATH', '')
+# Rows held in memory for the writer, and rows per write
+AUDIT_BUFFER_SIZE = int(os.environ.get('AUDIT_BUFFER_SIZE', '20000'))
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '500'))
+# Longest a record waits in memory when traffic is light (seconds)
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', '1.0'))
+# Full buffer: "drop" the record at once, or "block" the request up to 50 ms first
+AUDIT_OVERFLOW = os.environ.get('AUDIT_OVERFLOW', 'drop')
+# Start a new file past this size, keeping this many rotated files
+AUDIT_ROTATE_MB = float(os.environ.get('AUDIT_ROTATE_MB', '64'))
+AUDIT_KEEP_FILES = int(os.environ.get('AUDIT_KEEP_FILES', '5'))
+
+audit_log = AuditLog(
+    AUDIT_LOG_PATH, FEATURE_COLUMNS, max_buffer=AUDIT_BUFFER_SIZE, batch_size=AUDIT_BATCH_SIZE,
+    flush_interval=AUDIT_FLUSH_INTERVAL, overflow=AUDIT_OVERFLOW,
+    rotate_bytes=int(AUDIT_ROTATE_MB * 2 ** 20), keep=AUDIT_KEEP_FILES
+)
+atexit.register(audit_log.close)
+
+# Shadow scoring: candidate versions (models/<version>.joblib, comma-separated)
+# compared with the serving model on a sampled share of live predictions, off
+# the request path
+SHADOW_MODELS = [v.strip() for v in os.environ.get('SHADOW_MODELS', '').split(',') if v.strip()]
+# Share of scored records sent to the candidates (0 disables shadowing)
+SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', '0.1'))
+# Records held in memory for the shadow worker, and records per vectorized batch
+SHADOW_QUEUE_SIZE = int(os.environ.get('SHADOW_QUEUE_SIZE', '10000'))
+SHADOW_BATCH_SIZE = int(os.environ.get('SHADOW_BATCH_SIZE', '512'))
+# Scores within this many points of the serving model's count as agreeing
+SHADOW_AGREE_WITHIN = float(os.environ.get('SHADOW_AGREE_WITHIN', '1.0'))
+
+shadow = ShadowScorer(
+    model_registry.get, SHADOW_MODELS, sample_rate=SHADOW_SAMPLE_RATE, max_queue=SHADOW_QUEUE_SIZE,
+    batch_size=SHADOW_BATCH_SIZE, agree_within=SHADOW_AGREE_WITHIN
+)
+
+# "sync" waits for suggestions inside /api/predict; "async" returns the score at once
+# with basic suggestions and a job id to poll on /api/suggestions/<id>.
+# A request can override this with ?suggestions=sync|async
+SUGGESTIONS_MODE = os.environ.get('SUGGESTIONS_MODE', 'sync')
+SUGGESTION_WORKERS = int(os.environ.get('SUGGESTION_WORKERS', '4'))
+SUGGESTION_QUEUE_SIZE = int(os.environ.get('SUGGESTION_QUEUE_SIZE', '100'))
+SUGGESTION_JOB_TTL = float(os.environ.get('SUGGESTION_JOB_TTL', '300'))
+
+suggestion_jobs = SuggestionJobs(SUGGESTION_WORKERS, SUGGESTION_QUEUE_SIZE, SUGGESTION_JOB_TTL)
+
+# Guard rails around Gemini: per-call deadline (seconds), max calls in flight,
+# and a breaker that skips Gemini for a cool-down after consecutive failures
+GEMINI_TIMEOUT = float(os.environ.get('GEMINI_TIMEOUT', '10'))
+GEMINI_MAX_CONCURRENCY = int(os.environ.get('GEMINI_MAX_CONCURRENCY', '8'))
+GEMINI_BREAKER_THRESHOLD = int(os.environ.get('GEMINI_BREAKER_THRESHOLD', '5'))
+GEMINI_BREAKER_COOLDOWN = float(os.environ.get('GEMINI_BREAKER_COOLDOWN', '30'))
+
+gemini_guard = GuardedCall(
+    GEMINI_TIMEOUT, GEMINI_MAX_CONCURRENCY, GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_COOLDOWN
+)
+# Gemini calls in flight under the ASGI server (asgi.py). They are awaited and
+# hold no thread, so the cap can be far above GEMINI_MAX_CONCURRENCY
+GEMINI_ASYNC_MAX_CONCURRENCY = int(os.environ.get('GEMINI_ASYNC_MAX_CONCURRENCY', '1000'))
+
+gemini_async_guard = AsyncGuardedCall(
+    GEMINI_TIMEOUT, GEMINI_ASYNC_MAX_CONCURRENCY, GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_COOLDOWN
+)
+
+_gemini_model = None
+_gemini_lock = threading.Lock()
+
+
+def get_gemini_model():
+    """Shared Gemini client, created (and the SDK imported) on first use."""
+    global _gemini_model
+    if _gemini_model is None:
+        with _gemini_lock:
+            if _gemini_model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                _gemini_model = genai.GenerativeModel('gemini-pro')
+    return _gemini_model
+
+# Concurrent /api/predict calls scored together in micro-batches of up to this
+# many records (0 disables it). Only the sklearn backend is batched: the compiled
+# model scores one record faster than a batch can be assembled
+MICRO_BATCH_SIZE = int(os.environ.get('MICRO_BATCH_SIZE', '0'))
+# Longest a request waits for others to join its batch (ms); the actual wait
+# adapts to load and is zero when requests don't overlap
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get('MICRO_BATCH_MAX_WAIT_MS', '2'))
+
+micro_batcher = MicroBatcher(MICRO_BATCH_SIZE, MICRO_BATCH_MAX_WAIT_MS / 1000)
+
+# Admission control for /api/predict (per worker process). Per-client token
+# bucket: sustained requests per second and burst (rate 0 disables it)
+ADMISSION_RATE = float(os.environ.get('ADMISSION_RATE', '0'))
+ADMISSION_BURST = int(os.environ.get('ADMISSION_BURST', '20'))
+# Header naming the client (e.g. X-Forwarded-For behind a proxy); unset uses the peer address
+ADMISSION_CLIENT_HEADER = os.environ.get('ADMISSION_CLIENT_HEADER', '')
+# Requests in flight past which new ones get a 503 (0 disables the cap)
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', '0'))
+# Degradation ladder: requests in flight, or smoothed latency (ms), at which
+# /api/predict stops calling Gemini (basic suggestions), then stops suggesting
+# at all (prediction only). 0 disables a threshold
+DEGRADE_BASIC_IN_FLIGHT = int(os.environ.get('DEGRADE_BASIC_IN_FLIGHT', '0'))
+DEGRADE_PREDICTION_ONLY_IN_FLIGHT = int(os.environ.get('DEGRADE_PREDICTION_ONLY_IN_FLIGHT', '0'))
+DEGRADE_BASIC_LATENCY_MS = float(os.environ.get('DEGRADE_BASIC_LATENCY_MS', '0'))
+DEGRADE_PREDICTION_ONLY_LATENCY_MS = float(os.environ.get('DEGRADE_PREDICTION_ONLY_LATENCY_MS', '0'))
+# Seconds both signals must stay below half their thresholds before service
+# steps back up one level
+DEGRADE_RECOVER_SECONDS = float(os.environ.get('DEGRADE_RECOVER_SECONDS', '10'))
+
+admission = AdmissionController(
+    rate=ADMISSION_RATE, burst=ADMISSION_BURST, max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+    in_flight_thresholds=(DEGRADE_BASIC_IN_FLIGHT, DEGRADE_PREDICTION_ONLY_IN_FLIGHT),
+    latency_thresholds=(DEGRADE_BASIC_LATENCY_MS / 1000, DEGRADE_PREDICTION_ONLY_LATENCY_MS / 1000),
+    recover_seconds=DEGRADE_RECOVER_SECONDS
+)
+
+# Last resort when neither Gemini nor the basic suggestions produced anything
+FALLBACK_SUGGESTIONS = (
+    "Maintain consistent study hours daily",
+    "Focus on improving attendance",
+    "Balance study time with adequate rest",
+    "Reduce distractions during study sessions"
+)
+
+# Basic (non-Gemini) suggestions per student, including the score-band opening line
+BASIC_SUGGESTION_COUNT = int(os.environ.get('BASIC_SUGGESTION_COUNT', '5'))
+
+# Largest number of student records accepted by /api/predict/batch
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '5000'))
+
+# Most scenarios (product of the sweep lengths) one /api/predict/whatif request may ask for
+MAX_WHATIF_GRID = int(os.environ.get('MAX_WHATIF_GRID', '20000'))
+
+# Rows per pandas chunk when streaming CSV uploads through /api/predict/csv
+CSV_CHUNK_SIZE = int(os.environ.get('CSV_CHUNK_SIZE', '10000'))
+
+# Predicted scores below this count as at risk in /api/analytics/cohort
+AT_RISK_THRESHOLD = float(os.environ.get('AT_RISK_THRESHOLD', '60'))
+
+# Shared secret for admin endpoints (sent as X-Admin-Token); unset disables them
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+# Longest profiling session /api/profile will run (seconds)
+PROFILE_MAX_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS', '60'))
+# Requests opt in to a tagged-only session with this header
+PROFILE_HEADER = "X-Profile"
+
+profiler = SamplingProfiler()
+
+# "auto" encodes JSON responses with orjson when it is installed, "stdlib" never does
+JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+
+# "1" rejects categorical values the model wasn't trained on instead of scoring
+# them as "none of the known values"
+STRICT_CATEGORIES = os.environ.get('STRICT_CATEGORIES', '') == '1'
+
+# Request bodies decoded with msgpack (optional dependency)
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+
+record_decoder = RecordDecoder(strict_categories=STRICT_CATEGORIES)
 
 # Serve static files from /frontend
 app = Flask(__name__, static_folder=FRONTEND_DIR, template_folder=None)
 CORS(app)  # Enable CORS for Next.js frontend
+app.json = FastJSONProvider(app)
+if JSON_ENCODER == 'stdlib':
+    app.json.use_orjson = False
+
+
+def admin_required(view):
+    """Only allow the request through with a matching X-Admin-Token header."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({
+                "success": False,
+                "error": "Admin endpoints are disabled (set ADMIN_TOKEN)"
+            }), 403
+        if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+            return jsonify({"success": False, "error": "Invalid admin token"}), 401
+        return view(*args, **kwargs)
+    return wrapper
 
 
-def normalize_str(s):
-    if s is None:
-        return s
-    return str(s).strip().title()
+def client_id(headers, peer):
+    """Rate-limit key: the first address in ``ADMISSION_CLIENT_HEADER``, else the peer address."""
+    if ADMISSION_CLIENT_HEADER:
+        forwarded = headers.get(ADMISSION_CLIENT_HEADER.lower())
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return peer or "unknown"
+
+
+def rejected_response(e):
+    """JSON body and headers for a request shed by admission control."""
+    return {"success": False, "error": e.reason}, e.status, {"Retry-After": str(e.retry_after)}
+
+
+def admission_controlled(view):
+    """Admit the request through ``admission`` (shed with 429/503 and Retry-After)
+    and record the service level it gets as ``request.environ["admission.level"]``."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            level = admission.admit(client_id(request.headers, request.remote_addr))
+        except Rejected as e:
+            body, status, headers = rejected_response(e)
+            return jsonify(body), status, headers
+        request.environ["admission.level"] = level
+        started = time.perf_counter()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            admission.release(time.perf_counter() - started)
+    return wrapper
+
+
+# Where the current thread's last suggestion list came from (for the audit log),
+# and whether it stands in for a Gemini call the guard gave up on
+_suggestion_source = threading.local()
+
+
+def use_suggestion_source(source, fell_back=False):
+    """Count a suggestion list by source and remember the source for this thread."""
+    suggestion_sources.inc(source)
+    _suggestion_source.value = source
+    _suggestion_source.fell_back = fell_back
+
+
+@functools.lru_cache(maxsize=8)
+def suggestion_ranker(entry):
+    """Rule ranker priced with ``entry``'s coefficients (one per loaded model version)."""
+    if entry is None:
+        return SuggestionRanker()
+    model = entry.scorer
+    if not hasattr(model, "contributions"):
+        try:
+            model = compile_pipeline(entry.pipeline)
+        except UnsupportedPipeline:
+            model = None
+    return SuggestionRanker(model)
 
 
 def generate_basic_suggestions(form_data, prediction):
-    """Generate basic suggestions based on score and profile (fallback when API key not available)"""
-    suggestions = []
-    
-    # Score-based suggestions
-    if prediction < 60:
-        suggestions.append("Focus on improving your study habits. Aim for at least 4-6 hours of dedicated study time per day.")
-        suggestions.append("Increase your attendance rate. Regular class attendance is crucial for understanding course material.")
-    elif prediction < 80:
-        suggestions.append("Maintain consistent study hours and create a structured study schedule.")
-        suggestions.append("Consider reducing social media usage to maximize productive study time.")
+    """Generate basic suggestions (fallback when API key not available): a line for
+    the score band, then the changes the model expects to raise the score most"""
+    ranker = suggestion_ranker(model_registry.active)
+    ranked = ranker.suggest_one(form_data, k=BASIC_SUGGESTION_COUNT - 1)
+    return [headline(prediction)] + ranked
+
+
+def degraded_response(form_data, prediction, level):
+    """Response body below full service: basic suggestions without calling
+    Gemini, or none at all. Not cached, so recovery isn't masked."""
+    if level == BASIC:
+        use_suggestion_source("basic")
+        suggestions = generate_basic_suggestions(form_data, prediction)
     else:
-        suggestions.append("Continue maintaining your excellent study habits and academic performance.")
-        suggestions.append("Consider helping peers or engaging in advanced topics to further enhance your learning.")
-    
-    # Profile-based suggestions
-    study_hours = float(form_data.get('study_hours_per_day', 0) or 0)
-    if study_hours < 3:
-        suggestions.append("Increase your daily study hours gradually. Start with 3-4 hours and build up to 5-6 hours.")
-    
-    attendance = float(form_data.get('attendance_percentage', 0) or 0)
-    if attendance < 80:
-        suggestions.append("Improve your attendance rate. Aim for at least 85-90% attendance to stay on track with coursework.")
-    
-    social_media = float(form_data.get('social_media_hours', 0) or 0)
-    if social_media > 4:
-        suggestions.append("Reduce social media usage. Limit it to 1-2 hours per day to free up more time for studying.")
-    
-    sleep_hours = float(form_data.get('sleep_hours', 0) or 0)
-    if sleep_hours < 6 or sleep_hours > 9:
-        suggestions.append("Maintain a consistent sleep schedule of 7-8 hours per night for optimal cognitive performance.")
-    
-    exercise = int(form_data.get('exercise_frequency', 0) or 0)
-    if exercise < 3:
-        suggestions.append("Incorporate regular exercise (3-4 times per week) to improve focus and reduce stress.")
-    
-    return suggestions[:5]
+        _suggestion_source.value = "none"
+        suggestions = []
+    return {"success": True, "prediction": prediction, "suggestions": suggestions,
+            "service_level": LEVELS[level]}
 
 
-def generate_suggestions(form_data, prediction):
-    """Generate personalized improvement suggestions using Gemini AI"""
-    if not GEMINI_API_KEY:
-        print("GEMINI_API_KEY not set. Using basic suggestions.")
-        return generate_basic_suggestions(form_data, prediction)
-    
-    try:
-        # Prepare student data summary
-        student_summary = f"""
+def suggestion_prompt(form_data, prediction):
+    """Gemini prompt for one student profile and predicted score."""
+    # Prepare student data summary
+    student_summary = f"""
         Student Profile:
         - Age: {form_data.get('age', 'N/A')}
         - Study Hours per Day: {form_data.get('study_hours_per_day', 'N/A')} hours
@@ -165,9 +601,9 @@ def generate_suggestions(form_data, prediction):
         
         Predicted Exam Score: {prediction}/100
         """
-        
-        # Create prompt for Gemini
-        prompt = f"""You are an educational advisor. Based on the following student profile and their predicted exam score, provide 4-5 specific, actionable suggestions to help them improve their academic performance.
+
+    # Create prompt for Gemini
+    return f"""You are an educational advisor. Based on the following student profile and their predicted exam score, provide 4-5 specific, actionable suggestions to help them improve their academic performance.
 
 {student_summary}
 
@@ -181,153 +617,877 @@ Please provide:
 
 Suggestions:"""
 
+
+def parse_suggestions(text):
+    """Suggestion list from Gemini's answer: numbered or bulleted lines without
+    their markers, else every non-empty line; at most 5."""
+    parser = SuggestionParser()
+    return parser.feed(text) + parser.close()
+
+
+def generate_suggestions(form_data, prediction):
+    """Generate personalized improvement suggestions using Gemini AI"""
+    if not GEMINI_API_KEY:
+        print("GEMINI_API_KEY not set. Using basic suggestions.")
+        use_suggestion_source("basic")
+        return generate_basic_suggestions(form_data, prediction)
+
+    cache_key = profile_key(form_data, prediction)
+    cached = suggestion_store.get(cache_key)
+    if cached:
+        use_suggestion_source("suggestion_cache")
+        return cached
+
+    try:
+        prompt = suggestion_prompt(form_data, prediction)
+
         # Generate suggestions using Gemini
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
-        
-        suggestions_text = response.text.strip()
-        
-        # Parse suggestions into a list
-        suggestions = []
-        lines = suggestions_text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if line and (line[0].isdigit() or line.startswith('•') or line.startswith('-')):
-                # Remove numbering/bullets
-                suggestion = line.lstrip('0123456789.-) ').strip()
-                if suggestion:
-                    suggestions.append(suggestion)
-        
-        # If parsing didn't work well, return the full text split by newlines
-        if not suggestions:
-            suggestions = [s.strip() for s in suggestions_text.split('\n') if s.strip()]
+        try:
+            response = gemini_guard.call(get_gemini_model().generate_content, prompt)
+        except (CallRejected, DeadlineExceeded) as e:
+            print(f"Gemini unavailable ({e}). Using basic suggestions.")
+            app_errors.inc("gemini_unavailable")
+            use_suggestion_source("basic", fell_back=True)
+            return generate_basic_suggestions(form_data, prediction)
         
-        return suggestions[:5]  # Return max 5 suggestions
+        suggestions = parse_suggestions(response.text)
+        suggestion_store.put(cache_key, suggestions)
+        use_suggestion_source("gemini")
+        return suggestions
         
     except Exception as e:
         print(f"Error generating suggestions: {str(e)}")
+        app_errors.inc("suggestions")
         return None
 
 
+@app.errorhandler(ModelNotReady)
+def model_not_ready(e):
+    response = jsonify({"success": False, "error": str(e)})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+
+@app.errorhandler(UnknownModelVersion)
+def unknown_model_version(e):
+    return jsonify({"success": False, "error": f"Unknown model version: {e.args[0] if e.args else ''}"}), 404
+
+
+@app.errorhandler(ModelLoadError)
+def model_load_error(e):
+    return jsonify({"success": False, "error": str(e)}), 500
+
+
+class UnsupportedBody(Exception):
+    pass
+
+
+@app.errorhandler(UnsupportedBody)
+def unsupported_body(e):
+    return jsonify({"success": False, "error": str(e)}), 415
+
+
+def read_request_record():
+    """The submitted student record (a dict for a valid body) from a JSON, MessagePack or form body."""
+    if request.is_json:
+        return request.get_json()
+    if request.mimetype in MSGPACK_MIMETYPES:
+        try:
+            import msgpack
+        except ImportError:
+            raise UnsupportedBody("MessagePack request bodies need the msgpack package") from None
+        return msgpack.unpackb(request.get_data(), raw=False)
+    return request.form.to_dict()
+
+
 # --------------------------
 #  Serve Frontend Files
 # --------------------------
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def preferred_encoding(asset, accepted):
+    """Best content-coding in ``accepted`` (an Accept header) among the asset's variants."""
+    for encoding in ("br", "gzip"):
+        if encoding in asset.variants and accepted.quality(encoding) > 0:
+            return encoding
+    return "identity"
+
+
+def serve_asset(filename):
+    """Serve a frontend file from the manifest with ETag / 304 / Accept-Encoding
+    handling; files not in the manifest are read from disk as before."""
+    if STATIC_WATCH:
+        frontend_assets.reload_if_changed()
+    asset = frontend_assets.get(filename)
+    if asset is None:
+        return send_from_directory(FRONTEND_DIR, filename)
+
+    encoding = preferred_encoding(asset, request.accept_encodings)
+    etag, headers = asset_headers(asset, encoding, request.args.get("v"))
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+    response = Response(asset.variants[encoding], mimetype=asset.mimetype, headers=headers)
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.last_modified = asset.mtime
+    return response
+
+
+def asset_headers(asset, encoding, version=None):
+    """``(etag, headers)`` for serving ``asset`` in ``encoding``; ``version`` is the ?v= link hash."""
+    etag = asset.etag(encoding)
+    # Fingerprinted names (or ?v=<hash> links) can be cached forever
+    if asset.hashed_name or (version and asset.digest.startswith(version)):
+        cache_control = IMMUTABLE_CACHE
+    elif STATIC_MAX_AGE:
+        cache_control = f"public, max-age={STATIC_MAX_AGE}"
+    else:
+        cache_control = "no-cache"
+    return etag, {"ETag": f'"{etag}"', "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+
+
 @app.route("/")
 def index():
-    return send_from_directory(FRONTEND_DIR, "index.html")
+    return serve_asset("index.html")
 
 
 @app.route("/<path:filename>")
 def frontend_static(filename):
-    return send_from_directory(FRONTEND_DIR, filename)
+    return serve_asset(filename)
 
 
 # --------------------------
 #  Prediction API
 # --------------------------
 @app.route("/api/predict", methods=["POST"])
+@admission_controlled
 def predict():
     try:
-        # Handle both JSON and form data
-        if request.is_json:
-            json_data = request.get_json()
-            # Validate required fields in JSON
-            required_fields = [
-                "age",
-                "study_hours_per_day",
-                "social_media_hours",
-                "attendance_percentage",
-                "sleep_hours",
-                "exercise_frequency",
-            ]
-            missing = [f for f in required_fields if f not in json_data or json_data.get(f) is None]
-            if missing:
-                return jsonify({
-                    "success": False,
-                    "error": f"Missing required fields: {', '.join(missing)}"
-                }), 400
-            data = {
-                "age": [int(json_data.get("age", 18))],
-                "gender": [normalize_str(json_data.get("gender"))],
-                "study_hours_per_day": [float(json_data.get("study_hours_per_day", 0.0))],
-                "social_media_hours": [float(json_data.get("social_media_hours", 0.0))],
-                "part_time_job": [normalize_str(json_data.get("part_time_job"))],
-                "attendance_percentage": [float(json_data.get("attendance_percentage", 0.0))],
-                "sleep_hours": [float(json_data.get("sleep_hours", 0.0))],
-                "diet_quality": [normalize_str(json_data.get("diet_quality"))],
-                "exercise_frequency": [int(json_data.get("exercise_frequency", 0))],
-                "parental_education_level": [normalize_str(json_data.get("parental_education_level"))],
-                "internet_Resource_accessibility": [normalize_str(json_data.get("internet_Resource_accessibility"))],
-                "extracurricular_participation": [normalize_str(json_data.get("extracurricular_participation"))]
-            }
-        else:
-            # Validate required fields in form data
-            required_fields = [
-                "age",
-                "study_hours_per_day",
-                "social_media_hours",
-                "attendance_percentage",
-                "sleep_hours",
-                "exercise_frequency",
-            ]
-            missing = [f for f in required_fields if not request.form.get(f)]
-            if missing:
+        # JSON, MessagePack or form body -> model features, every field checked once
+        with PREDICT_STAGES["parse"].time():
+            record = read_request_record()
+            features = record_decoder.decode(record)
+
+        reload_model_if_changed()
+        entry = require_model(requested_model_version())
+        key = (entry.version, entry.signature, feature_key(features))
+        cached = prediction_cache.get(key)
+        if cached is not MISSING:
+            prediction, suggestions = cached
+            suggestion_sources.inc("prediction_cache")
+            audit_log.record("/api/predict", entry.version, features, None, prediction,
+                             "prediction_cache", _request_latency_ms())
+            with PREDICT_STAGES["serialize"].time():
                 return jsonify({
-                    "success": False,
-                    "error": f"Missing required fields: {', '.join(missing)}"
-                }), 400
-
-            data = {
-                "age": [int(request.form.get("age", 18))],
-                "gender": [normalize_str(request.form.get("gender"))],
-                "study_hours_per_day": [float(request.form.get("study_hours_per_day", 0.0))],
-                "social_media_hours": [float(request.form.get("social_media_hours", 0.0))],
-                "part_time_job": [normalize_str(request.form.get("part_time_job"))],
-                "attendance_percentage": [float(request.form.get("attendance_percentage", 0.0))],
-                "sleep_hours": [float(request.form.get("sleep_hours", 0.0))],
-                "diet_quality": [normalize_str(request.form.get("diet_quality"))],
-                "exercise_frequency": [int(request.form.get("exercise_frequency", 0))],
-                "parental_education_level": [normalize_str(request.form.get("parental_education_level"))],
-                "internet_Resource_accessibility": [normalize_str(request.form.get("internet_Resource_accessibility"))],
-                "extracurricular_participation": [normalize_str(request.form.get("extracurricular_participation"))]
-            }
-
-        df = pd.DataFrame(data)
-        raw_pred = float(model.predict(df)[0])
+                    "success": True,
+                    "prediction": prediction,
+                    "suggestions": suggestions,
+                    "model_version": entry.version
+                })
+
+        with PREDICT_STAGES["predict"].time():
+            raw_pred = micro_batcher.predict(entry.scorer, features)
+        predictions_total.inc(entry.version)
+        shadow.offer(features, entry.version, raw_pred)
         clamped_pred = max(0, min(100, raw_pred))
         prediction = round(clamped_pred, 2)
 
+        form_data = record
+        level = request.environ["admission.level"]
+        if level != FULL:
+            response_data = degraded_response(form_data, prediction, level)
+            response_data["model_version"] = entry.version
+            audit_log.record("/api/predict", entry.version, features, raw_pred, prediction,
+                             _suggestion_source.value, _request_latency_ms())
+            return jsonify(response_data)
+
+        if GEMINI_API_KEY and request.args.get("suggestions", SUGGESTIONS_MODE) == "async":
+            response_data = start_suggestions_job(form_data, prediction, key)
+            response_data["model_version"] = entry.version
+            audit_log.record("/api/predict", entry.version, features, raw_pred, prediction,
+                             _suggestion_source.value, _request_latency_ms())
+            return jsonify(response_data)
+
         # Generate suggestions using Gemini AI
-        suggestions = generate_suggestions(
-            json_data if request.is_json else request.form.to_dict(),
-            prediction
-        )
+        _suggestion_source.value, _suggestion_source.fell_back = None, False
+        with PREDICT_STAGES["suggestions"].time():
+            suggestions = generate_suggestions(form_data, prediction)
 
         response_data = {
             "success": True,
-            "prediction": prediction
+            "prediction": prediction,
+            "model_version": entry.version
         }
         
         # Always include suggestions (either from Gemini or basic fallback)
         if suggestions:
             response_data["suggestions"] = suggestions
+            if not _suggestion_source.fell_back:
+                # Not after a Gemini timeout or open breaker, so recovery isn't masked
+                prediction_cache.set(key, (prediction, suggestions))
+        else:
+            # Fallback if both fail (not cached so the next request retries)
+            use_suggestion_source("fallback")
+            response_data["suggestions"] = list(FALLBACK_SUGGESTIONS)
+        audit_log.record("/api/predict", entry.version, features, raw_pred, prediction,
+                         _suggestion_source.value, _request_latency_ms())
+
+        with PREDICT_STAGES["serialize"].time():
+            return jsonify(response_data)
+
+    except (ModelNotReady, ModelLoadError, UnknownModelVersion, UnsupportedBody):
+        raise
+    except SchemaError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "errors": e.errors
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+
+
+def start_suggestions_job(form_data, prediction, key):
+    """Async-mode response: the score now, Gemini suggestions via a background job.
+
+    When the job queue is full only the basic suggestions are returned.
+    """
+    cached = suggestion_store.get(profile_key(form_data, prediction))
+    if cached:
+        use_suggestion_source("suggestion_cache")
+        prediction_cache.set(key, (prediction, cached))
+        return {"success": True, "prediction": prediction, "suggestions": cached}
+
+    def cache_result(suggestions):
+        # On the job's thread, after generate_suggestions set its source there. The
+        # basic fallback for a Gemini timeout or open breaker isn't cached, so
+        # recovery isn't masked
+        if _suggestion_source.value in ("gemini", "suggestion_cache"):
+            prediction_cache.set(key, (prediction, suggestions))
+
+    job_id = suggestion_jobs.submit(generate_suggestions, form_data, prediction, on_done=cache_result)
+    _suggestion_source.value = "job" if job_id is not None else "basic"
+    response_data = {
+        "success": True,
+        "prediction": prediction,
+        # Instant placeholder until the job finishes (the job counts its own source)
+        "suggestions": generate_basic_suggestions(form_data, prediction)
+    }
+    if job_id is not None:
+        response_data["suggestions_job"] = {
+            "id": job_id,
+            "status": "pending",
+            "url": f"/api/suggestions/{job_id}"
+        }
+    return response_data
+
+
+@app.route("/api/suggestions/<job_id>", methods=["GET"])
+def suggestions_status(job_id):
+    """Status (pending/ready/failed) and result of a background suggestions job."""
+    job = suggestion_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": "Unknown or expired suggestions job"
+        }), 404
+    response_data = {"success": True, "id": job_id, "status": job["status"]}
+    if job["result"]:
+        response_data["suggestions"] = job["result"]
+    if job["error"]:
+        response_data["error"] = job["error"]
+    return jsonify(response_data)
+
+
+def stream_suggestions(form_data, prediction):
+    """Yield a ``suggestion`` event for each suggestion as soon as it is known.
+
+    Gemini's answer is streamed and parsed line by line. Without an API key,
+    or from the suggestion cache, the whole list is known at once. After a
+    Gemini error a ``fallback`` event replaces whatever was streamed with the
+    basic suggestions. Returns ``(suggestions, source, fell_back)``.
+    """
+    if not GEMINI_API_KEY:
+        suggestions, source = generate_basic_suggestions(form_data, prediction), "basic"
+    else:
+        cache_key = profile_key(form_data, prediction)
+        suggestions, source = suggestion_store.get(cache_key), "suggestion_cache"
+    if suggestions:
+        for index, text in enumerate(suggestions):
+            yield sse_event("suggestion", {"index": index, "text": text})
+        return suggestions, source, False
+
+    streamed = []
+    parser = SuggestionParser()
+    chunks = None
+    try:
+        chunks = gemini_guard.stream(
+            get_gemini_model().generate_content, suggestion_prompt(form_data, prediction), stream=True
+        )
+        for chunk in chunks:
+            for text in parser.feed(chunk.text):
+                yield sse_event("suggestion", {"index": len(streamed), "text": text})
+                streamed.append(text)
+            if parser.count >= parser.limit:
+                break  # the rest of the answer would be dropped anyway
+        for text in parser.close():
+            yield sse_event("suggestion", {"index": len(streamed), "text": text})
+            streamed.append(text)
+    except (CallRejected, DeadlineExceeded) as e:
+        print(f"Gemini unavailable ({e}). Using basic suggestions.")
+        app_errors.inc("gemini_unavailable")
+        reason = str(e)
+    except Exception as e:
+        print(f"Error streaming suggestions: {str(e)}")
+        app_errors.inc("suggestions")
+        reason = "suggestions could not be generated"
+    else:
+        if streamed:
+            suggestion_store.put(cache_key, streamed)
+            return streamed, "gemini", False
+        reason = "no suggestions in the answer"
+    finally:
+        if chunks is not None:
+            chunks.close()
+    suggestions = generate_basic_suggestions(form_data, prediction)
+    yield sse_event("fallback", {"suggestions": suggestions, "reason": reason})
+    return suggestions, "basic", True
+
+
+@app.route("/api/predict/stream", methods=["POST"])
+def predict_stream():
+    """Server-Sent Events: the prediction first, then each suggestion as it is written.
+
+    Events: ``prediction``; ``suggestion`` (``{"index", "text"}``) per
+    suggestion; ``fallback`` (``{"suggestions", "reason"}``), replacing the
+    suggestions streamed so far after a Gemini error; and ``done`` with the
+    final list and its source. Bad input gets the same 400 JSON as
+    /api/predict, before any event.
+    """
+    try:
+        record = read_request_record()
+        features = record_decoder.decode(record)
+        reload_model_if_changed()
+        entry = require_model(requested_model_version())
+        key = (entry.version, entry.signature, feature_key(features))
+        cached = prediction_cache.get(key)
+        if cached is not MISSING:
+            raw_pred = None
+            prediction, cached_suggestions = cached
         else:
-            # Fallback if both fail
-            response_data["suggestions"] = [
-                "Maintain consistent study hours daily",
-                "Focus on improving attendance",
-                "Balance study time with adequate rest",
-                "Reduce distractions during study sessions"
-            ]
+            raw_pred = micro_batcher.predict(entry.scorer, features)
+            predictions_total.inc(entry.version)
+            shadow.offer(features, entry.version, raw_pred)
+            prediction = round(max(0, min(100, raw_pred)), 2)
+    except (ModelNotReady, ModelLoadError, UnknownModelVersion, UnsupportedBody):
+        raise
+    except SchemaError as e:
+        return jsonify({"success": False, "error": str(e), "errors": e.errors}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    def events():
+        yield sse_event("prediction", {"success": True, "prediction": prediction, "model_version": entry.version})
+        if cached is not MISSING:
+            for index, text in enumerate(cached_suggestions):
+                yield sse_event("suggestion", {"index": index, "text": text})
+            suggestions, source = cached_suggestions, "prediction_cache"
+        else:
+            suggestions, source, fell_back = yield from stream_suggestions(record, prediction)
+            if not fell_back:
+                # Not after a failure, so the next request tries Gemini again
+                prediction_cache.set(key, (prediction, suggestions))
+        use_suggestion_source(source)
+        audit_log.record("/api/predict/stream", entry.version, features, raw_pred, prediction,
+                         source, _request_latency_ms())
+        yield sse_event("done", {"suggestions": suggestions, "source": source})
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route("/api/predict/batch", methods=["POST"])
+def predict_batch():
+    """Score a JSON array of student records with a single pipeline call.
+
+    Rows that fail validation are reported individually instead of failing
+    the whole batch. ``?suggestions=<k>`` adds up to ``k`` basic suggestions
+    per row, ranked for the whole batch in one vectorized pass.
+    """
+    reload_model_if_changed()
+    with BATCH_STAGES["parse"].time():
+        payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get("students")
+    if not isinstance(payload, list):
+        return jsonify({
+            "success": False,
+            "error": "Expected a JSON array of student records"
+        }), 400
+    if len(payload) > MAX_BATCH_SIZE:
+        return jsonify({
+            "success": False,
+            "error": f"Batch too large: {len(payload)} records (max {MAX_BATCH_SIZE})"
+        }), 413
+
+    entry = require_model(requested_model_version())
+    if not payload:
+        # Nothing to score (an empty frame can't even be built from no records)
+        return jsonify({"success": True, "count": 0, "failed": 0, "model_version": entry.version, "results": []})
 
-        return jsonify(response_data)
+    records = [r if isinstance(r, dict) else {} for r in payload]
+    with BATCH_STAGES["build"].time():
+        features, errors = prepare_frame(pd.DataFrame.from_records(records, index=range(len(records))))
+    for i, r in enumerate(payload):
+        if not isinstance(r, dict):
+            errors[i] = "Record must be a JSON object"
 
+    try:
+        with BATCH_STAGES["predict"].time():
+            raw_scores = predict_frame(entry.scorer, features)
+            scores = clamp_scores(raw_scores)
     except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    predictions_total.inc(entry.version, amount=len(scores))
+    audit_log.record_frame("/api/predict/batch", entry.version, features, raw_scores, scores,
+                           _request_latency_ms())
+    shadow.offer_frame(features, entry.version, raw_scores)
+
+    top_k = request.args.get("suggestions", 0, type=int)
+    if top_k > 0:
+        with BATCH_STAGES["suggestions"].time():
+            ranked = suggestion_ranker(entry).suggest(columns_from_frame(features), k=top_k - 1)
+    results = [None] * len(payload)
+    for n, (i, score) in enumerate(zip(features.index.tolist(), scores.tolist())):
+        results[i] = {"index": i, "success": True, "prediction": score}
+        if top_k > 0:
+            results[i]["suggestions"] = [headline(score)] + ranked[n]
+    for i, message in errors.items():
+        results[i] = {"index": i, "success": False, "error": message}
+
+    with BATCH_STAGES["serialize"].time():
+        return jsonify({
+            "success": True,
+            "count": len(results),
+            "failed": len(errors),
+            "model_version": entry.version,
+            "results": results
+        })
+
+
+@app.route("/api/predict/whatif", methods=["POST"])
+def predict_whatif():
+    """Score one base profile under every combination of the requested sweeps.
+
+    Body: ``{"base": {...student...}, "sweeps": [{"field": ..., "values": [...]}
+    or {"field": ..., "start": ..., "stop": ..., "step"|"num": ...}, ...]}``.
+    ``scores`` is a nested list indexed like the ``axes``.
+    """
+    reload_model_if_changed()
+    try:
+        with WHATIF_STAGES["parse"].time():
+            payload = request.get_json(silent=True)
+            if not isinstance(payload, dict) or not isinstance(payload.get("base", {}), dict):
+                raise SchemaError([{
+                    "field": None,
+                    "code": "invalid_body",
+                    "message": "Expected a JSON object with 'base' and 'sweeps'"
+                }])
+            axes = parse_sweeps(payload.get("sweeps"), MAX_WHATIF_GRID, strict_categories=STRICT_CATEGORIES)
+            # A swept field doesn't need a base value; its first sweep value stands in
+            base = dict(payload.get("base") or {})
+            for field, values in axes:
+                if base.get(field) in (None, ""):
+                    base[field] = values[0]
+            features = record_decoder.decode(base)
+    except SchemaError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "errors": e.errors
+        }), 400
+    except GridTooLarge as e:
         return jsonify({
             "success": False,
             "error": str(e)
+        }), 413
+
+    entry = require_model(requested_model_version())
+    try:
+        with WHATIF_STAGES["predict"].time():
+            base_score = predict_record(entry.scorer, features)
+            scores = clamp_scores(score_grid(entry.scorer, features, axes))
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    predictions_total.inc(entry.version, amount=scores.size)
+
+    with WHATIF_STAGES["serialize"].time():
+        return jsonify({
+            "success": True,
+            "base_prediction": round(max(0, min(100, base_score)), 2),
+            "axes": [{"field": field, "values": values} for field, values in axes],
+            "shape": list(scores.shape),
+            "scores": scores.tolist(),
+            "model_version": entry.version
+        })
+
+
+def _is_gzip_upload():
+    return (
+        request.content_encoding == "gzip"
+        or request.mimetype in ("application/gzip", "application/x-gzip")
+        or request.args.get("compression") == "gzip"
+    )
+
+
+def _score_csv_chunks(entry, stream, chunksize, compressed):
+    """Yield ``(row, prediction, error)`` for every data row of a CSV upload."""
+    try:
+        for raw, features, errors in iter_csv_chunks(stream, chunksize, compressed):
+            started = time.perf_counter()
+            raw_scores = predict_frame(entry.scorer, features)
+            clamped = clamp_scores(raw_scores)
+            audit_log.record_frame("/api/predict/csv", entry.version, features, raw_scores, clamped,
+                                   (time.perf_counter() - started) * 1000)
+            shadow.offer_frame(features, entry.version, raw_scores)
+            scores = iter(clamped.tolist())
+            for row in raw.index.tolist():
+                if row in errors:
+                    yield row, None, errors[row]
+                else:
+                    yield row, next(scores), None
+    except Exception as e:
+        # Unparseable input: report where we stopped instead of dropping the connection
+        yield None, None, f"Could not read CSV: {e}"
+
+
+@app.route("/api/predict/csv", methods=["POST"])
+def predict_csv():
+    """Score a CSV upload chunk by chunk, streaming results back as they're ready.
+
+    Output is NDJSON by default, or CSV with ``?format=csv``. Rows that fail
+    validation are reported inline with their error.
+    """
+    reload_model_if_changed()
+    output = request.args.get("format", "ndjson")
+    if output not in ("ndjson", "csv"):
+        return jsonify({"success": False, "error": "format must be 'ndjson' or 'csv'"}), 400
+    try:
+        chunksize = int(request.args.get("chunksize", CSV_CHUNK_SIZE))
+    except ValueError:
+        return jsonify({"success": False, "error": "chunksize must be an integer"}), 400
+    chunksize = max(1, min(chunksize, CSV_CHUNK_SIZE))
+
+    entry = require_model(requested_model_version())
+    rows = _score_csv_chunks(entry, request.stream, chunksize, _is_gzip_upload())
+    headers = {"X-Model-Version": entry.version}
+
+    if output == "csv":
+        def generate():
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(["row", "prediction", "error"])
+            for i, (row, prediction, error) in enumerate(rows, 1):
+                writer.writerow(["" if row is None else row, "" if prediction is None else prediction, error or ""])
+                if i % chunksize == 0:
+                    yield buf.getvalue()
+                    buf.seek(0)
+                    buf.truncate()
+            yield buf.getvalue()
+        return Response(stream_with_context(generate()), mimetype="text/csv", headers=headers)
+
+    def generate():
+        lines = []
+        for row, prediction, error in rows:
+            if error is None:
+                lines.append(json.dumps({"row": row, "success": True, "prediction": prediction}))
+            else:
+                lines.append(json.dumps({"row": row, "success": False, "error": error}))
+            if len(lines) >= chunksize:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson", headers=headers)
+
+
+@app.route("/api/analytics/cohort", methods=["POST"])
+def cohort_analytics():
+    """Score distribution of a CSV upload: overall and broken down by group.
+
+    Rows are scored ``CSV_CHUNK_SIZE`` at a time and folded into mergeable
+    aggregates (``cohort_stats.py``), so memory stays flat however large the
+    upload is. ``?threshold=`` sets the at-risk cut-off, ``?group_by=`` the
+    comma-separated categorical fields and ``?bin_width=`` the histogram bins.
+    """
+    reload_model_if_changed()
+    try:
+        threshold = float(request.args.get("threshold", AT_RISK_THRESHOLD))
+        bin_width = float(request.args.get("bin_width", 10))
+    except ValueError:
+        return jsonify({"success": False, "error": "threshold and bin_width must be numbers"}), 400
+    # 0.07 * 100 is 7.000000000000001: compare hundredths with a tolerance
+    if not 0 < bin_width <= 100 or abs(round(bin_width * 100) - bin_width * 100) > 1e-9:
+        return jsonify({"success": False, "error": "bin_width must be between 0.01 and 100 in steps of 0.01"}), 400
+    bin_width = round(bin_width * 100) / 100
+    group_by = [f for f in request.args.get("group_by", ",".join(GROUP_FIELDS)).split(",") if f]
+    unknown = [f for f in group_by if f not in CATEGORICAL_FIELDS]
+    if unknown:
+        return jsonify({
+            "success": False,
+            "error": f"Cannot group by {', '.join(unknown)}; choose from {', '.join(CATEGORICAL_FIELDS)}"
         }), 400
 
+    entry = require_model(requested_model_version())
+    analysis = CohortAnalysis(group_by, threshold=threshold)
+    try:
+        for _raw, features, errors in iter_csv_chunks(request.stream, CSV_CHUNK_SIZE, _is_gzip_upload()):
+            analysis.update(features, score_frame(entry.scorer, features), failed=len(errors))
+    except Exception as e:
+        return jsonify({"success": False, "error": f"Could not read CSV: {e}"}), 400
+    predictions_total.inc(entry.version, amount=analysis.overall.count)
+
+    response_data = {"success": True, "model_version": entry.version}
+    response_data.update(analysis.report(histogram_width=bin_width))
+    return jsonify(response_data)
+
+
+@app.route("/api/models", methods=["GET"])
+def models():
+    """Active model version plus every version available in models/."""
+    return jsonify(dict(model_registry.info(), success=True))
+
+
+@app.route("/api/models/activate", methods=["POST"])
+@admin_required
+def activate_model():
+    """Load, validate and atomically switch the active model version."""
+    version = (request.get_json(silent=True) or {}).get("version")
+    if not version:
+        return jsonify({"success": False, "error": "Missing model version"}), 400
+    require_model()
+    entry = model_registry.activate(version)
+    print(f"Activated model version {entry.version}")
+    return jsonify({"success": True, "active": entry.version, "model": entry.info()})
+
+
+@app.route("/api/models/shadow", methods=["GET"])
+def shadow_report():
+    """How closely each shadow candidate agrees with the serving model on live traffic.
+
+    Waits up to a second for the records already sampled to be scored, so
+    the numbers include them.
+    """
+    shadow.flush(timeout=1.0)
+    return jsonify(dict(shadow.report(), success=True))
+
+
+@app.route("/api/models/shadow", methods=["DELETE"])
+@admin_required
+def reset_shadow():
+    """Start every shadow comparison over, once the records already sampled are scored."""
+    shadow.flush(timeout=1.0)
+    shadow.reset()
+    return jsonify({"success": True})
+
+
+@app.route("/api/static/reload", methods=["POST"])
+@admin_required
+def reload_static():
+    """Rebuild the frontend asset manifest from disk."""
+    frontend_assets.reload()
+    return jsonify({"success": True, **frontend_assets.stats()})
+
+
+@app.route("/api/audit", methods=["GET"])
+@admin_required
+def audit_entries():
+    """Most recent audit-log records, newest first.
+
+    Filters: ``since`` / ``until`` (Unix seconds), ``model_version``,
+    ``endpoint``; ``limit`` defaults to 100 (max 1000).
+    """
+    if not audit_log.enabled:
+        return jsonify({"success": False, "error": "Audit log is disabled"}), 404
+    try:
+        since = request.args.get("since", type=float)
+        until = request.args.get("until", type=float)
+        limit = max(1, min(int(request.args.get("limit", 100)), 1000))
+    except ValueError:
+        return jsonify({"success": False, "error": "limit must be an integer"}), 400
+    audit_log.flush(timeout=2.0)
+    records = audit_log.query(since=since, until=until, limit=limit,
+                              model_version=request.args.get("model_version"),
+                              endpoint=request.args.get("endpoint"))
+    return jsonify({"success": True, "count": len(records), "records": records})
+
+
+@app.route("/api/profile", methods=["POST"])
+@admin_required
+def profile():
+    """Sample the stacks of requests in flight for a while, optionally tracing allocations.
+
+    JSON body: ``seconds`` (default 10, max ``PROFILE_MAX_SECONDS``),
+    ``requests`` (stop early after this many sampled requests),
+    ``interval_ms`` (default 5), ``allocations`` (bool), ``tagged_only``
+    (only requests sent with ``X-Profile: 1``) and ``top`` allocation sites
+    (default 20). Only this worker process is profiled. ``?format=collapsed``
+    returns just the collapsed stacks, for flamegraph.pl or speedscope.
+    """
+    options = request.get_json(silent=True) or {}
+    try:
+        seconds = float(options.get("seconds", 10))
+        requests_limit = int(options["requests"]) if options.get("requests") else None
+        interval_ms = float(options.get("interval_ms", 5))
+        top = int(options.get("top", 20))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "seconds, requests, interval_ms and top must be numbers"}), 400
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        return jsonify({"success": False, "error": f"seconds must be between 0 and {PROFILE_MAX_SECONDS:g}"}), 400
+    if not 1 <= interval_ms <= 1000:
+        return jsonify({"success": False, "error": "interval_ms must be between 1 and 1000"}), 400
+    try:
+        report = profiler.run(seconds, requests=requests_limit, interval=interval_ms / 1000,
+                              allocations=bool(options.get("allocations")),
+                              tagged_only=bool(options.get("tagged_only")), top=max(top, 0))
+    except ProfilerBusy as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    if request.args.get("format") == "collapsed":
+        return Response(report["collapsed"], mimetype="text/plain")
+    return jsonify({"success": True, **report})
+
+
+@app.route("/api/schema", methods=["GET"])
+def schema():
+    """Input fields with their types, defaults, known categories and valid ranges."""
+    return jsonify({"success": True, **record_decoder.describe()})
+
+
+@app.route("/api/ready", methods=["GET"])
+def ready():
+    """Readiness probe: 200 once the model is loaded and warm, 503 before."""
+    is_ready = model_ready.is_set()
+    return jsonify({
+        "ready": is_ready,
+        "startup": startup_report
+    }), 200 if is_ready else 503
+
+
+def runtime_stats():
+    """Runtime counters for the caches and background machinery."""
+    return {
+        "prediction_cache": prediction_cache.stats(),
+        "suggestion_cache": suggestion_store.stats(),
+        "suggestion_jobs": suggestion_jobs.stats(),
+        "gemini": gemini_guard.stats(),
+        "gemini_async": gemini_async_guard.stats(),
+        "static_assets": frontend_assets.stats(),
+        "audit_log": audit_log.stats(),
+        "micro_batch": micro_batcher.stats(),
+        "shadow": shadow.stats(),
+        "profiler": profiler.stats(),
+        "admission": admission.stats()
+    }
+
+
+@app.route("/api/stats", methods=["GET"])
+def stats():
+    return jsonify(runtime_stats())
+
+
+# --------------------------
+#  Request metrics
+# --------------------------
+_request_metrics = {}  # (endpoint, method, status) -> (request counter, latency histogram)
+
+
+@app.before_request
+def start_request_timer():
+    request.environ["metrics.started"] = time.perf_counter()
+    if profiler.active:
+        rule = request.url_rule
+        profiler.enter(f"{request.method} {rule.rule if rule is not None else 'unmatched'}",
+                       tagged=request.headers.get(PROFILE_HEADER) == "1")
+
+
+@app.teardown_request
+def end_profiled_request(_exc):
+    if profiler.active:
+        profiler.leave()
+
+
+def _request_latency_ms():
+    """Milliseconds since this request started (for the audit log)."""
+    return (time.perf_counter() - request.environ["metrics.started"]) * 1000
+
+
+@app.after_request
+def count_request(response):
+    # One proxy lookup and one dict hit per request; the route pattern, not the
+    # raw path, keeps label cardinality bounded
+    req = request._get_current_object()
+    rule = req.url_rule
+    key = (rule.rule if rule is not None else "unmatched", req.method, response.status_code)
+    children = _request_metrics.get(key)
+    if children is None:
+        children = _request_metrics[key] = (
+            http_requests.labels(key[0], key[1], str(key[2])),
+            http_latency.labels(key[0]),
+        )
+    children[0].inc()
+    started = req.environ.get("metrics.started")
+    if started is not None:
+        children[1].observe(time.perf_counter() - started)
+    return response
+
+
+def _model_info():
+    active = model_registry.active
+    return {
+        (e["version"], e["backend"], "1" if active is not None and e["version"] == active.version else "0"): 1
+        for e in model_registry.info()["loaded"]
+    }
+
+
+def _runtime_stat_values():
+    values = {}
+    for component, component_stats in runtime_stats().items():
+        for name, value in component_stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[(component, name)] = value
+    values[("model", "ready")] = int(model_ready.is_set())
+    return values
+
+
+def _shadow_values():
+    values = {}
+    for comparison in shadow.report()["models"]:
+        for name in ("compared", "agreement", "mean_abs_delta", "psi"):
+            if name in comparison:
+                values[(comparison["version"], name)] = comparison[name]
+    return values
+
+
+metrics.gauge("model_info", "Loaded model versions (active=1 for the one serving by default)",
+              ("version", "backend", "active"), _model_info)
+metrics.gauge("app_runtime_stat", "Numeric counters from /api/stats", ("component", "stat"), _runtime_stat_values)
+metrics.gauge("shadow_model_stat", "Agreement and drift of each shadow candidate with the serving model",
+              ("candidate", "stat"), _shadow_values)
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus text-format metrics."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+startup_report["import_seconds"] = round(time.perf_counter() - _import_started, 4)
+
 
 # --------------------------
 # Run Dev Server
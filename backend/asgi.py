@@ -0,0 +1,529 @@
+# backend/asgi.py
+"""ASGI entry point: the same API, with Gemini calls awaited on an event loop.
+
+Under WSGI every request waiting on Gemini holds a worker thread, so the
+thread count caps how many students can be answered at once. Here
+``/api/predict`` and the frontend files are served by coroutines:
+
+- the Gemini call is awaited (``generate_content_async``), so a slow LLM
+  only ties up memory and thousands of requests can wait on it at once
+  (``GEMINI_ASYNC_MAX_CONCURRENCY``);
+- pipeline scoring, which is CPU-bound, runs on a small executor
+  (``ASGI_PREDICT_THREADS``). The compiled model answers in microseconds
+  and is scored inline, where a thread hop would cost more than the work;
+- parsing, validation, caching, metrics and the audit log are the Flask
+  app's own functions and objects, shared by both servers.
+
+Every other route (batch, CSV, admin, stats ...) is handed to the Flask app
+on a thread pool (``ASGI_WSGI_THREADS``), so the whole API answers the same
+on either server. Its request body is not buffered: the Flask app pulls it
+from the ASGI server as it reads, so CSV uploads keep streaming in constant
+memory. Blocking lookups a native route needs (the SQLite suggestion cache,
+loading a pinned model version) run on threads, never on the loop.
+
+No framework is needed beyond what the app already uses. Run with any ASGI
+server, e.g. uvicorn from ``requirements-optional.txt``:
+
+    uvicorn asgi:app --workers 4
+"""
+
+import asyncio
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+from werkzeug.exceptions import ClientDisconnected
+from werkzeug.http import http_date, parse_accept_header, parse_etags
+from werkzeug.utils import get_content_type
+
+# Workers each load the model; mmap lets them share its pages through the page cache
+os.environ.setdefault("MODEL_MMAP_MODE", "r")
+
+import app as app_module  # noqa: E402
+from cache import MISSING  # noqa: E402
+from feature_schema import SchemaError  # noqa: E402
+from admission import FULL, Rejected  # noqa: E402
+from resilience import CallRejected, DeadlineExceeded  # noqa: E402
+from scoring import feature_key  # noqa: E402
+from suggestion_cache import profile_key  # noqa: E402
+
+# Threads that score with the sklearn pipeline off the event loop
+ASGI_PREDICT_THREADS = int(os.environ.get('ASGI_PREDICT_THREADS', str(os.cpu_count() or 1)))
+# Threads that run the routes served by the Flask app (batch, CSV, admin ...)
+ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', '8'))
+
+predict_executor = ThreadPoolExecutor(ASGI_PREDICT_THREADS, thread_name_prefix="asgi-predict")
+wsgi_executor = ThreadPoolExecutor(ASGI_WSGI_THREADS, thread_name_prefix="asgi-wsgi")
+
+JSON_MIMETYPE = "application/json"
+# Bytes the Flask app's reads of a streamed request body are buffered in
+BODY_READ_SIZE = 64 * 1024
+
+
+class Request:
+    """The parts of an HTTP request the native routes need."""
+
+    def __init__(self, scope, body=b""):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.body = body
+        self.headers = {}
+        for name, value in scope["headers"]:
+            name, value = name.decode("latin-1").lower(), value.decode("latin-1")
+            self.headers[name] = f"{self.headers[name]}, {value}" if name in self.headers else value
+        self.args = {}
+        for name, value in parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True):
+            self.args.setdefault(name, value)
+        self.client = (scope.get("client") or (None,))[0]
+        self.started = time.perf_counter()
+
+    @property
+    def mimetype(self):
+        return self.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    def latency_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+class Response:
+    def __init__(self, body=b"", status=200, headers=None, mimetype=None):
+        self.body = body
+        self.status = status
+        self.headers = dict(headers or {})
+        if mimetype:
+            self.headers["Content-Type"] = mimetype
+
+
+def json_response(data, status=200, headers=None):
+    return Response(app_module.app.json.dumpb(data) + b"\n", status, headers, JSON_MIMETYPE)
+
+
+def read_request_record(request):
+    """``app.read_request_record`` for a buffered body; None for bodies only
+    Flask can parse (multipart forms)."""
+    mimetype = request.mimetype
+    if mimetype == JSON_MIMETYPE or (mimetype.startswith("application/") and mimetype.endswith("+json")):
+        return app_module.app.json.loads(request.body)
+    if mimetype in app_module.MSGPACK_MIMETYPES:
+        try:
+            import msgpack
+        except ImportError:
+            raise app_module.UnsupportedBody("MessagePack request bodies need the msgpack package") from None
+        return msgpack.unpackb(request.body, raw=False)
+    if mimetype.startswith("multipart/"):
+        return None
+    record = {}
+    if mimetype == "application/x-www-form-urlencoded":
+        for name, value in parse_qsl(request.body.decode("utf-8", "replace"), keep_blank_values=True):
+            record.setdefault(name, value)
+    return record
+
+
+# --------------------------
+#  Suggestions
+# --------------------------
+async def _in_thread_if(blocking, func, *args):
+    """``func(*args)``, on a thread when it would block (e.g. touches SQLite)."""
+    if blocking:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+
+def _start_suggestions_job(form_data, prediction, key):
+    """``app.start_suggestions_job`` plus the suggestion source it set on this thread."""
+    response_data = app_module.start_suggestions_job(form_data, prediction, key)
+    return response_data, app_module._suggestion_source.value
+
+
+async def generate_suggestions(form_data, prediction):
+    """``app.generate_suggestions`` with the Gemini call awaited.
+
+    Returns ``(suggestions, source, fell_back)``; ``fell_back`` is True for
+    the basic suggestions given when the guard gave up on Gemini (timeout,
+    open breaker, bulkhead full). Without an API key nothing waits on I/O,
+    so the Flask app's function answers directly.
+    """
+    if not app_module.GEMINI_API_KEY:
+        suggestions = app_module.generate_suggestions(form_data, prediction)
+        return suggestions, app_module._suggestion_source.value, False
+
+    cache_key = profile_key(form_data, prediction)
+    cached = await _in_thread_if(app_module.suggestion_store.enabled, app_module.suggestion_store.get, cache_key)
+    if cached:
+        app_module.suggestion_sources.inc("suggestion_cache")
+        return cached, "suggestion_cache", False
+
+    try:
+        prompt = app_module.suggestion_prompt(form_data, prediction)
+        try:
+            # The first call imports the SDK, which would stall the event loop
+            model = await _in_thread_if(app_module._gemini_model is None, app_module.get_gemini_model)
+            response = await app_module.gemini_async_guard.call(model.generate_content_async, prompt)
+        except (CallRejected, DeadlineExceeded) as e:
+            print(f"Gemini unavailable ({e}). Using basic suggestions.")
+            app_module.app_errors.inc("gemini_unavailable")
+            app_module.suggestion_sources.inc("basic")
+            return app_module.generate_basic_suggestions(form_data, prediction), "basic", True
+
+        suggestions = app_module.parse_suggestions(response.text)
+        await _in_thread_if(app_module.suggestion_store.enabled, app_module.suggestion_store.put,
+                            cache_key, suggestions)
+        app_module.suggestion_sources.inc("gemini")
+        return suggestions, "gemini", False
+    except Exception as e:
+        print(f"Error generating suggestions: {str(e)}")
+        app_module.app_errors.inc("suggestions")
+        return None, None, False
+
+
+# --------------------------
+#  Prediction API
+# --------------------------
+async def _require_model(version):
+    if app_module.model_ready.is_set():
+        entry = app_module.model_registry.peek(version)
+        if entry is not None:
+            return entry
+    # Still warming up, or a pinned version not loaded yet: wait off the loop
+    return await asyncio.to_thread(app_module.require_model, version)
+
+
+async def _score(model, features):
+    if hasattr(model, "predict_one"):
+        return app_module.predict_record(model, features)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(predict_executor, app_module.micro_batcher.predict, model, features)
+
+
+async def admitted_predict(request):
+    """``predict`` behind the Flask app's admission control."""
+    admission = app_module.admission
+    try:
+        level = admission.admit(app_module.client_id(request.headers, request.client))
+    except Rejected as e:
+        return json_response(*app_module.rejected_response(e))
+    try:
+        return await predict(request, level)
+    finally:
+        admission.release(time.perf_counter() - request.started)
+
+
+async def predict(request, level=FULL):
+    stages = app_module.PREDICT_STAGES
+    try:
+        # JSON, MessagePack or form body -> model features, every field checked once
+        with stages["parse"].time():
+            record = read_request_record(request)
+            if record is None:
+                return None
+            features = app_module.record_decoder.decode(record)
+
+        app_module.reload_model_if_changed()
+        version = request.headers.get("x-model-version") or request.args.get("model_version") or None
+        entry = await _require_model(version)
+        key = (entry.version, entry.signature, feature_key(features))
+        cached = app_module.prediction_cache.get(key)
+        if cached is not MISSING:
+            prediction, suggestions = cached
+            app_module.suggestion_sources.inc("prediction_cache")
+            app_module.audit_log.record("/api/predict", entry.version, features, None, prediction,
+                                        "prediction_cache", request.latency_ms())
+            with stages["serialize"].time():
+                return json_response({
+                    "success": True,
+                    "prediction": prediction,
+                    "suggestions": suggestions,
+                    "model_version": entry.version
+                })
+
+        with stages["predict"].time():
+            raw_pred = await _score(entry.scorer, features)
+        app_module.predictions_total.inc(entry.version)
+        app_module.shadow.offer(features, entry.version, raw_pred)
+        prediction = round(max(0, min(100, raw_pred)), 2)
+
+        if level != FULL:
+            response_data = app_module.degraded_response(record, prediction, level)
+            response_data["model_version"] = entry.version
+            app_module.audit_log.record("/api/predict", entry.version, features, raw_pred, prediction,
+                                        app_module._suggestion_source.value, request.latency_ms())
+            return json_response(response_data)
+
+        if app_module.GEMINI_API_KEY and request.args.get("suggestions", app_module.SUGGESTIONS_MODE) == "async":
+            response_data, source = await _in_thread_if(
+                app_module.suggestion_store.enabled, _start_suggestions_job, record, prediction, key)
+            response_data["model_version"] = entry.version
+            app_module.audit_log.record("/api/predict", entry.version, features, raw_pred, prediction,
+                                        source, request.latency_ms())
+            return json_response(response_data)
+
+        with stages["suggestions"].time():
+            suggestions, source, fell_back = await generate_suggestions(record, prediction)
+
+        response_data = {"success": True, "prediction": prediction, "model_version": entry.version}
+        if suggestions:
+            response_data["suggestions"] = suggestions
+            if not fell_back:
+                # Not after a Gemini timeout or open breaker, so recovery isn't masked
+                app_module.prediction_cache.set(key, (prediction, suggestions))
+        else:
+            # Fallback if both fail (not cached so the next request retries)
+            app_module.suggestion_sources.inc("fallback")
+            source = "fallback"
+            response_data["suggestions"] = list(app_module.FALLBACK_SUGGESTIONS)
+        app_module.audit_log.record("/api/predict", entry.version, features, raw_pred, prediction,
+                                    source, request.latency_ms())
+
+        with stages["serialize"].time():
+            return json_response(response_data)
+
+    except app_module.ModelNotReady as e:
+        return json_response({"success": False, "error": str(e)}, 503, {"Retry-After": "1"})
+    except app_module.UnknownModelVersion as e:
+        return json_response({"success": False, "error": f"Unknown model version: {e.args[0] if e.args else ''}"}, 404)
+    except app_module.ModelLoadError as e:
+        return json_response({"success": False, "error": str(e)}, 500)
+    except app_module.UnsupportedBody as e:
+        return json_response({"success": False, "error": str(e)}, 415)
+    except SchemaError as e:
+        return json_response({"success": False, "error": str(e), "errors": e.errors}, 400)
+    except Exception as e:
+        return json_response({"success": False, "error": str(e)}, 400)
+
+
+# --------------------------
+#  Serve Frontend Files
+# --------------------------
+def serve_asset(request, filename):
+    """``app.serve_asset`` for files in the manifest; None for anything else."""
+    if app_module.STATIC_WATCH:
+        app_module.frontend_assets.reload_if_changed()
+    asset = app_module.frontend_assets.get(filename)
+    if asset is None:
+        return None
+    encoding = app_module.preferred_encoding(asset, parse_accept_header(request.headers.get("accept-encoding")))
+    etag, headers = app_module.asset_headers(asset, encoding, request.args.get("v"))
+    if parse_etags(request.headers.get("if-none-match")).contains_weak(etag):
+        return Response(status=304, headers=headers)
+    response = Response(asset.variants[encoding], headers=headers,
+                        mimetype=get_content_type(asset.mimetype, "utf-8"))
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.headers["Last-Modified"] = http_date(asset.mtime)
+    return response
+
+
+# --------------------------
+#  ASGI plumbing
+# --------------------------
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def _count_request(route, request, status):
+    """What ``app.count_request`` records for Flask routes."""
+    key = (route, request.method, status)
+    children = app_module._request_metrics.get(key)
+    if children is None:
+        children = app_module._request_metrics[key] = (
+            app_module.http_requests.labels(route, request.method, str(status)),
+            app_module.http_latency.labels(route),
+        )
+    children[0].inc()
+    children[1].observe(time.perf_counter() - request.started)
+
+
+async def send_response(send, request, response):
+    headers = response.headers
+    headers["Content-Length"] = str(len(response.body))
+    # Same headers flask-cors adds to Flask's responses
+    origin = request.headers.get("origin")
+    headers["Access-Control-Allow-Origin"] = origin or "*"
+    if origin and "Vary" not in headers:
+        headers["Vary"] = "Origin"
+    await send({
+        "type": "http.response.start",
+        "status": response.status,
+        "headers": [(k.lower().encode("latin-1"), str(v).encode("latin-1")) for k, v in headers.items()],
+    })
+    await send({"type": "http.response.body", "body": b"" if request.method == "HEAD" else response.body})
+
+
+class ReceiveStream(io.RawIOBase):
+    """``wsgi.input`` that pulls the request body from ASGI ``receive`` as it is read.
+
+    It is read on a pool thread. Each refill waits for the next
+    ``http.request`` message on the event loop, so only one message is held
+    at a time and a slow reader holds back the client.
+    """
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._chunk = memoryview(b"")
+        self._more = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._chunk:
+            if not self._more:
+                return 0
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message["type"] == "http.disconnect":
+                self._more = False
+                raise ClientDisconnected()
+            self._chunk = memoryview(message.get("body", b""))
+            self._more = message.get("more_body", False)
+        n = min(len(buffer), len(self._chunk))
+        buffer[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+
+def wsgi_environ(scope, body_stream):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body_stream,
+        # The stream ends with the body, so chunked uploads (no Content-Length) are read too
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name, value = name.decode("latin-1").upper().replace("-", "_"), value.decode("latin-1")
+        key = name if name in ("CONTENT_TYPE", "CONTENT_LENGTH") else f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _run_wsgi(environ, loop, chunks):
+    """Run the Flask app on a pool thread, passing the response to the loop
+    through a bounded queue (a slow client holds back a streaming response)."""
+    def put(item):
+        asyncio.run_coroutine_threadsafe(chunks.put(item), loop).result()
+
+    def start_response(status, headers, exc_info=None):
+        put(("start", int(status.split(" ", 1)[0]), headers))
+        return lambda data: put(("body", data))
+
+    try:
+        result = app_module.app(environ, start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    put(("body", chunk))
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+    except BaseException as e:
+        put(("error", e))
+    finally:
+        put(("end",))
+
+
+async def call_wsgi(scope, receive, send, body=None):
+    """Serve the request with the Flask app, streaming its response.
+
+    The app reads the request body straight from ``receive``, unless it was
+    already read (``body``).
+    """
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue(maxsize=8)
+    if body is None:
+        body_stream = io.BufferedReader(ReceiveStream(receive, loop), BODY_READ_SIZE)
+    else:
+        body_stream = io.BytesIO(body)
+        scope = dict(scope, headers=[(k, v) for k, v in scope["headers"] if k.lower() != b"content-length"]
+                     + [(b"content-length", str(len(body)).encode("latin-1"))])
+    loop.run_in_executor(wsgi_executor, _run_wsgi, wsgi_environ(scope, body_stream), loop, chunks)
+    started = finished = False
+    try:
+        while True:
+            item = await chunks.get()
+            if item[0] == "end":
+                finished = True
+                break
+            if item[0] == "error":
+                raise item[1]
+            if item[0] == "start":
+                headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in item[2]]
+                await send({"type": "http.response.start", "status": item[1], "headers": headers})
+                started = True
+            elif scope["method"] != "HEAD":
+                await send({"type": "http.response.body", "body": item[1], "more_body": True})
+        if started:
+            await send({"type": "http.response.body", "body": b""})
+    finally:
+        if not finished:
+            # Let the pool thread finish instead of blocking on a full queue
+            loop.create_task(_drain(chunks))
+
+
+async def _drain(chunks):
+    while (await chunks.get())[0] != "end":
+        pass
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            app_module.suggestion_jobs.shutdown(wait=False)
+            app_module.audit_log.close()
+            predict_executor.shutdown(wait=False)
+            wsgi_executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        raise NotImplementedError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    request = Request(scope)
+    response, route, body = None, None, None
+    if request.method == "POST" and request.path == "/api/predict" and not request.mimetype.startswith("multipart/"):
+        # A single record: small enough to buffer before parsing
+        body = request.body = await read_body(receive)
+        if body is None:
+            return
+        route = "/api/predict"
+        response = await admitted_predict(request)
+    elif request.method in ("GET", "HEAD") and not request.path.startswith("/api/"):
+        filename = request.path.lstrip("/")
+        route = "/<path:filename>" if filename else "/"
+        response = serve_asset(request, filename or "index.html")
+
+    if response is None:
+        return await call_wsgi(scope, receive, send, body)
+    _count_request(route, request, response.status)
+    await send_response(send, request, response)
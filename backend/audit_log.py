@@ -0,0 +1,320 @@
+# backend/audit_log.py
+"""Append-only log of every prediction served, written off the request path.
+
+``record`` only appends a tuple to an in-memory buffer. A background thread
+drains the buffer in batches into a SQLite database in WAL mode with one
+``executemany`` and one commit per batch. Every input feature gets its own
+column, so the log can be queried with plain SQL and nothing has to be
+serialized to JSON.
+The buffer is bounded. When it is full a record is dropped (``drop``, the
+default), or the caller waits briefly for the writer and then drops
+(``block``). Either way it is counted.
+
+When the database grows past ``rotate_bytes`` it is renamed to
+``<path>.1`` (older files shift up to ``<path>.<keep>``) and a fresh one
+is started. ``replay`` and ``query`` read across the rotated files, oldest
+first.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from background import LazyThread
+
+# Columns before and after the feature columns
+LEADING = ("ts", "endpoint", "model_version")
+TRAILING = ("raw_prediction", "prediction", "suggestion_source", "latency_ms")
+
+# A buffered batch entry: many rows from one frame, expanded by the writer
+_BATCH = object()
+
+
+def _quoted(columns):
+    return ", ".join(f'"{c}"' for c in columns)
+
+
+def _connect(path, feature_columns):
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL only syncs at checkpoints: a crash can lose the last
+    # batches, never corrupt the file
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS predictions ("
+        " id INTEGER PRIMARY KEY, ts REAL NOT NULL, endpoint TEXT, model_version TEXT,"
+        " raw_prediction REAL, prediction REAL, suggestion_source TEXT, latency_ms REAL)"
+    )
+    # Feature columns are untyped (SQLite stores numbers and text as given);
+    # fields added to the schema later become new columns
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(predictions)")}
+    for column in feature_columns:
+        if column not in existing:
+            conn.execute(f'ALTER TABLE predictions ADD COLUMN "{column}"')
+    conn.execute("CREATE INDEX IF NOT EXISTS predictions_ts ON predictions (ts)")
+    conn.commit()
+    return conn
+
+
+class AuditLog:
+    """Bounded in-memory buffer plus a background SQLite writer.
+
+    The writer is a ``LazyThread`` started by the first record. An empty
+    ``path`` disables the log.
+    """
+
+    def __init__(self, path, feature_columns, max_buffer=10000, batch_size=500, flush_interval=1.0,
+                 overflow="drop", block_timeout=0.05, rotate_bytes=64 * 2 ** 20, keep=5):
+        if overflow not in ("drop", "block"):
+            raise ValueError("overflow must be 'drop' or 'block'")
+        self.path = path
+        self.feature_columns = tuple(feature_columns)
+        self.columns = LEADING + self.feature_columns + TRAILING
+        self._insert = f"INSERT INTO predictions ({_quoted(self.columns)}) VALUES ({', '.join('?' * len(self.columns))})"
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.rotate_bytes = rotate_bytes
+        self.keep = keep
+        self._buffer = deque()
+        self._buffered = 0  # rows, counting each batch entry's rows
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._drained = threading.Condition()
+        self._writer = LazyThread(self._run, "audit-log", on_start=self._prepare)
+        self._stopping = False
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.rotations = 0
+        self.write_errors = 0
+        self.write_seconds = 0.0
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    # ----- hot path -----
+
+    def record(self, endpoint, model_version, features, raw_prediction, prediction,
+               suggestion_source=None, latency_ms=None):
+        """Queue one prediction; False if it was dropped because the buffer is full."""
+        if not self.enabled:
+            return False
+        return self._put((time.time(), endpoint, model_version, features, raw_prediction, prediction,
+                          suggestion_source, latency_ms), 1)
+
+    def record_frame(self, endpoint, model_version, features, raw_predictions, predictions, latency_ms=None):
+        """Queue one row per record of a scored feature frame (converted by the writer)."""
+        if not self.enabled or not len(features):
+            return False
+        return self._put((_BATCH, time.time(), endpoint, model_version, features, raw_predictions,
+                          predictions, latency_ms), len(features))
+
+    def _put(self, item, rows):
+        self._writer.ensure_started()
+        if self._buffered + rows > self.max_buffer:
+            if self.overflow == "block":
+                self._wakeup.set()
+                with self._drained:
+                    self._drained.wait_for(lambda: self._buffered + rows <= self.max_buffer, self.block_timeout)
+        with self._lock:
+            if self._buffered + rows > self.max_buffer:
+                self.dropped += rows
+                return False
+            self._buffer.append(item)
+            self._buffered += rows
+            self.recorded += rows
+            full = self._buffered >= self.batch_size
+        if full:
+            self._wakeup.set()
+        return True
+
+    # ----- writer -----
+
+    def _prepare(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._stopping = False
+
+    def _run(self):
+        conn = _connect(self.path, self.feature_columns)
+        inode = os.stat(self.path).st_ino
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            while self._buffer:
+                conn, inode = self._write_batch(conn, inode)
+            with self._drained:
+                self._drained.notify_all()
+            if self._stopping and not self._buffer:
+                break
+        conn.close()
+
+    def _take(self):
+        items, rows = [], 0
+        while self._buffer and rows < self.batch_size:
+            item = self._buffer.popleft()
+            items.append(item)
+            rows += item[4].shape[0] if item[0] is _BATCH else 1
+        return items, rows
+
+    def _write_batch(self, conn, inode):
+        items, rows = self._take()
+        started = time.perf_counter()
+        try:
+            conn.executemany(self._insert, self._expand(items))
+            conn.commit()
+            self.written += rows
+            self.batches += 1
+        except Exception as e:
+            # Anything (a SQLite error, a record that can't be expanded) loses
+            # this batch only: the writer thread must keep running
+            self.write_errors += 1
+            with self._lock:
+                self.dropped += rows
+            print(f"Audit log write failed, {rows} records lost: {e!r}")
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+        finally:
+            with self._lock:
+                self._buffered -= rows
+            with self._drained:
+                self._drained.notify_all()
+        self.write_seconds += time.perf_counter() - started
+        try:
+            return self._maybe_rotate(conn, inode)
+        except (OSError, sqlite3.Error) as e:
+            self.write_errors += 1
+            print(f"Audit log rotation failed, still writing to {self.path}: {e!r}")
+            return conn, inode
+
+    def _maybe_rotate(self, conn, inode):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+        if stat is None or stat.st_ino != inode:
+            # Another process rotated (or someone removed) the file: follow it to the new one
+            conn.close()
+            conn = _connect(self.path, self.feature_columns)
+            return conn, os.stat(self.path).st_ino
+        wal = self.path + "-wal"
+        size = stat.st_size + (os.path.getsize(wal) if os.path.exists(wal) else 0)
+        if size < self.rotate_bytes:
+            return conn, inode
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+        for i in range(self.keep - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+        self.rotations += 1
+        conn = _connect(self.path, self.feature_columns)
+        return conn, os.stat(self.path).st_ino
+
+    def _expand(self, items):
+        """Rows for executemany, built here rather than on the request path."""
+        columns = self.feature_columns
+        for item in items:
+            if item[0] is _BATCH:
+                _, ts, endpoint, version, frame, raw, scores, latency = item
+                values = frame.reindex(columns=list(columns)).astype(object)
+                values = values.where(values.notna(), None).itertuples(index=False, name=None)
+                for features, r, s in zip(values, raw.tolist(), scores.tolist()):
+                    yield (ts, endpoint, version) + features + (r, s, None, latency)
+            else:
+                ts, endpoint, version, features, raw, score, source, latency = item
+                yield (ts, endpoint, version) + tuple(map(features.get, columns)) + (raw, score, source, latency)
+
+    def flush(self, timeout=5.0):
+        """Wait until everything recorded so far is written; False on timeout."""
+        if not self._writer.started:
+            return not self._buffered
+        self._wakeup.set()
+        with self._drained:
+            return self._drained.wait_for(lambda: not self._buffered, timeout)
+
+    def close(self, timeout=5.0):
+        """Write out the buffer and stop the writer thread."""
+        if not self._writer.started:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._writer.join(timeout)
+
+    # ----- reading -----
+
+    def files(self):
+        """Database files, oldest first."""
+        rotated = [f"{self.path}.{i}" for i in range(self.keep, 0, -1)]
+        return [p for p in rotated + [self.path] if os.path.exists(p)]
+
+    def replay(self, since=None, until=None, model_version=None, endpoint=None):
+        """Every logged prediction matching the filters, oldest first, as dicts."""
+        for path in self.files():
+            yield from query_file(path, self.feature_columns, since, until, model_version, endpoint)
+
+    def query(self, since=None, until=None, model_version=None, endpoint=None, limit=100):
+        """The most recent ``limit`` matching predictions, newest first."""
+        rows = []
+        for path in reversed(self.files()):
+            rows.extend(query_file(path, self.feature_columns, since, until, model_version, endpoint,
+                                   limit=limit - len(rows), newest_first=True))
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "buffered": self._buffered,
+            "batches": self.batches,
+            "rotations": self.rotations,
+            "write_errors": self.write_errors,
+            "write_seconds": round(self.write_seconds, 4),
+        }
+
+
+def query_file(path, feature_columns, since=None, until=None, model_version=None, endpoint=None,
+               limit=None, newest_first=False):
+    """Rows from one database file as dicts, with the inputs under ``features``."""
+    clauses, params = [], []
+    for column, op, value in (("ts", ">=", since), ("ts", "<", until),
+                              ("model_version", "=", model_version), ("endpoint", "=", endpoint)):
+        if value is not None:
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+    columns = LEADING + tuple(feature_columns) + TRAILING
+    sql = f"SELECT {_quoted(columns)} FROM predictions"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY id DESC" if newest_first else " ORDER BY id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        n = len(LEADING)
+        for row in conn.execute(sql, params):
+            entry = dict(zip(LEADING, row))
+            entry["features"] = dict(zip(feature_columns, row[n:n + len(feature_columns)]))
+            entry.update(zip(TRAILING, row[n + len(feature_columns):]))
+            yield entry
+    finally:
+        conn.close()
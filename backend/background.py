@@ -0,0 +1,52 @@
+# backend/background.py
+"""Daemon threads that start on the first piece of work, not at construction.
+
+The audit log writer, the micro-batch dispatcher and the shadow scorer are
+module-level objects in app.py, so they are built at import. Under gunicorn
+with ``preload_app`` that import happens in the parent process, which then
+forks the workers, and a thread does not survive a fork: one started at
+import would run only in the parent, and every worker would queue work that
+nobody picks up. ``LazyThread`` leaves the thread unstarted until the owner
+first calls ``ensure_started``, which happens in the worker that has work.
+"""
+
+import threading
+
+
+class LazyThread:
+    """One daemon thread running ``target``, started by the first ``ensure_started``.
+
+    ``on_start`` runs just before the thread is started (e.g. to create a
+    directory or reset a stop flag). After ``join`` the next
+    ``ensure_started`` starts a fresh thread.
+    """
+
+    def __init__(self, target, name, on_start=None):
+        self.target = target
+        self.name = name
+        self.on_start = on_start
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self):
+        return self._thread is not None
+
+    def ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                if self.on_start is not None:
+                    self.on_start()
+                thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def join(self, timeout=None):
+        """Wait for the thread to finish (the owner has told it to stop) and forget it."""
+        thread = self._thread
+        if thread is None:
+            return
+        thread.join(timeout)
+        self._thread = None
@@ -0,0 +1,96 @@
+"""
+/api/predict under overload, with and without admission control.
+
+``--clients`` threads post predictions back to back for ``--seconds``
+through the Flask test client. Gemini is replaced by tests/fake_gemini.py
+answering after ``--delay`` seconds, and the caches are off. Two runs:
+- no admission control, which is the default;
+- the ladder set to basic at 8 requests in flight and prediction_only at
+  16, with a cap of 24 in flight.
+Each run reports:
+- answered requests per second;
+- p50 and p99 latency of the answered requests;
+- how many were shed (429/503);
+- how many Gemini calls were started;
+- the service levels served.
+Run from backend/: python benchmarks/bench_admission.py [--clients 32] [--seconds 5] [--delay 0.5]
+"""
+
+import argparse
+import collections
+import contextlib
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = "fake"
+os.environ["MODEL_WARMUP"] = "sync"
+os.environ["PREDICTION_CACHE_SIZE"] = "0"
+os.environ["SUGGESTION_CACHE_PATH"] = ""
+os.environ["AUDIT_LOG_PATH"] = ""
+
+import app as app_module  # noqa: E402
+from admission import AdmissionController  # noqa: E402
+from resilience import GuardedCall  # noqa: E402
+from tests.fake_gemini import FakeGemini  # noqa: E402
+
+
+def run(controller, clients, seconds):
+    app_module.admission = controller
+    fake = app_module._gemini_model = FakeGemini(delay=app_module._gemini_model.delay)
+    latencies, statuses, levels = [], collections.Counter(), collections.Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client_loop(n):
+        client = app_module.app.test_client()
+        i = 0
+        while time.perf_counter() < deadline:
+            body = dict(app_module.WARMUP_RECORD, age=18 + i % 7, study_hours_per_day=round(1 + n + i * 0.01, 2))
+            started = time.perf_counter()
+            response = client.post("/api/predict", json=body)
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[response.status_code] += 1
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                    levels[response.get_json().get("service_level", "full")] += 1
+            i += 1
+
+    threads = [threading.Thread(target=client_loop, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if latencies else (0, 0)
+    return len(latencies) / seconds, p50, p99, statuses[429] + statuses[503], fake.calls, dict(levels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--delay", type=float, default=0.5, help="fake Gemini answer time (s)")
+    args = parser.parse_args()
+
+    app_module._gemini_model = FakeGemini(delay=args.delay)
+    app_module.gemini_guard = GuardedCall(args.delay * 10 + 5, app_module.GEMINI_MAX_CONCURRENCY, 10 ** 6, 1)
+    configs = [
+        ("off", AdmissionController()),
+        ("ladder 8/16, cap 24", AdmissionController(max_in_flight=24, in_flight_thresholds=(8, 16))),
+    ]
+    print(f"{args.clients} clients for {args.seconds:.0f} s, fake Gemini {args.delay * 1000:.0f} ms, "
+          f"{app_module.GEMINI_MAX_CONCURRENCY} Gemini calls at once")
+    print(f"{'admission':<20} {'answered/s':>10} {'p50 ms':>7} {'p99 ms':>7} {'shed':>6} {'gemini':>6}  levels")
+    for name, controller in configs:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            rate, p50, p99, shed, calls, levels = run(controller, args.clients, args.seconds)
+        print(f"{name:<20} {rate:>10.0f} {p50:>7.0f} {p99:>7.0f} {shed:>6} {calls:>6}  {levels}")
+
+
+if __name__ == "__main__":
+    main()
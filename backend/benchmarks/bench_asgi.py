@@ -0,0 +1,126 @@
+"""
+Slow-LLM load test: Flask on a fixed thread pool vs the ASGI variant.
+
+Gemini is replaced by tests/fake_gemini.py with a fixed delay, and the
+prediction and suggestion caches are off, so every request waits on the
+"LLM". Flask is driven by as many threads as a gunicorn gthread worker has
+(``--threads``), the ASGI app by one event loop holding every request open
+at once. Reported: throughput, latency percentiles and the peak number of
+threads in the process. Run from backend/:
+    python benchmarks/bench_asgi.py [--delay 0.5] [--requests 2000] [--threads 8]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = "fake"
+os.environ["MODEL_WARMUP"] = "sync"
+os.environ["PREDICTION_CACHE_SIZE"] = "0"
+os.environ["SUGGESTION_CACHE_PATH"] = ""
+os.environ["AUDIT_LOG_PATH"] = ""
+
+import app as app_module  # noqa: E402
+import asgi  # noqa: E402
+from resilience import AsyncGuardedCall, GuardedCall  # noqa: E402
+from tests.asgi_client import ASGITestClient  # noqa: E402
+from tests.fake_gemini import FakeGemini  # noqa: E402
+from tests.samples import student  # noqa: E402
+
+
+class PeakThreads:
+    """Samples threading.active_count() in the background."""
+
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def flask_run(n, threads, delay):
+    app_module.gemini_guard = GuardedCall(delay * 10 + 5, threads, 10 ** 6, 1)
+    client = app_module.app.test_client()
+    latencies = []
+
+    def one(i):
+        started = time.perf_counter()
+        data = client.post("/api/predict", json=student(i)).get_json()
+        latencies.append(time.perf_counter() - started)
+        return data["success"]
+
+    with PeakThreads() as peak:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            ok = sum(pool.map(one, range(n)))
+        elapsed = time.perf_counter() - started
+    return ok, elapsed, latencies, peak.peak
+
+
+def asgi_run(n, delay):
+    app_module.gemini_async_guard = AsyncGuardedCall(delay * 10 + 5, n, 10 ** 6, 1)
+    client = ASGITestClient(asgi.app)
+    latencies = []
+
+    async def one(i):
+        started = time.perf_counter()
+        response = await client.request("/api/predict", "POST", json=student(i))
+        latencies.append(time.perf_counter() - started)
+        return response.get_json()["success"]
+
+    async def run():
+        return sum(await asyncio.gather(*(one(i) for i in range(n))))
+
+    with PeakThreads() as peak:
+        started = time.perf_counter()
+        ok = asyncio.run(run())
+        elapsed = time.perf_counter() - started
+    return ok, elapsed, latencies, peak.peak
+
+
+def report(name, n, result):
+    ok, elapsed, latencies, peak = result
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"{name:<22} {n:>6} {ok:>6} {n / elapsed:>9.1f} {p50:>9.0f} {p99:>9.0f} {peak:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--delay", type=float, default=0.5, help="fake Gemini latency (s)")
+    parser.add_argument("--requests", type=int, default=2000, help="requests sent to the ASGI app")
+    parser.add_argument("--threads", type=int, default=8, help="Flask worker threads")
+    args = parser.parse_args()
+
+    app_module._gemini_model = FakeGemini(delay=args.delay)
+    # Enough Flask requests for several rounds of the thread pool
+    flask_requests = args.threads * 10
+    print(f"Fake Gemini latency {args.delay * 1000:.0f} ms, caches off")
+    print(f"{'server':<22} {'sent':>6} {'ok':>6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'threads':>8}")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        flask = flask_run(flask_requests, args.threads, args.delay)
+        served = asgi_run(args.requests, args.delay)
+    report(f"Flask, {args.threads} threads", flask_requests, flask)
+    report("ASGI, one event loop", args.requests, served)
+
+
+if __name__ == "__main__":
+    main()
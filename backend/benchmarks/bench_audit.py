@@ -0,0 +1,67 @@
+"""
+Cost of the prediction audit log on the request path.
+
+Times ``AuditLog.record`` on its own and /api/predict with the log enabled
+vs disabled (test client, basic suggestions, prediction cache off), then
+checks that the writer kept up. Run from backend/: python benchmarks/bench_audit.py
+"""
+
+import contextlib
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["MODEL_WARMUP"] = "sync"
+os.environ["PREDICTION_CACHE_SIZE"] = "0"
+
+import app as app_module  # noqa: E402
+from audit_log import AuditLog  # noqa: E402
+
+STUDENT = dict(app_module.WARMUP_RECORD)
+
+
+def predict_us(client, n):
+    started = time.perf_counter()
+    for _ in range(n):
+        client.post("/api/predict", json=STUDENT)
+    return (time.perf_counter() - started) / n * 1e6
+
+
+def main(n=5000):
+    features = app_module.parse_record(STUDENT)
+    client = app_module.app.test_client()
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(os.path.join(tmp, "bench.sqlite3"), app_module.FEATURE_COLUMNS, max_buffer=10 ** 6)
+        calls = 100000
+        per_record = min(timeit.repeat(
+            lambda: log.record("/api/predict", "v", features, 71.2, 71.2, "basic", 1.0),
+            number=calls, repeat=3)) / calls * 1e6
+        log.flush(timeout=60)
+        print(f"AuditLog.record:              {per_record:6.2f} µs/call "
+              f"(writer: {log.written} rows in {log.write_seconds:.2f}s, {log.batches} batches)")
+        log.close()
+
+        enabled = AuditLog(os.path.join(tmp, "app.sqlite3"), app_module.FEATURE_COLUMNS)
+        disabled = AuditLog("", app_module.FEATURE_COLUMNS)
+        timings = {"disabled": [], "enabled": []}
+        # The app prints on every basic-suggestion fallback; keep the report readable
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for _ in range(3):
+                for name, audit in (("disabled", disabled), ("enabled", enabled)):
+                    app_module.audit_log = audit
+                    predict_us(client, 200)
+                    timings[name].append(predict_us(client, n))
+        enabled.flush(timeout=60)
+        off, on = min(timings["disabled"]), min(timings["enabled"])
+        print(f"/api/predict, audit disabled: {off:8.1f} µs/request")
+        print(f"/api/predict, audit enabled:  {on:8.1f} µs/request ({on - off:+.1f} µs)")
+        print(f"records written {enabled.written}, dropped {enabled.dropped}")
+        enabled.close()
+
+
+if __name__ == "__main__":
+    main()
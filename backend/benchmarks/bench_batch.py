@@ -0,0 +1,52 @@
+"""
+Throughput comparison: /api/predict (one request per student) vs /api/predict/batch.
+
+Run from backend/: python benchmarks/bench_batch.py [n_students]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = ""
+
+from app import app  # noqa: E402
+
+STUDENT = {
+    "age": 20,
+    "gender": "Male",
+    "study_hours_per_day": 5.5,
+    "social_media_hours": 2.0,
+    "part_time_job": "No",
+    "attendance_percentage": 90,
+    "sleep_hours": 7.5,
+    "diet_quality": "Good",
+    "exercise_frequency": 3,
+    "parental_education_level": "Bachelor",
+    "internet_Resource_accessibility": "Good",
+    "extracurricular_participation": "Yes",
+}
+
+
+def main(n):
+    students = [dict(STUDENT, study_hours_per_day=(i % 80) / 10) for i in range(n)]
+    client = app.test_client()
+
+    start = time.perf_counter()
+    for s in students:
+        client.post("/api/predict", json=s)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    client.post("/api/predict/batch", json=students)
+    batch = time.perf_counter() - start
+
+    print(f"students:          {n}")
+    print(f"single-row path:   {single:.3f}s  ({n / single:,.0f} rows/s)")
+    print(f"batch endpoint:    {batch:.3f}s  ({n / batch:,.0f} rows/s)")
+    print(f"speedup:           {single / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
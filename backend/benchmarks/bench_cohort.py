@@ -0,0 +1,50 @@
+"""
+Cohort analytics throughput and peak memory for growing uploads.
+
+Peak memory is measured with tracemalloc over scoring plus aggregation; it
+should stay flat as the row count grows (it depends on the chunk size and
+the number of groups). Run from backend/: python benchmarks/bench_cohort.py
+"""
+
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["MODEL_WARMUP"] = "sync"
+
+import pandas as pd  # noqa: E402
+
+import app as app_module  # noqa: E402
+from cohort_stats import CohortAnalysis  # noqa: E402
+from scoring import iter_csv_chunks, score_frame  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from suite import make_students  # noqa: E402
+
+
+def main():
+    scorer = app_module.require_model().scorer
+    block = pd.DataFrame(make_students(10000, seed=5)).to_csv(index=False).encode()
+    header, body = block.split(b"\n", 1)
+    print(f"{'rows':>9} {'seconds':>9} {'rows/s':>10} {'peak MiB':>9}")
+    for repeats in (1, 5, 20):
+        upload = io.BytesIO(header + b"\n" + body * repeats)
+        tracemalloc.start()
+        started = time.perf_counter()
+        analysis = CohortAnalysis()
+        for _raw, features, errors in iter_csv_chunks(upload, 10000):
+            analysis.update(features, score_frame(scorer, features), failed=len(errors))
+        analysis.report()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        rows = analysis.overall.count
+        print(f"{rows:>9} {elapsed:>9.2f} {rows / elapsed:>10,.0f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Cost of the /metrics instrumentation: per-operation micro-benchmarks and
+/api/predict with instrumentation on vs patched out.
+
+Run from backend/: python benchmarks/bench_metrics.py [--requests 2000] [--rounds 7]
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["PREDICTION_CACHE_SIZE"] = "0"
+os.environ["MODEL_WARMUP"] = "sync"
+
+import app as app_module  # noqa: E402
+import metrics  # noqa: E402
+
+STUDENT = {
+    "age": 20,
+    "gender": "Male",
+    "study_hours_per_day": 5.5,
+    "social_media_hours": 2.0,
+    "part_time_job": "No",
+    "attendance_percentage": 90,
+    "sleep_hours": 7.5,
+    "diet_quality": "Good",
+    "exercise_frequency": 3,
+    "parental_education_level": "Bachelor",
+    "internet_Resource_accessibility": "Good",
+    "extracurricular_participation": "Yes",
+}
+
+
+def per_call_ns(fn, n=200000, repeats=5):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / n * 1e9
+
+
+def predict_us(client, bodies, repeats=5):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for body in bodies:
+            client.post("/api/predict", json=body)
+        best = min(best, time.perf_counter() - start)
+    return best / len(bodies) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("c", "bench", ("a",)).labels("x")
+    histogram = registry.histogram("h", "bench", ("a",)).labels("x")
+    unbound = registry.counter("u", "bench", ("a", "b", "c"))
+
+    def timed_block():
+        with histogram.time():
+            pass
+
+    print("per operation, ns")
+    print(f"  counter.inc (bound)            {per_call_ns(counter.inc):7.0f}")
+    print(f"  counter.labels(...).inc        {per_call_ns(lambda: unbound.labels('x', 'y', 'z').inc()):7.0f}")
+    print(f"  histogram.observe              {per_call_ns(lambda: histogram.observe(0.0004)):7.0f}")
+    print(f"  with histogram.time(): pass    {per_call_ns(timed_block):7.0f}")
+
+    # Varied bodies so every request is scored (the prediction cache is off too)
+    bodies = [dict(STUDENT, study_hours_per_day=(i % 80) / 10) for i in range(args.requests)]
+    client = app_module.app.test_client()
+    predict_us(client, bodies[:200], repeats=1)
+
+    # Drop only the metrics hooks; CORS registers after_request hooks as well
+    flask_app = app_module.app
+    ours = (app_module.start_request_timer, app_module.count_request)
+    before = [f for f in flask_app.before_request_funcs[None] if f not in ours]
+    after = [f for f in flask_app.after_request_funcs[None] if f not in ours]
+    noop = lambda *a, **k: None  # noqa: E731
+
+    # Alternate the two setups so drift in machine load hits both equally
+    with_metrics, without_metrics = float("inf"), float("inf")
+    for _ in range(args.rounds):
+        with_metrics = min(with_metrics, predict_us(client, bodies, repeats=1))
+        with patch.object(metrics._CounterChild, "inc", noop), \
+                patch.object(metrics._HistogramChild, "observe", noop), \
+                patch.dict(flask_app.before_request_funcs, {None: before}), \
+                patch.dict(flask_app.after_request_funcs, {None: after}):
+            without_metrics = min(without_metrics, predict_us(client, bodies, repeats=1))
+
+    print("/api/predict through the test client, µs/request (best of "
+          f"{args.rounds} alternating rounds)")
+    print(f"  instrumented                   {with_metrics:7.1f}")
+    print(f"  instrumentation patched out    {without_metrics:7.1f}")
+    print(f"  overhead                       {with_metrics - without_metrics:7.1f} "
+          f"({(with_metrics - without_metrics) / without_metrics:.1%})")
+
+    start = time.perf_counter()
+    body = client.get("/metrics").get_data()
+    print(f"/metrics scrape: {(time.perf_counter() - start) * 1000:.2f} ms, {len(body)} bytes")
+
+
+if __name__ == "__main__":
+    main()
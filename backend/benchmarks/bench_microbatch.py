@@ -0,0 +1,69 @@
+"""
+Throughput vs latency of micro-batched single predictions.
+
+Closed loop: ``C`` client threads each score one record at a time with the
+sklearn pipeline (MODEL_BACKEND=sklearn), calling either ``predict_record``
+directly or ``MicroBatcher.predict``. Throughput and per-call latency
+percentiles are reported for each concurrency level, so the latency the
+batcher adds when idle (C=1) is visible next to what it buys under load.
+Run from backend/: python benchmarks/bench_microbatch.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["MODEL_WARMUP"] = "sync"
+
+import app as app_module  # noqa: E402
+from micro_batch import MicroBatcher  # noqa: E402
+from scoring import predict_record  # noqa: E402
+
+
+def run(score, concurrency, seconds):
+    """Calls per second and latencies (ms) of ``concurrency`` threads calling ``score``."""
+    latencies = [[] for _ in range(concurrency)]
+    stop = time.perf_counter() + seconds
+
+    def client(out):
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            score()
+            out.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=client, args=(out,)) for out in latencies]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    flat = np.concatenate([np.asarray(out) for out in latencies])
+    return len(flat) / elapsed, np.percentile(flat, 50), np.percentile(flat, 99)
+
+
+def main(levels=(1, 4, 16, 64), seconds=3.0, max_size=32, max_wait_ms=2.0):
+    pipeline = app_module.require_model().pipeline
+    features = app_module.parse_record(app_module.WARMUP_RECORD)
+    print(f"sklearn pipeline, {seconds:g}s per run, batches of up to {max_size}, max wait {max_wait_ms:g} ms")
+    print(f"{'clients':>7} {'mode':>8} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    for concurrency in levels:
+        for mode in ("direct", "batched"):
+            if mode == "direct":
+                result = run(lambda: predict_record(pipeline, features), concurrency, seconds)
+                batch = ""
+            else:
+                batcher = MicroBatcher(max_size, max_wait_ms / 1000)
+                result = run(lambda: batcher.predict(pipeline, features), concurrency, seconds)
+                batch = f"{batcher.stats()['mean_batch_size']:.1f}"
+            throughput, p50, p99 = result
+            print(f"{concurrency:>7} {mode:>8} {throughput:9.0f} {p50:8.2f} {p99:8.2f} {batch:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Per-request parse and serialization overhead of /api/predict: the previous
+inline parsing vs the schema decoder, and stdlib vs fast JSON encoding.
+
+Each sample builds a request context (so werkzeug's body parsing is included)
+and decodes it into model features. Run from backend/:
+    python benchmarks/bench_parse.py [--iterations 20000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = ""
+
+from flask import request  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+import app as app_module  # noqa: E402
+from fast_json import FastJSONProvider  # noqa: E402
+from scoring import normalize_str  # noqa: E402
+
+STUDENT = {
+    "age": 20,
+    "gender": "Male",
+    "study_hours_per_day": 5.5,
+    "social_media_hours": 2.0,
+    "part_time_job": "No",
+    "attendance_percentage": 90,
+    "sleep_hours": 7.5,
+    "diet_quality": "Good",
+    "exercise_frequency": 3,
+    "parental_education_level": "Bachelor",
+    "internet_Resource_accessibility": "Good",
+    "extracurricular_participation": "Yes",
+}
+
+RESPONSE = {
+    "success": True,
+    "prediction": 81.37,
+    "model_version": "ridge_pipeline",
+    "suggestions": ["Maintain consistent study hours daily"] * 5,
+}
+
+
+LEGACY_REQUIRED = [
+    "age", "study_hours_per_day", "social_media_hours",
+    "attendance_percentage", "sleep_hours", "exercise_frequency",
+]
+
+
+def legacy_record(record):
+    """parse_record as it was before the schema decoder."""
+    missing = [f for f in LEGACY_REQUIRED if record.get(f) is None]
+    if missing:
+        raise ValueError(missing)
+    return {
+        "age": int(record.get("age", 18)),
+        "gender": normalize_str(record.get("gender")),
+        "study_hours_per_day": float(record.get("study_hours_per_day", 0.0)),
+        "social_media_hours": float(record.get("social_media_hours", 0.0)),
+        "part_time_job": normalize_str(record.get("part_time_job")),
+        "attendance_percentage": float(record.get("attendance_percentage", 0.0)),
+        "sleep_hours": float(record.get("sleep_hours", 0.0)),
+        "diet_quality": normalize_str(record.get("diet_quality")),
+        "exercise_frequency": int(record.get("exercise_frequency", 0)),
+        "parental_education_level": normalize_str(record.get("parental_education_level")),
+        "internet_Resource_accessibility": normalize_str(record.get("internet_Resource_accessibility")),
+        "extracurricular_participation": normalize_str(record.get("extracurricular_participation")),
+    }
+
+
+def legacy_parse():
+    """The parsing predict() did before the schema decoder (kept for comparison)."""
+    if request.is_json:
+        json_data = request.get_json()
+        features = legacy_record(json_data)
+    else:
+        missing = [f for f in LEGACY_REQUIRED if not request.form.get(f)]
+        if missing:
+            raise ValueError(missing)
+        features = legacy_record(request.form)
+    form_data = json_data if request.is_json else request.form.to_dict()
+    return features, form_data
+
+
+def schema_parse():
+    record = app_module.read_request_record()
+    features = app_module.record_decoder.decode(record)
+    return features, record
+
+
+def best_of(fn, iterations, repeats=9):
+    """Fastest of ``repeats`` runs, in µs per call."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1e6
+
+
+def time_parse(parse, body, content_type, iterations):
+    app = app_module.app
+
+    def one():
+        with app.test_request_context("/api/predict", method="POST", data=body, content_type=content_type):
+            parse()
+
+    return best_of(one, iterations)
+
+
+def time_encode(provider, iterations):
+    with app_module.app.app_context():
+        return best_of(lambda: provider.response(RESPONSE).get_data(), iterations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    bodies = {
+        "json": (json.dumps(STUDENT), "application/json"),
+        "form": (urlencode(STUDENT), "application/x-www-form-urlencoded"),
+    }
+    try:
+        import msgpack
+        bodies["msgpack"] = (msgpack.packb(STUDENT), "application/msgpack")
+    except ImportError:
+        pass
+
+    print("decode an already-parsed record, µs")
+    as_form = {k: str(v) for k, v in STUDENT.items()}
+    decode = app_module.record_decoder.decode
+    for name, record in (("json", STUDENT), ("form", as_form)):
+        old = best_of(lambda: legacy_record(record), n * 4)
+        new = best_of(lambda: decode(record), n * 4)
+        print(f"  {name:8s} legacy {old:6.2f}   schema {new:6.2f}")
+
+    print("full request (context + body parsing + decode), µs")
+    for name, (body, content_type) in bodies.items():
+        new = time_parse(schema_parse, body, content_type, n)
+        if name == "msgpack":
+            print(f"  {name:8s}                  schema {new:6.1f}")
+            continue
+        old = time_parse(legacy_parse, body, content_type, n)
+        print(f"  {name:8s} legacy {old:6.1f}   schema {new:6.1f}")
+
+    stdlib = DefaultJSONProvider(app_module.app)
+    fast_stdlib = FastJSONProvider(app_module.app)
+    fast_stdlib.use_orjson = False
+    print("serialize a /api/predict response, µs")
+    print(f"  jsonify (default)      {time_encode(stdlib, n):6.1f}")
+    print(f"  fast provider, stdlib  {time_encode(fast_stdlib, n):6.1f}")
+    if FastJSONProvider.use_orjson:
+        print(f"  fast provider, orjson  {time_encode(FastJSONProvider(app_module.app), n):6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Cost of the on-demand profiler on /api/predict.
+
+Scores the same stream of requests through the Flask test client with no
+session running (the normal state), while a session samples every 5 ms and
+1 ms, and while it also traces allocations. The runs are interleaved over
+several rounds and the best round of each is kept, to damp machine noise.
+Reports the time per request and the slowdown against the idle case, plus
+the cost of the per-request ``profiler.active`` checks that are all the
+hooks do when idle.
+Run from backend/: python benchmarks/bench_profiler.py [--requests 2000] [--rounds 3]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import threading
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["MODEL_WARMUP"] = "sync"
+os.environ["PREDICTION_CACHE_SIZE"] = "0"
+os.environ["AUDIT_LOG_PATH"] = ""
+
+import app as app_module  # noqa: E402
+from tests.samples import students  # noqa: E402
+
+
+def per_request_us(client, bodies):
+    started = time.perf_counter()
+    for body in bodies:
+        client.post("/api/predict", json=body)
+    return (time.perf_counter() - started) / len(bodies) * 1e6
+
+
+def profiled(client, bodies, **options):
+    thread = threading.Thread(target=app_module.profiler.run, args=(3600,), kwargs=options)
+    thread.start()
+    while not app_module.profiler.active:
+        time.sleep(0.001)
+    try:
+        return per_request_us(client, bodies)
+    finally:
+        app_module.profiler.stop()
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    client = app_module.app.test_client()
+    bodies = students(args.requests)
+    check_ns = min(timeit.repeat(lambda: app_module.profiler.active, number=100000, repeat=5)) / 100000 * 1e9
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        per_request_us(client, bodies[:200])
+        configs = [
+            ("idle (no session)", lambda: per_request_us(client, bodies)),
+            ("sampling every 5 ms", lambda: profiled(client, bodies, interval=0.005)),
+            ("sampling every 1 ms", lambda: profiled(client, bodies, interval=0.001)),
+            ("5 ms + tracemalloc", lambda: profiled(client, bodies, interval=0.005, allocations=True)),
+        ]
+        best = {}
+        for _ in range(args.rounds):
+            for name, run in configs:
+                best[name] = min(best.get(name, float("inf")), run())
+    runs = list(best.items())
+    idle = runs[0][1]
+    print(f"{args.requests} requests per run; idle hooks cost 2 x {check_ns:.0f} ns per request")
+    print(f"{'profiler':<22} {'us/request':>11} {'slowdown':>9}")
+    for name, us in runs:
+        print(f"{name:<22} {us:>11.0f} {us / idle - 1:>+9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Offline file scoring (score_file.py) throughput by worker count.
+
+Writes a synthetic CSV of ``--rows`` students once (cached in the temp
+directory), then scores it with 1, 2, 4, ... up to ``--max-workers``
+processes and reports rows/s and the speedup over one worker. The first row
+is the naive path for reference: ``pd.read_csv`` of the whole file and one
+``score_frame`` call in this process. Speedup is bounded by the number of
+CPUs on the machine. Run from backend/:
+    python benchmarks/bench_score_file.py [--rows 2000000] [--max-workers 8]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import score_file  # noqa: E402
+from feature_schema import FEATURE_SCHEMA  # noqa: E402
+from scoring import prepare_frame, score_frame  # noqa: E402
+
+
+def synthetic_csv(rows):
+    path = os.path.join(tempfile.gettempdir(), f"bench_score_file_{rows}.csv")
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(0)
+    columns = {"id": np.arange(rows)}
+    for field in FEATURE_SCHEMA:
+        if field.categories:
+            columns[field.name] = rng.choice(field.categories, rows)
+        elif field.numeric:
+            low, high = (field.minimum, field.maximum) if field.minimum is not None else (0, 10)
+            columns[field.name] = rng.uniform(low, high, rows).round(1)
+    pd.DataFrame(columns).to_csv(path, index=False)
+    return path
+
+
+def naive(path):
+    started = time.perf_counter()
+    features, _ = prepare_frame(pd.read_csv(path, dtype=str, keep_default_na=False))
+    score_frame(score_file.build_scorer(score_file.joblib.load(
+        os.path.join(score_file.MODELS_DIR, "ridge_pipeline.joblib")), "compiled"), features)
+    return time.perf_counter() - started
+
+
+def sharded(path, workers, suggestions):
+    output = os.path.join(tempfile.gettempdir(), "bench_score_file_out.csv")
+    argv = [path, output, "--workers", str(workers), "--suggestions", str(suggestions)]
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+        score_file.run(score_file.parse_args(argv))
+    elapsed = time.perf_counter() - started
+    os.remove(output)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--suggestions", type=int, default=0, help="also rank K suggestions per row")
+    args = parser.parse_args()
+
+    path = synthetic_csv(args.rows)
+    print(f"{args.rows:,} rows, {os.path.getsize(path) / 2 ** 20:.0f} MB, {os.cpu_count()} CPUs")
+    print(f"{'run':<24} {'seconds':>9} {'rows/s':>11} {'speedup':>8}")
+    elapsed = naive(path)
+    print(f"{'read_csv + score_frame':<24} {elapsed:>9.1f} {args.rows / elapsed:>11,.0f} {'':>8}")
+    workers, base = 1, None
+    while workers <= args.max_workers:
+        elapsed = sharded(path, workers, args.suggestions)
+        base = base or elapsed
+        print(f"{f'{workers} workers':<24} {elapsed:>9.1f} {args.rows / elapsed:>11,.0f} {base / elapsed:>7.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
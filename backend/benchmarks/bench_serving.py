@@ -0,0 +1,153 @@
+"""
+Serving throughput: Flask dev server vs gunicorn (pre-forked, preloaded model) on /api/predict.
+
+Each server is started as a subprocess with Gemini and the prediction cache
+disabled, so every request pays for parsing and scoring. Run from backend/:
+    python benchmarks/bench_serving.py [--requests 2000] [--clients 16] [--output serving.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STUDENT = {
+    "age": 20,
+    "gender": "Male",
+    "study_hours_per_day": 5.5,
+    "social_media_hours": 2.0,
+    "part_time_job": "No",
+    "attendance_percentage": 90,
+    "sleep_hours": 7.5,
+    "diet_quality": "Good",
+    "exercise_frequency": 3,
+    "parental_education_level": "Bachelor",
+    "internet_Resource_accessibility": "Good",
+    "extracurricular_participation": "Yes",
+}
+
+SERVER_ENV = {"GEMINI_API_KEY": "", "PREDICTION_CACHE_SIZE": "0", "SUGGESTION_CACHE_PATH": ""}
+
+
+def dev_server(port):
+    code = f"import app; app.app.run(host='127.0.0.1', port={port}, threaded=True)"
+    return [sys.executable, "-c", code]
+
+
+def gunicorn_server(port, workers, threads):
+    return [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app",
+        "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--threads", str(threads),
+        "--access-logfile", "/dev/null",
+    ]
+
+
+def wait_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/api/ready", timeout=1) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+def post(url, body):
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        resp.read()
+        ok = resp.status == 200
+    return time.perf_counter() - start, ok
+
+
+def drive(base_url, n_requests, clients):
+    # Varied payloads so nothing downstream can serve a repeated answer
+    bodies = [
+        json.dumps(dict(STUDENT, study_hours_per_day=(i % 80) / 10, age=17 + i % 10)).encode()
+        for i in range(n_requests)
+    ]
+    url = f"{base_url}/api/predict"
+    for body in bodies[:50]:
+        post(url, body)
+
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(body):
+        try:
+            latency, ok = post(url, body)
+        except OSError:
+            latency, ok = 0.0, False
+        if not ok:
+            with lock:
+                errors[0] += 1
+        return latency
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = sorted(pool.map(one, bodies))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": n_requests,
+        "clients": clients,
+        "errors": errors[0],
+        "requests_per_second": round(n_requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def run_server(cmd, port, n_requests, clients):
+    env = dict(os.environ, **SERVER_ENV)
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(base_url)
+        return drive(base_url, n_requests, clients)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--port", type=int, default=5077)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {
+        "cpus": os.cpu_count(),
+        "dev_server": run_server(dev_server(args.port), args.port, args.requests, args.clients),
+        "gunicorn": dict(
+            run_server(gunicorn_server(args.port + 1, args.workers, args.threads), args.port + 1,
+                       args.requests, args.clients),
+            workers=args.workers, threads=args.threads,
+        ),
+    }
+    for name in ("dev_server", "gunicorn"):
+        r = report[name]
+        print(f"{name:11s} {r['requests_per_second']:8.1f} req/s  p50 {r['p50_ms']:7.2f} ms  "
+              f"p99 {r['p99_ms']:7.2f} ms  errors {r['errors']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Request-path cost of shadow scoring, against scoring the candidate inline.
+
+The candidate is the serving artifact's sklearn pipeline under another
+name. The same stream of requests goes through /api/predict with the
+Flask test client in three setups:
+- shadowing off;
+- 10% and 100% of requests shadowed, scored by the background worker in
+  batches;
+- the candidate scored inline in each request, as a second predict on the
+  request path.
+The runs are interleaved over several rounds and the best of each is kept.
+The shadow worker shares the machine with the requests, so on few cores
+part of its batch work still shows up. The script also reports how fast
+the worker scores records in batches compared with one at a time.
+Run from backend/: python benchmarks/bench_shadow.py [--requests 2000] [--rounds 3]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["MODEL_WARMUP"] = "sync"
+os.environ["PREDICTION_CACHE_SIZE"] = "0"
+os.environ["AUDIT_LOG_PATH"] = ""
+
+import app as app_module  # noqa: E402
+from scoring import predict_record  # noqa: E402
+from shadow import ShadowScorer  # noqa: E402
+from tests.samples import students  # noqa: E402
+
+
+def per_request_us(client, bodies):
+    started = time.perf_counter()
+    for body in bodies:
+        client.post("/api/predict", json=body)
+    return (time.perf_counter() - started) / len(bodies) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    serving = app_module.model_registry.active
+    candidate = types.SimpleNamespace(scorer=serving.pipeline, signature=serving.signature)
+    client = app_module.app.test_client()
+    bodies = students(args.requests)
+    off = ShadowScorer(lambda version: candidate, ["candidate"], sample_rate=0)
+    sampled = ShadowScorer(lambda version: candidate, ["candidate"], sample_rate=0.1)
+    shadowed = ShadowScorer(lambda version: candidate, ["candidate"], sample_rate=1.0,
+                            max_queue=args.requests * args.rounds)
+
+    def run(shadow, inline=False):
+        app_module.shadow = shadow
+        if inline:
+            # Stand-in for a second model on the request path
+            app_module.shadow = types.SimpleNamespace(
+                offer=lambda features, version, raw: predict_record(candidate.scorer, features))
+        us = per_request_us(client, bodies)
+        shadow.flush(timeout=60)
+        return us
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        per_request_us(client, bodies[:200])
+        configs = [
+            ("shadow off", lambda: run(off)),
+            ("shadow, rate 0.1", lambda: run(sampled)),
+            ("shadow, rate 1.0", lambda: run(shadowed)),
+            ("candidate inline", lambda: run(off, inline=True)),
+        ]
+        best = {}
+        for _ in range(args.rounds):
+            for name, measure in configs:
+                best[name] = min(best.get(name, float("inf")), measure())
+
+        features = [app_module.parse_record(body) for body in bodies[:500]]
+        started = time.perf_counter()
+        for f in features:
+            predict_record(candidate.scorer, f)
+        one_at_a_time = len(features) / (time.perf_counter() - started)
+    stats = shadowed.stats()
+    batched = stats["scored"] / stats["score_seconds"]
+
+    print(f"{args.requests} requests per run, {serving.backend} serving model, sklearn candidate")
+    print(f"{'setup':<18} {'us/request':>11} {'vs off':>8}")
+    for name, us in best.items():
+        print(f"{name:<18} {us:>11.0f} {us / best['shadow off'] - 1:>+8.1%}")
+    (report,) = shadowed.report()["models"]
+    print(f"worker: {stats['scored']} records in {stats['batches']} batches, {batched:,.0f} records/s "
+          f"(one at a time: {one_at_a_time:,.0f}/s), agreement {report['agreement']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
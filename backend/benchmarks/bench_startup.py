@@ -0,0 +1,61 @@
+"""
+Startup-time report: how long `import app` takes and how long until the model is warm.
+
+Each run is a fresh interpreter. Run from backend/:
+    python benchmarks/bench_startup.py [--runs 5] [--output startup.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.model_ready.wait(60)
+t2 = time.perf_counter()
+print("STARTUP", json.dumps({"import": t1 - t0, "ready": t2 - t0, "report": app.startup_report}), flush=True)
+"""
+
+
+def measure(runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        )
+        line = next(l for l in out.stdout.splitlines() if l.startswith("STARTUP "))
+        samples.append(json.loads(line[len("STARTUP "):]))
+    return {
+        "runs": runs,
+        "import_seconds_median": statistics.median(s["import"] for s in samples),
+        "ready_seconds_median": statistics.median(s["ready"] for s in samples),
+        "model_load_seconds_median": statistics.median(s["report"]["load_seconds"] for s in samples),
+        "samples": samples,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = measure(args.runs)
+    print(f"import app:        {report['import_seconds_median'] * 1000:8.1f} ms (median of {args.runs})")
+    print(f"model load:        {report['model_load_seconds_median'] * 1000:8.1f} ms")
+    print(f"ready (warm):      {report['ready_seconds_median'] * 1000:8.1f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
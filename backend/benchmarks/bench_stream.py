@@ -0,0 +1,86 @@
+"""
+Time to first suggestion: /api/predict vs /api/predict/stream.
+
+Gemini is replaced by tests/fake_gemini.py answering a realistic 5-item list
+at a steady rate over ``--delay`` seconds, in ``--chunk-size``-character
+chunks. The caches are off. For each endpoint the median over ``--requests``
+calls is reported:
+- when the prediction arrives,
+- when the first suggestion arrives,
+- when the response is complete.
+/api/predict delivers all three at once. Run from backend/:
+    python benchmarks/bench_stream.py [--delay 2] [--requests 10]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = "fake"
+os.environ["MODEL_WARMUP"] = "sync"
+os.environ["PREDICTION_CACHE_SIZE"] = "0"
+os.environ["SUGGESTION_CACHE_PATH"] = ""
+os.environ["AUDIT_LOG_PATH"] = ""
+
+import app as app_module  # noqa: E402
+from resilience import GuardedCall  # noqa: E402
+from tests.fake_gemini import FakeGemini  # noqa: E402
+from tests.samples import student  # noqa: E402
+
+ANSWER = "\n".join([
+    "1. Add one focused hour of study each day, split into two 30-minute blocks with short breaks.",
+    "2. Cap social media at one hour on school days by turning off notifications during study time.",
+    "3. Aim for at least 90% attendance; classes cover material that is hard to catch up on alone.",
+    "4. Keep a regular sleep schedule of 7-8 hours, as rested students retain more of what they study.",
+    "5. Exercise three times a week; even short walks improve focus and reduce exam stress.",
+])
+
+
+def blocking(client, body):
+    started = time.perf_counter()
+    client.post("/api/predict", json=body).get_json()
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed, elapsed
+
+
+def streamed(client, body):
+    started = time.perf_counter()
+    first_prediction = first_suggestion = None
+    for chunk in client.post("/api/predict/stream", json=body, buffered=False).iter_encoded():
+        now = time.perf_counter() - started
+        if first_prediction is None and b"event: prediction" in chunk:
+            first_prediction = now
+        if first_suggestion is None and b"event: suggestion" in chunk:
+            first_suggestion = now
+    return first_prediction, first_suggestion, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--delay", type=float, default=2.0, help="fake Gemini time for the whole answer (s)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="characters per streamed chunk")
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+
+    app_module._gemini_model = FakeGemini(ANSWER, delay=args.delay, chunk_size=args.chunk_size)
+    app_module.gemini_guard = GuardedCall(args.delay * 10 + 5, 4, 10 ** 6, 1)
+    client = app_module.app.test_client()
+    print(f"Fake Gemini: {len(ANSWER)} characters over {args.delay:.1f} s, {args.chunk_size}-character chunks")
+    print(f"{'endpoint':<22} {'prediction':>11} {'1st suggestion':>15} {'complete':>9}   (median ms)")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = {
+            "/api/predict": [blocking(client, student(i)) for i in range(args.requests)],
+            "/api/predict/stream": [streamed(client, student(i)) for i in range(args.requests)],
+        }
+    for name, runs in results.items():
+        prediction, suggestion, complete = np.median(np.array(runs), axis=0) * 1000
+        print(f"{name:<22} {prediction:>11.0f} {suggestion:>15.0f} {complete:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+What-if grid cost: outer sum on the compiled model vs one materialized
+pipeline call vs scoring each scenario separately, plus the full endpoint.
+
+Run from backend/: python benchmarks/bench_whatif.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["MODEL_WARMUP"] = "sync"
+
+import app as app_module  # noqa: E402
+from scoring import parse_record, predict_record  # noqa: E402
+from whatif import parse_sweeps, score_grid  # noqa: E402
+
+STUDENT = {
+    "age": 20, "gender": "Male", "study_hours_per_day": 5.5,
+    "social_media_hours": 2.0, "part_time_job": "No", "attendance_percentage": 90,
+    "sleep_hours": 7.5, "diet_quality": "Good", "exercise_frequency": 3,
+    "parental_education_level": "Bachelor", "internet_Resource_accessibility": "Good",
+    "extracurricular_participation": "Yes",
+}
+
+
+def sweeps_for(points):
+    """Study hours x social media x diet with about ``points`` scenarios."""
+    side = max(1, int((points / 3) ** 0.5))
+    return [
+        {"field": "study_hours_per_day", "start": 0, "stop": 12, "num": side},
+        {"field": "social_media_hours", "start": 0, "stop": 8, "num": side},
+        {"field": "diet_quality", "values": ["Good", "Fair", "Poor"]},
+    ]
+
+
+def best_of(fn, repeats=5):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times) * 1000
+
+
+def main():
+    entry = app_module.require_model()
+    base = parse_record(STUDENT)
+    client = app_module.app.test_client()
+    print(f"{'scenarios':>10} {'outer sum':>12} {'pipeline':>12} {'per row':>12} {'endpoint':>12}   (ms)")
+    for points in (300, 3000, 20000):
+        sweeps = sweeps_for(points)
+        axes = parse_sweeps(sweeps, 10 ** 6)
+        size = 1
+        for _, values in axes:
+            size *= len(values)
+        outer = best_of(lambda: score_grid(entry.scorer, base, axes))
+        pipeline = best_of(lambda: score_grid(entry.pipeline, base, axes), repeats=3)
+        scenarios = [dict(base, study_hours_per_day=s, social_media_hours=m, diet_quality=d)
+                     for s in axes[0][1] for m in axes[1][1] for d in axes[2][1]]
+        per_row = best_of(lambda: [predict_record(entry.scorer, f) for f in scenarios], repeats=1)
+        endpoint = best_of(lambda: client.post('/api/predict/whatif', json={"base": STUDENT, "sweeps": sweeps}))
+        print(f"{size:>10} {outer:>12.3f} {pipeline:>12.3f} {per_row:>12.3f} {endpoint:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""Comparison of a benchmark run against a stored baseline (used by suite.py)."""
+
+
+def compare(current, baseline, threshold):
+    """Rows of ``(name, baseline, current, change, regressed)`` for metrics in both runs.
+
+    Each metric is ``{"value": number, "better": "lower" | "higher"}``.
+    ``change`` is the relative change in the metric's "worse" direction, so a
+    positive value is always a slowdown, and a row regresses when it exceeds
+    ``threshold``.
+    """
+    rows = []
+    for name, base in sorted(baseline["metrics"].items()):
+        if name not in current["metrics"] or not base["value"]:
+            continue
+        now = current["metrics"][name]["value"]
+        change = (now - base["value"]) / base["value"]
+        if base["better"] == "higher":
+            change = -change
+        rows.append((name, base["value"], now, change, change > threshold))
+    return rows
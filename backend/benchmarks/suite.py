@@ -0,0 +1,285 @@
+"""
+Benchmark suite: micro-benchmarks of the hot functions plus a load test of
+/api/predict, written to JSON and checked against a stored baseline.
+
+Gemini is replaced by tests/fake_gemini.py (fixed latency, no network) and
+the caches are disabled, so every request pays for decoding, scoring and
+suggestion generation. Inputs are generated from a fixed seed.
+
+Run from backend/:
+    python benchmarks/suite.py                      # run, compare with baseline.json
+    python benchmarks/suite.py --quick              # fewer iterations (CI smoke run)
+    python benchmarks/suite.py --output run.json    # also write the results
+    python benchmarks/suite.py --update-baseline    # store this run as the baseline
+
+Exits with status 1 when a metric is worse than the baseline by more than
+``--threshold`` (default 25%). Baselines are machine-specific: regenerate
+baseline.json on the machine that runs the comparison.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import timeit
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+# Must be set before app is imported
+os.environ["GEMINI_API_KEY"] = "fake-key-for-benchmarks"
+os.environ["PREDICTION_CACHE_SIZE"] = "0"
+os.environ["SUGGESTION_CACHE_PATH"] = ""
+os.environ["SUGGESTIONS_MODE"] = "sync"
+os.environ["MODEL_WARMUP"] = "sync"
+
+import pandas as pd  # noqa: E402
+from werkzeug.serving import WSGIRequestHandler, make_server  # noqa: E402
+
+import app as app_module  # noqa: E402
+from scoring import normalize_str, parse_record  # noqa: E402
+from suggestion_rules import columns_from_records  # noqa: E402
+from tests.fake_gemini import FakeGemini  # noqa: E402
+
+sys.path.insert(0, BENCH_DIR)
+from regression import compare  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+CATEGORIES = {
+    "gender": ["Male", "Female", "Other"],
+    "part_time_job": ["Yes", "No"],
+    "diet_quality": ["Good", "Fair", "Poor"],
+    "parental_education_level": ["High School", "Bachelor", "Master", "None"],
+    "internet_Resource_accessibility": ["Good", "Average", "Poor"],
+    "extracurricular_participation": ["Yes", "No"],
+}
+
+
+def make_students(n, seed=0):
+    rng = random.Random(seed)
+    students = []
+    for _ in range(n):
+        student = {
+            "age": rng.randint(17, 25),
+            "study_hours_per_day": round(rng.uniform(0, 8), 1),
+            "social_media_hours": round(rng.uniform(0, 6), 1),
+            "attendance_percentage": round(rng.uniform(50, 100), 1),
+            "sleep_hours": round(rng.uniform(4, 10), 1),
+            "exercise_frequency": rng.randint(0, 7),
+        }
+        student.update({field: rng.choice(values) for field, values in CATEGORIES.items()})
+        students.append(student)
+    return students
+
+
+def per_call(fn, number, repeats):
+    """Best-of-``repeats`` time per call in microseconds."""
+    return min(timeit.repeat(fn, number=number, repeat=repeats)) / number * 1e6
+
+
+def micro_benchmarks(scale):
+    """``{name: µs per call}`` for the functions on the request path."""
+    students = make_students(1000)
+    student = students[0]
+    as_form = {k: str(v) for k, v in student.items()}
+    entry = app_module.require_model()
+    compiled, pipeline = entry.scorer, entry.pipeline
+    features = parse_record(student)
+    one_row = pd.DataFrame([features])
+    frame = pd.DataFrame([parse_record(s) for s in students])
+    n = max(1, int(2000 * scale))
+
+    results = {
+        "normalize_str": per_call(lambda: normalize_str("  high school "), n * 20, 5),
+        "decode_json_record": per_call(lambda: app_module.record_decoder.decode(student), n * 5, 5),
+        "decode_form_record": per_call(lambda: app_module.record_decoder.decode(as_form), n * 5, 5),
+        "generate_basic_suggestions": per_call(
+            lambda: app_module.generate_basic_suggestions(student, 62.5), n * 5, 5),
+        "rank_suggestions_1000_rows": per_call(
+            lambda: app_module.suggestion_ranker(entry).suggest(columns_from_records(students), k=4),
+            max(1, n // 100), 5),
+        "sklearn_predict_1_row": per_call(lambda: pipeline.predict(one_row), max(1, n // 10), 5),
+        "sklearn_predict_1000_rows": per_call(lambda: pipeline.predict(frame), max(1, n // 20), 5),
+    }
+    if hasattr(compiled, "predict_one"):
+        results["compiled_predict_1_row"] = per_call(lambda: compiled.predict_one(features), n * 5, 5)
+        results["compiled_predict_1000_rows"] = per_call(lambda: compiled.predict(frame), max(1, n // 5), 5)
+    return results
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class _ServerThread(threading.Thread):
+    def __init__(self, app):
+        super().__init__(daemon=True)
+        self.server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=_QuietHandler)
+        self.port = self.server.server_port
+
+    def run(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def load_test(n_requests, clients, gemini_delay=None):
+    """Drive /api/predict over HTTP from ``clients`` threads; latency percentiles and throughput.
+
+    ``gemini_delay`` is the fake Gemini's latency in seconds; None runs
+    without a Gemini key (basic suggestions).
+    """
+    bodies = [json.dumps(s).encode() for s in make_students(n_requests, seed=1)]
+    fake = FakeGemini(delay=gemini_delay or 0.0)
+    api_key = app_module.GEMINI_API_KEY if gemini_delay is not None else ""
+    server = _ServerThread(app_module.app)
+    server.start()
+    url = f"http://127.0.0.1:{server.port}/api/predict"
+    errors = [0]
+    lock = threading.Lock()
+
+    def one(body):
+        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                resp.read()
+                ok = resp.status == 200
+        except OSError:
+            ok = False
+        if not ok:
+            with lock:
+                errors[0] += 1
+        return time.perf_counter() - started
+
+    try:
+        # The app prints on every basic-suggestion fallback; keep the report readable
+        with open(os.devnull, "w") as devnull, \
+                patch.object(app_module, "get_gemini_model", return_value=fake), \
+                patch.object(app_module, "GEMINI_API_KEY", api_key), \
+                patch.object(app_module.gemini_guard, "max_concurrent", clients), \
+                patch.object(app_module.gemini_guard, "_slots", threading.BoundedSemaphore(clients)), \
+                contextlib.redirect_stdout(devnull):
+            for body in bodies[:20]:
+                one(body)
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=clients) as pool:
+                latencies = sorted(pool.map(one, bodies))
+            elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "requests": n_requests,
+        "clients": clients,
+        "gemini_delay_ms": gemini_delay * 1000 if gemini_delay is not None else None,
+        "errors": errors[0],
+        "throughput_rps": n_requests / elapsed,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "mean_ms": statistics.fmean(latencies) * 1000,
+    }
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_suite(quick=False):
+    scale = 0.2 if quick else 1.0
+    n_requests = 300 if quick else 2000
+    micro = micro_benchmarks(scale)
+    load = {
+        "predict_fake_gemini": load_test(n_requests, clients=16, gemini_delay=0.02),
+        "predict_basic_suggestions": load_test(n_requests, clients=16),
+    }
+    metrics = {f"micro.{name}_us": {"value": value, "better": "lower"} for name, value in micro.items()}
+    for scenario, result in load.items():
+        metrics[f"load.{scenario}.throughput_rps"] = {"value": result["throughput_rps"], "better": "higher"}
+        for p in ("p50_ms", "p95_ms", "p99_ms"):
+            metrics[f"load.{scenario}.{p}"] = {"value": result[p], "better": "lower"}
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": quick,
+            "model_backend": app_module.require_model().backend,
+        },
+        "metrics": metrics,
+        "load": load,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quick", action="store_true", help="fewer iterations and requests")
+    parser.add_argument("--output", help="write this run's results to a JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative slowdown that counts as a regression (default 0.25)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = run_suite(quick=args.quick)
+    for name, metric in results["metrics"].items():
+        print(f"{name:50s} {metric['value']:12.2f}")
+    for scenario, result in results["load"].items():
+        if result["errors"]:
+            print(f"warning: {scenario} had {result['errors']} failed requests")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("quick") != results["meta"]["quick"]:
+        print("warning: comparing a --quick run with a full baseline (or vice versa)")
+    rows = compare(results, baseline, args.threshold)
+    print(f"\ncompared with {args.baseline} (threshold {args.threshold:.0%}):")
+    for name, base, now, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:50s} {base:12.2f} -> {now:12.2f}  {change:+7.1%} {flag}")
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+# backend/cohort_stats.py
+"""Constant-memory, mergeable summaries of predicted scores for whole cohorts.
+
+Scores arrive a chunk at a time and are folded into fixed-size aggregates,
+so memory depends on the number of groups, not on the number of rows. Any
+two aggregates can be merged (chunks, threads or worker processes).
+
+Error bounds, compared with pandas on the same predictions:
+
+- ``count``, ``at_risk`` and the histograms are exact.
+- ``mean`` and ``std`` (sample, ddof=1) are exact up to float rounding. They
+  use the Welford / Chan et al. update, so they don't lose precision on
+  large cohorts the way sum-of-squares does.
+- Quantiles come from a fixed-bin histogram with ``resolution``-wide bins
+  over the 0-100 score range, interpolated like ``Series.quantile`` (linear).
+  The API rounds scores to 0.01, so at the default resolution of 0.01 they
+  equal pandas on the returned predictions. With a coarser resolution, or
+  against unrounded scores, each quantile is within ``resolution / 2``.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+# Categorical inputs reported separately in breakdowns
+GROUP_FIELDS = ("gender", "part_time_job", "parental_education_level")
+
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+# Label for rows without a value for the group field
+MISSING_GROUP = "Unknown"
+# Label that absorbs values once a field has this many groups (bounds memory)
+MAX_GROUPS = 50
+OTHER_GROUP = "Other (unlisted)"
+
+
+class ScoreSummary:
+    """Running count / mean / variance / min / max / at-risk count plus a
+    ``resolution``-wide histogram of scores in [0, 100]."""
+
+    def __init__(self, resolution=0.01, threshold=60.0):
+        self.resolution = resolution
+        self.threshold = threshold
+        self.counts = np.zeros(int(round(100 / resolution)) + 1, dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.at_risk = 0
+
+    def _combine(self, count, mean, m2):
+        """Chan et al. parallel update of (count, mean, M2)."""
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def update(self, scores, bins=None):
+        """Add an array of clamped scores (``bins`` if already computed)."""
+        scores = np.asarray(scores, dtype=float)
+        if not len(scores):
+            return
+        if bins is None:
+            bins = self.bins_for(scores)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        mean = float(scores.mean())
+        self._combine(len(scores), mean, float(((scores - mean) ** 2).sum()))
+        self.min = min(self.min, float(scores.min()))
+        self.max = max(self.max, float(scores.max()))
+        self.at_risk += int((scores < self.threshold).sum())
+
+    def bins_for(self, scores):
+        return np.clip(np.rint(scores / self.resolution), 0, len(self.counts) - 1).astype(np.int64)
+
+    def merge(self, other):
+        if (other.resolution, other.threshold) != (self.resolution, self.threshold):
+            raise ValueError("Can only merge summaries with the same resolution and threshold")
+        if not other.count:
+            return self
+        self.counts += other.counts
+        if self.count:
+            self._combine(other.count, other.mean, other.m2)
+        else:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.at_risk += other.at_risk
+        return self
+
+    def _order_statistic(self, cumulative, k):
+        """Value of the k-th smallest score (0-based) on the histogram's grid."""
+        return round(int(np.searchsorted(cumulative, k, side="right")) * self.resolution, 10)
+
+    def quantiles(self, qs=DEFAULT_QUANTILES):
+        """``{q: value}`` with pandas' linear interpolation between order statistics."""
+        if not self.count:
+            return {q: None for q in qs}
+        cumulative = np.cumsum(self.counts)
+        result = {}
+        for q in qs:
+            position = (self.count - 1) * q
+            lower = math.floor(position)
+            low = self._order_statistic(cumulative, lower)
+            high = self._order_statistic(cumulative, min(lower + 1, self.count - 1))
+            result[q] = low + (high - low) * (position - lower)
+        return result
+
+    def histogram(self, width=10):
+        """Counts per ``width``-point bin: [0, w), [w, 2w) ... with 100 in the last bin."""
+        edges = np.arange(0, 100, width, dtype=float)
+        per_bin = width / self.resolution
+        index = np.floor(np.arange(len(self.counts)) / per_bin + 1e-9).astype(np.int64)
+        index = np.minimum(index, len(edges) - 1)
+        totals = np.bincount(index, weights=self.counts, minlength=len(edges)).astype(np.int64)
+        return [
+            {"from": round(float(lo), 6), "to": round(float(min(lo + width, 100)), 6), "count": int(n)}
+            for lo, n in zip(edges, totals)
+        ]
+
+    def report(self, qs=DEFAULT_QUANTILES, histogram_width=10):
+        std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 4) if self.count else None,
+            "std": round(std, 4) if std is not None else None,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "percentiles": {f"p{round(q * 100):g}": v for q, v in self.quantiles(qs).items()},
+            "at_risk": self.at_risk,
+            "at_risk_rate": round(self.at_risk / self.count, 4) if self.count else None,
+            "histogram": self.histogram(histogram_width),
+        }
+
+    def to_state(self):
+        """JSON-able state (sparse histogram) for merging across processes."""
+        nonzero = np.flatnonzero(self.counts)
+        return {
+            "resolution": self.resolution, "threshold": self.threshold,
+            "count": self.count, "mean": self.mean, "m2": self.m2,
+            "min": self.min if self.count else None, "max": self.max if self.count else None,
+            "at_risk": self.at_risk,
+            "bins": nonzero.tolist(), "bin_counts": self.counts[nonzero].tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        summary = cls(state["resolution"], state["threshold"])
+        summary.counts[state["bins"]] = state["bin_counts"]
+        summary.count, summary.mean, summary.m2 = state["count"], state["mean"], state["m2"]
+        if summary.count:
+            summary.min, summary.max = state["min"], state["max"]
+        summary.at_risk = state["at_risk"]
+        return summary
+
+
+class CohortAnalysis:
+    """Overall score summary plus one summary per value of each ``group_by`` field."""
+
+    def __init__(self, group_by=GROUP_FIELDS, resolution=0.01, threshold=60.0, max_groups=MAX_GROUPS):
+        self.group_by = tuple(group_by)
+        self.resolution = resolution
+        self.threshold = threshold
+        self.max_groups = max_groups
+        self.overall = ScoreSummary(resolution, threshold)
+        self.groups = {field: {} for field in self.group_by}
+        self.failed = 0
+
+    def _summary(self, field, label):
+        groups = self.groups[field]
+        if label not in groups and len(groups) >= self.max_groups - 1 and label != OTHER_GROUP:
+            label = OTHER_GROUP
+        if label not in groups:
+            groups[label] = ScoreSummary(self.resolution, self.threshold)
+        return groups[label]
+
+    def update(self, features, scores, failed=0):
+        """Fold in one chunk: a prepared feature frame and its clamped scores."""
+        scores = np.asarray(scores, dtype=float)
+        self.failed += failed
+        if not len(scores):
+            return
+        bins = self.overall.bins_for(scores)
+        self.overall.update(scores, bins)
+        for field in self.group_by:
+            values = features[field]
+            codes, labels = pd.factorize(values.where(values.notna() & (values != ""), MISSING_GROUP), sort=False)
+            for code, label in enumerate(labels.tolist()):
+                selected = codes == code
+                self._summary(field, label).update(scores[selected], bins[selected])
+
+    def merge(self, other):
+        if other.group_by != self.group_by:
+            raise ValueError("Can only merge analyses over the same group fields")
+        self.overall.merge(other.overall)
+        for field, groups in other.groups.items():
+            for label, summary in groups.items():
+                self._summary(field, label).merge(summary)
+        self.failed += other.failed
+        return self
+
+    def report(self, qs=DEFAULT_QUANTILES, histogram_width=10):
+        return {
+            "rows": self.overall.count + self.failed,
+            "scored": self.overall.count,
+            "failed": self.failed,
+            "threshold": self.threshold,
+            "resolution": self.resolution,
+            "overall": self.overall.report(qs, histogram_width),
+            "groups": {
+                field: {label: summary.report(qs, histogram_width)
+                        for label, summary in sorted(groups.items(), key=lambda item: str(item[0]))}
+                for field, groups in self.groups.items()
+            },
+        }
+
+    def to_state(self):
+        return {
+            "group_by": list(self.group_by), "resolution": self.resolution, "threshold": self.threshold,
+            "failed": self.failed, "overall": self.overall.to_state(),
+            "groups": {field: {label: s.to_state() for label, s in groups.items()}
+                       for field, groups in self.groups.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        analysis = cls(state["group_by"], state["resolution"], state["threshold"])
+        analysis.failed = state["failed"]
+        analysis.overall = ScoreSummary.from_state(state["overall"])
+        for field, groups in state["groups"].items():
+            analysis.groups[field] = {label: ScoreSummary.from_state(s) for label, s in groups.items()}
+        return analysis
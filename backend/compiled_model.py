@@ -0,0 +1,171 @@
+# backend/compiled_model.py
+"""Flat NumPy representation of the ridge pipeline for fast scoring.
+
+The trained pipeline is ``ColumnTransformer(StandardScaler | OneHotEncoder) -> Ridge``,
+which is just a linear function of the inputs. ``CompiledLinearModel`` folds the
+scaler statistics into the coefficients and turns every one-hot block into a
+``category -> contribution`` lookup table, so scoring one student is a few dict
+lookups and a 6-element dot product with no DataFrame in between.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class UnsupportedPipeline(ValueError):
+    """The pipeline doesn't have a shape ``compile_pipeline`` knows how to flatten."""
+
+
+class CompiledLinearModel:
+    """Drop-in replacement for the pipeline's ``predict`` plus a single-row fast path."""
+
+    def __init__(self, numeric_fields, weights, category_tables, intercept, strict_fields=()):
+        self.numeric_fields = list(numeric_fields)
+        self.weights = np.asarray(weights, dtype=float)
+        # field -> {category: contribution}
+        self.category_tables = dict(category_tables)
+        self.intercept = float(intercept)
+        # Categorical fields whose encoder used handle_unknown="error"
+        self.strict_fields = set(strict_fields)
+
+    def _lookup(self, field, value):
+        table = self.category_tables[field]
+        try:
+            return table[value]
+        except (KeyError, TypeError):
+            if field in self.strict_fields:
+                raise ValueError(f"Found unknown category {value!r} in column {field}")
+            return 0.0
+
+    def predict_one(self, features):
+        """Score one feature dict (as produced by ``scoring.parse_record``)."""
+        x = np.array([features[f] for f in self.numeric_fields], dtype=float)
+        total = self.intercept + float(np.dot(self.weights, x))
+        for field in self.category_tables:
+            total += self._lookup(field, features.get(field))
+        return total
+
+    def contributions(self, field, values):
+        """Each value's additive contribution to the score for one input field.
+
+        The model is a sum of per-field terms, so the score of any variation of
+        a profile is its base score plus the change in the varied fields' terms.
+        """
+        if field in self.category_tables:
+            return np.array([self._lookup(field, v) for v in values], dtype=float)
+        weight = self.weights[self.numeric_fields.index(field)]
+        return weight * np.asarray(values, dtype=float)
+
+    def predict(self, frame):
+        """Vectorized scoring of a DataFrame, mirroring ``Pipeline.predict``."""
+        x = frame[self.numeric_fields].to_numpy(dtype=float)
+        total = x @ self.weights + self.intercept
+        for field, table in self.category_tables.items():
+            values = frame[field]
+            contrib = values.map(table)
+            if field in self.strict_fields and contrib.isna().any():
+                unknown = values[contrib.isna()].iloc[0]
+                raise ValueError(f"Found unknown category {unknown!r} in column {field}")
+            total += contrib.fillna(0.0).to_numpy(dtype=float)
+        return total
+
+
+def compile_pipeline(pipeline):
+    """Flatten a fitted ``ColumnTransformer -> linear model`` pipeline.
+
+    Raises UnsupportedPipeline for anything else (extra steps, other
+    transformers, multi-output models, infrequent-category encoders ...).
+    """
+    # Imported here so importing this module stays cheap; the pipeline being
+    # unpickled has already loaded these anyway
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+        raise UnsupportedPipeline("expected a two-step Pipeline")
+    pre, reg = pipeline.steps[0][1], pipeline.steps[1][1]
+    if not isinstance(pre, ColumnTransformer):
+        raise UnsupportedPipeline("first step is not a ColumnTransformer")
+    coef = np.asarray(getattr(reg, "coef_", None), dtype=float)
+    if coef.ndim != 1 or np.ndim(getattr(reg, "intercept_", None)) != 0:
+        raise UnsupportedPipeline("final step is not a single-output linear model")
+
+    numeric_fields, weights = [], []
+    category_tables, strict_fields = {}, []
+    intercept = float(reg.intercept_)
+    offset = 0
+
+    for name, transformer, columns in pre.transformers_:
+        if isinstance(transformer, str) and transformer == "drop":
+            continue
+        if isinstance(columns, str) or not all(isinstance(c, str) for c in columns):
+            raise UnsupportedPipeline(f"transformer {name!r} must select columns by name")
+        if isinstance(transformer, StandardScaler):
+            width = len(columns)
+            block = coef[offset:offset + width]
+            mean = transformer.mean_ if transformer.with_mean else np.zeros(width)
+            scale = transformer.scale_ if transformer.with_std else np.ones(width)
+            w = block / scale
+            intercept -= float(np.dot(w, mean))
+            numeric_fields.extend(columns)
+            weights.extend(w)
+        elif isinstance(transformer, OneHotEncoder):
+            if transformer.drop is not None or getattr(transformer, "_infrequent_enabled", False):
+                raise UnsupportedPipeline("OneHotEncoder with drop/infrequent categories")
+            width = 0
+            for column, categories in zip(columns, transformer.categories_):
+                block = coef[offset + width:offset + width + len(categories)]
+                category_tables[column] = {c: float(v) for c, v in zip(categories.tolist(), block)}
+                width += len(categories)
+            if transformer.handle_unknown == "error":
+                strict_fields.extend(columns)
+        else:
+            raise UnsupportedPipeline(f"unsupported transformer {type(transformer).__name__}")
+        offset += width
+
+    if offset != coef.shape[0]:
+        raise UnsupportedPipeline(f"expected {coef.shape[0]} encoded features, compiled {offset}")
+    return CompiledLinearModel(numeric_fields, weights, category_tables, intercept, strict_fields)
+
+
+def verification_frame(pipeline, n_rows=500, seed=0):
+    """Random inputs covering every known category plus unknown/missing ones."""
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    rng = np.random.default_rng(seed)
+    pre = pipeline.steps[0][1]
+    data = {}
+    for _, transformer, columns in pre.transformers_:
+        if isinstance(transformer, StandardScaler):
+            for i, column in enumerate(columns):
+                mean = transformer.mean_[i] if transformer.mean_ is not None else 0.0
+                scale = transformer.scale_[i] if transformer.scale_ is not None else 1.0
+                data[column] = rng.normal(mean, 3 * scale, n_rows)
+        elif isinstance(transformer, OneHotEncoder):
+            for column, categories in zip(columns, transformer.categories_):
+                choices = list(categories)
+                if transformer.handle_unknown != "error":
+                    choices += ["__unknown__", None]
+                data[column] = [choices[i] for i in rng.integers(0, len(choices), n_rows)]
+    return pd.DataFrame(data)
+
+
+def verify_compiled(compiled, pipeline, n_rows=500, rtol=1e-9, atol=1e-9):
+    """Check the compiled model against ``pipeline.predict`` on generated data.
+
+    Returns the largest absolute difference; raises UnsupportedPipeline if any
+    prediction (vectorized or single-row) is outside tolerance.
+    """
+    frame = verification_frame(pipeline, n_rows)
+    expected = pipeline.predict(frame)
+    vectorized = compiled.predict(frame)
+    single = np.array([compiled.predict_one(row) for row in frame.head(50).to_dict("records")])
+    worst = float(max(
+        np.max(np.abs(vectorized - expected)),
+        np.max(np.abs(single - expected[:len(single)])),
+    ))
+    if not (np.allclose(vectorized, expected, rtol=rtol, atol=atol)
+            and np.allclose(single, expected[:len(single)], rtol=rtol, atol=atol)):
+        raise UnsupportedPipeline(f"compiled model disagrees with pipeline (max diff {worst:g})")
+    return worst
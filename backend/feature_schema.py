@@ -0,0 +1,157 @@
+# backend/feature_schema.py
+"""Declarative description of the model's input fields and the decoder built from it.
+
+``FEATURE_SCHEMA`` is the one place that lists every field with its type,
+default, known categories and valid range. ``scoring.py`` derives its column
+lists from it, and ``RecordDecoder`` turns a JSON object, form or MessagePack
+map into model features in a single pass, reporting every problem instead of
+stopping at the first one.
+"""
+
+
+def normalize_str(s):
+    if s is None:
+        return s
+    return str(s).strip().title()
+
+
+class Field:
+    """One model input: ``kind`` is ``int``, ``float`` or ``str`` (categorical)."""
+
+    def __init__(self, name, kind, required=False, default=None, categories=None,
+                 minimum=None, maximum=None):
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.default = default
+        self.categories = tuple(categories) if categories else None
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @property
+    def numeric(self):
+        return self.kind is not str
+
+    def describe(self):
+        info = {"name": self.name, "type": self.kind.__name__, "required": self.required}
+        if self.default is not None:
+            info["default"] = self.default
+        if self.categories:
+            info["categories"] = list(self.categories)
+        if self.minimum is not None:
+            info["minimum"] = self.minimum
+            info["maximum"] = self.maximum
+        return info
+
+
+# Model input fields, in the order the pipeline was trained on. Ranges are
+# physical limits (hours in a day, days in a week), not the form's UX bounds.
+# Categories are the values seen in training; others are still accepted and
+# score as "none of the known values" unless the decoder is strict.
+FEATURE_SCHEMA = [
+    Field("age", int, required=True, default=18, minimum=5, maximum=100),
+    Field("gender", str, categories=["Female", "Male", "Other"]),
+    Field("study_hours_per_day", float, required=True, default=0.0, minimum=0, maximum=24),
+    Field("social_media_hours", float, required=True, default=0.0, minimum=0, maximum=24),
+    Field("part_time_job", str, categories=["No", "Yes"]),
+    Field("attendance_percentage", float, required=True, default=0.0, minimum=0, maximum=100),
+    Field("sleep_hours", float, required=True, default=0.0, minimum=0, maximum=24),
+    Field("diet_quality", str, categories=["Fair", "Good", "Poor"]),
+    Field("exercise_frequency", int, required=True, default=0, minimum=0, maximum=7),
+    Field("parental_education_level", str, categories=["Bachelor", "High School", "Master", "None"]),
+    Field("internet_Resource_accessibility", str, categories=["Average", "Good", "Poor"]),
+    Field("extracurricular_participation", str, categories=["No", "Yes"]),
+]
+
+
+class SchemaError(ValueError):
+    """A record failed validation; ``errors`` lists every problem found.
+
+    Each error is ``{"field", "code", "message"}`` with ``code`` one of
+    ``missing``, ``invalid``, ``out_of_range``, ``unknown_category`` or ``invalid_body``.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        missing = [e["field"] for e in errors if e["code"] == "missing"]
+        if missing:
+            message = f"Missing required fields: {', '.join(missing)}"
+        else:
+            message = errors[0]["message"]
+        super().__init__(message)
+
+
+class RecordDecoder:
+    """Schema turned into a decoder for one student record.
+
+    ``decode(record)`` accepts anything with ``.get`` (dict, werkzeug
+    MultiDict, unpacked MessagePack map). ``None`` and ``""`` count as
+    absent. With ``strict_categories`` unknown categorical values are errors.
+
+    The schema is flattened once into a per-field plan (converter, default,
+    bounds, categories), so decoding is one loop over plain tuples that
+    looks nothing up in the ``Field`` objects.
+    """
+
+    def __init__(self, schema=FEATURE_SCHEMA, strict_categories=False):
+        self.schema = schema
+        self.strict_categories = strict_categories
+        self._plan = tuple(
+            (
+                f.name,
+                normalize_str if f.kind is str else f.kind,
+                f.required,
+                f.default,
+                (f.minimum, f.maximum) if f.minimum is not None else None,
+                frozenset(f.categories) if strict_categories and f.categories else None,
+            )
+            for f in schema
+        )
+
+    def decode(self, record):
+        """Model features for one record, or raise SchemaError."""
+        try:
+            get = record.get
+        except AttributeError:
+            raise SchemaError([{
+                "field": None,
+                "code": "invalid_body",
+                "message": "Request body must be an object of field values",
+            }]) from None
+        features = {}
+        errors = []
+        for name, convert, required, default, bounds, categories in self._plan:
+            value = get(name)
+            if value is None or value == "":
+                if required:
+                    errors.append({"field": name, "code": "missing", "message": f"Missing required field: {name}"})
+                else:
+                    features[name] = default
+                continue
+            try:
+                value = convert(value)
+            except (TypeError, ValueError, OverflowError):
+                # OverflowError: int() of an infinite float, e.g. a JSON 1e400
+                errors.append({"field": name, "code": "invalid", "message": f"Invalid value for {name}: {value!r}"})
+                continue
+            if bounds is not None and not bounds[0] <= value <= bounds[1]:
+                errors.append({
+                    "field": name,
+                    "code": "out_of_range",
+                    "message": f"{name} must be between {bounds[0]} and {bounds[1]}, got {value!r}",
+                })
+                continue
+            if categories is not None and value not in categories:
+                errors.append({
+                    "field": name,
+                    "code": "unknown_category",
+                    "message": f"{name} must be one of {', '.join(sorted(categories))}, got {value!r}",
+                })
+                continue
+            features[name] = value
+        if errors:
+            raise SchemaError(errors)
+        return features
+
+    def describe(self):
+        return {"fields": [f.describe() for f in self.schema], "strict_categories": self.strict_categories}
@@ -0,0 +1,47 @@
+# backend/gunicorn.conf.py
+"""Gunicorn settings for the production server (see DEPLOYMENT.md).
+
+Every setting can be overridden from the environment.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+
+# Load wsgi:app (and the model) once in the master, then fork
+preload_app = True
+
+# Scoring is CPU-bound, so one process per core. Threads per worker cover
+# requests that wait on Gemini, which is I/O-bound.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+
+# Let in-flight requests finish on restart/shutdown (SIGHUP / SIGTERM)
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+keepalive = 5
+
+# Recycle workers now and then so a slow leak can't grow forever
+max_requests = int(os.environ.get("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = os.environ.get("ACCESS_LOG", "-")
+
+
+def pre_fork(server, worker):
+    # Move everything allocated while preloading (model included) into the
+    # permanent generation, so the collector in the children never touches
+    # those pages and they stay shared instead of being copied on write
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    # Give queued background suggestion jobs a chance to finish
+    import app
+
+    app.suggestion_jobs.shutdown(wait=False)
+    # Write out buffered audit-log records before the process goes away
+    app.audit_log.close()
@@ -0,0 +1,212 @@
+# backend/model_registry.py
+"""Versioned models from the ``models/`` directory with atomic hot swaps.
+
+Every ``<version>.joblib`` file in the directory is a version. A version is
+loaded, turned into a scorer (compiled or plain pipeline), and smoke-tested
+before it becomes visible; activating it is a single reference assignment,
+so requests never take a lock and in-flight requests finish on the model
+they started with.
+"""
+
+import math
+import os
+import threading
+import time
+
+import joblib
+import pandas as pd
+
+from scoring import parse_record, predict_record, prepare_frame, score_frame
+
+MODEL_SUFFIX = ".joblib"
+
+
+class ModelLoadError(Exception):
+    pass
+
+
+class UnknownModelVersion(KeyError):
+    pass
+
+
+class ModelVersion:
+    """A loaded, validated model artifact."""
+
+    def __init__(self, version, path, pipeline, scorer, signature, timings=None):
+        self.version = version
+        self.path = path
+        self.pipeline = pipeline
+        self.scorer = scorer
+        self.signature = signature
+        # Seconds spent reading, building and smoke-testing the artifact
+        self.timings = timings or {}
+        self.loaded_at = time.time()
+
+    @property
+    def backend(self):
+        return "sklearn" if self.scorer is self.pipeline else "compiled"
+
+    def info(self):
+        return {
+            "version": self.version,
+            "backend": self.backend,
+            "loaded_at": self.loaded_at,
+            "timings": self.timings,
+        }
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ModelRegistry:
+    """Loads model versions on demand and tracks which one is active.
+
+    ``build_scorer(pipeline)`` turns a pipeline into the object used for
+    scoring; ``smoke_record`` is a raw student record every new version must
+    score to a finite number before it is accepted. With ``mmap_mode="r"``
+    the NumPy arrays inside artifacts are memory-mapped read-only instead of
+    copied, so forked workers share one copy through the page cache.
+
+    A version that fails to load is not retried for ``retry_failed_after``
+    seconds unless its file changes: requests pinned to it get the same
+    ``ModelLoadError`` without waiting for the load lock.
+    """
+
+    def __init__(self, models_dir, default_version, build_scorer, smoke_record, mmap_mode=None,
+                 retry_failed_after=30, clock=time.monotonic):
+        self.models_dir = models_dir
+        self.default_version = default_version
+        self.build_scorer = build_scorer
+        self.smoke_record = smoke_record
+        self.mmap_mode = mmap_mode
+        self.retry_failed_after = retry_failed_after
+        self.clock = clock
+        self.active = None
+        self._loaded = {}  # version -> ModelVersion
+        self._failed = {}  # version -> (file signature, failed at, ModelLoadError)
+        self._load_lock = threading.Lock()
+
+    def path_for(self, version):
+        if not version or os.sep in version or (os.altsep and os.altsep in version) or version.startswith("."):
+            raise UnknownModelVersion(version)
+        return os.path.join(self.models_dir, version + MODEL_SUFFIX)
+
+    def available(self):
+        """Version names of all artifacts in the models directory."""
+        try:
+            names = os.listdir(self.models_dir)
+        except OSError:
+            return []
+        return sorted(n[:-len(MODEL_SUFFIX)] for n in names if n.endswith(MODEL_SUFFIX))
+
+    def load(self, version):
+        """Load, build and smoke-test a version from disk (always reads the file)."""
+        path = self.path_for(version)
+        if not os.path.exists(path):
+            raise UnknownModelVersion(version)
+        try:
+            started = time.perf_counter()
+            signature = file_signature(path)
+            pipeline = joblib.load(path, mmap_mode=self.mmap_mode)
+            loaded = time.perf_counter()
+            scorer = self.build_scorer(pipeline)
+            built = time.perf_counter()
+            # Smoke prediction through both scoring paths (also warms them up)
+            single = predict_record(scorer, parse_record(self.smoke_record))
+            frame, _ = prepare_frame(pd.DataFrame([self.smoke_record]))
+            batch = float(score_frame(scorer, frame)[0])
+            smoked = time.perf_counter()
+        except Exception as e:
+            raise ModelLoadError(f"Model {version!r} failed to load: {e}") from e
+        if not (math.isfinite(single) and math.isfinite(batch)):
+            raise ModelLoadError(f"Model {version!r} produced a non-finite smoke prediction")
+        timings = {
+            "load_seconds": round(loaded - started, 4),
+            "build_seconds": round(built - loaded, 4),
+            "smoke_seconds": round(smoked - built, 4),
+        }
+        return ModelVersion(version, path, pipeline, scorer, signature, timings)
+
+    def get(self, version=None):
+        """The active model, or a specific version (loaded on first use)."""
+        if version is None or (self.active is not None and version == self.active.version):
+            return self.active
+        entry = self._loaded.get(version)
+        if entry is not None:
+            return entry
+        self._raise_recent_failure(version)
+        with self._load_lock:
+            entry = self._loaded.get(version)
+            if entry is None:
+                # Another request may have just failed to load it
+                self._raise_recent_failure(version)
+                entry = self._load_remembering_failure(version)
+                self._loaded[version] = entry
+        return entry
+
+    def _raise_recent_failure(self, version):
+        failed = self._failed.get(version)
+        if failed is None:
+            return
+        signature, failed_at, error = failed
+        if self.clock() - failed_at < self.retry_failed_after and self._signature(version) == signature:
+            raise error
+
+    def _load_remembering_failure(self, version):
+        """``load``, remembering a ``ModelLoadError`` for ``_raise_recent_failure``."""
+        try:
+            entry = self.load(version)
+        except ModelLoadError as e:
+            self._failed[version] = (self._signature(version), self.clock(), e)
+            raise
+        self._failed.pop(version, None)
+        return entry
+
+    def _signature(self, version):
+        try:
+            return file_signature(self.path_for(version))
+        except OSError:
+            return None
+
+    def peek(self, version=None):
+        """Like ``get``, but only what is already loaded: None rather than reading a file."""
+        if version is None or (self.active is not None and version == self.active.version):
+            return self.active
+        return self._loaded.get(version)
+
+    def activate(self, version):
+        """Make ``version`` the active model, loading and validating it first if needed."""
+        entry = self.get(version)
+        self.active = entry
+        return entry
+
+    def changed_versions(self):
+        """``{version: new signature}`` for loaded versions whose file changed on disk."""
+        changed = {}
+        for version, entry in list(self._loaded.items()):
+            try:
+                signature = file_signature(entry.path)
+            except OSError:
+                continue
+            if signature != entry.signature:
+                changed[version] = signature
+        return changed
+
+    def reload(self, version):
+        """Re-read a loaded version from disk, swapping it in if it was active."""
+        with self._load_lock:
+            entry = self._load_remembering_failure(version)
+            self._loaded[version] = entry
+            if self.active is not None and self.active.version == version:
+                self.active = entry
+        return entry
+
+    def info(self):
+        active = self.active
+        return {
+            "active": active.version if active else None,
+            "available": self.available(),
+            "loaded": [e.info() for e in sorted(self._loaded.values(), key=lambda e: e.version)],
+        }
@@ -0,0 +1,172 @@
+# backend/profiler.py
+"""On-demand sampling profiler and allocation tracing for a live process.
+
+Nothing runs until a session is started. The request hooks then check
+``profiler.active`` (one attribute read) and do nothing else.
+
+A session (``run``) samples from the calling thread, every ``interval``
+seconds:
+
+- It calls ``sys._current_frames()`` and records the stack of each thread
+  that is currently serving a request.
+- Threads mark themselves with ``enter`` and ``leave`` from the request
+  hooks. With ``tagged_only``, only requests that opted in (the
+  ``X-Profile`` header) are sampled. Idle server threads and background
+  workers never appear.
+
+Stacks are aggregated in the collapsed format read by flamegraph.pl and
+speedscope: one ``label;outer;...;inner count`` line per distinct stack,
+where the label is the request (``POST /api/predict``).
+
+With ``allocations`` the session also runs ``tracemalloc`` and reports the
+top allocation sites still alive at the end. These are process-wide, not
+limited to the sampled requests. ``tracemalloc`` slows every allocation
+down noticeably while it is on, and it is stopped again when the session
+ends.
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+
+class ProfilerBusy(Exception):
+    """A profiling session is already running."""
+
+
+class SamplingProfiler:
+    """One profiling session at a time over the threads serving requests."""
+
+    def __init__(self):
+        self.active = False
+        self._threads = {}  # thread id -> label of the request it is serving
+        self._tagged_only = False
+        self._max_requests = None
+        self._requests = 0
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+        self._frame_names = {}  # code object -> "name (file:line)"
+        self._sessions = 0
+        self._ticks = 0
+
+    # --------------------------
+    #  Request hooks (only called while active)
+    # --------------------------
+    def enter(self, label, tagged=False):
+        """Sample the current thread as serving ``label`` until ``leave``."""
+        if tagged or not self._tagged_only:
+            self._threads[threading.get_ident()] = label
+
+    def leave(self):
+        """The current thread finished its request; counts toward ``requests``."""
+        if self._threads.pop(threading.get_ident(), None) is None:
+            return
+        with self._lock:
+            self._requests += 1
+            if self._max_requests and self._requests >= self._max_requests:
+                self._finished.set()
+
+    # --------------------------
+    #  Sessions
+    # --------------------------
+    def stop(self):
+        """End the running session early (``run`` returns its report)."""
+        self._finished.set()
+
+    def run(self, seconds, requests=None, interval=0.005, allocations=False, tagged_only=False, top=20):
+        """Profile for ``seconds``, or until ``requests`` sampled requests finish.
+
+        Blocks the calling thread for the session and returns the report.
+        Raises ``ProfilerBusy`` if a session is already running.
+        """
+        with self._lock:
+            if self.active:
+                raise ProfilerBusy("A profiling session is already running")
+            self._threads.clear()
+            self._tagged_only = tagged_only
+            self._max_requests = requests
+            self._requests = 0
+            self._finished.clear()
+            self._sessions += 1
+            self.active = True
+        # Leave tracemalloc alone if someone else already turned it on
+        own_tracing = allocations and not tracemalloc.is_tracing()
+        if own_tracing:
+            # One frame per allocation: the report groups by line, and
+            # deeper tracebacks multiply tracemalloc's cost
+            tracemalloc.start(1)
+        stacks = Counter()
+        ticks = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        try:
+            me = threading.get_ident()
+            while not self._finished.wait(interval) and time.perf_counter() < deadline:
+                ticks += 1
+                frames = sys._current_frames()
+                for thread_id, label in list(self._threads.items()):
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != me:
+                        stacks[self._collapse(label, frame)] += 1
+                del frames
+            allocation_report = self._allocations(top) if allocations else None
+        finally:
+            with self._lock:
+                self.active = False
+                self._threads.clear()
+                finished = self._finished.is_set()
+                served = self._requests
+                self._ticks += ticks
+            if own_tracing:
+                tracemalloc.stop()
+        return {
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "stopped_by": "requests" if finished else "time",
+            "interval_ms": interval * 1000,
+            "ticks": ticks,
+            "samples": sum(stacks.values()),
+            "requests": served,
+            "collapsed": "".join(f"{stack} {count}\n" for stack, count in stacks.most_common()),
+            "allocations": allocation_report,
+        }
+
+    def _collapse(self, label, frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            name = self._frame_names.get(code)
+            if name is None:
+                name = self._frame_names[code] = (
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+            names.append(name)
+            frame = frame.f_back
+        names.append(label)
+        return ";".join(reversed(names))
+
+    @staticmethod
+    def _allocations(top):
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_kb": round(current / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "top": [
+                {
+                    "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[:top]
+            ],
+        }
+
+    def stats(self):
+        return {"active": self.active, "sessions": self._sessions, "ticks": self._ticks}
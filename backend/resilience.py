@@ -0,0 +1,278 @@
+# backend/resilience.py
+"""Deadline, bulkhead and circuit breaker for calls to a remote service (Gemini)."""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CallRejected(Exception):
+    """The call was not attempted (breaker open or too many calls in flight)."""
+
+
+class CircuitOpen(CallRejected):
+    pass
+
+
+class BulkheadFull(CallRejected):
+    pass
+
+
+class DeadlineExceeded(Exception):
+    """The call did not finish within its deadline."""
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and stays open for
+    ``reset_timeout`` seconds; then lets a single probe call through (half-open)
+    and closes again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self):
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = HALF_OPEN
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Forget an allowed call that ended up not being made."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.times_opened += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+
+class GuardedCall:
+    """Runs calls on a dedicated pool with a deadline, a concurrency cap and a breaker.
+
+    A call that times out keeps its concurrency slot until the underlying
+    request actually returns, so stuck calls can never exceed ``max_concurrent``.
+    """
+
+    def __init__(self, timeout, max_concurrent, failure_threshold, reset_timeout,
+                 clock=time.monotonic):
+        self.timeout = timeout
+        self.max_concurrent = max_concurrent
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.counters = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "short_circuited": 0,
+            "bulkhead_rejected": 0,
+        }
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self.counters[name] += delta
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _submit(self, fn, *args, **kwargs):
+        """Admit a call (breaker, then bulkhead) and start it on the pool."""
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpen("circuit breaker is open")
+        if not self._slots.acquire(blocking=False):
+            self._count("bulkhead_rejected")
+            self.breaker.release_probe()
+            raise BulkheadFull(f"{self.max_concurrent} calls already in flight")
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrent, thread_name_prefix="guarded-call"
+                )
+            self._in_flight += 1
+            self.counters["calls"] += 1
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._release)
+        return future
+
+    def call(self, fn, *args, **kwargs):
+        """Return ``fn(*args, **kwargs)`` or raise CallRejected / DeadlineExceeded /
+        whatever ``fn`` raised."""
+        future = self._submit(fn, *args, **kwargs)
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._count("timeouts")
+            self.breaker.record_failure()
+            raise DeadlineExceeded(f"no response within {self.timeout}s")
+        except Exception:
+            self._count("failures")
+            self.breaker.record_failure()
+            raise
+        self._count("successes")
+        self.breaker.record_success()
+        return result
+
+    def stream(self, fn, *args, **kwargs):
+        """Yield the items of the iterable ``fn(*args, **kwargs)`` as the pool produces them.
+
+        Admission and errors are as for ``call``, and the whole stream shares
+        one deadline. If the consumer stops early the producer stops at its
+        next item; the slot is held until it does.
+        """
+        items = queue.Queue()
+        stop = threading.Event()
+
+        def produce():
+            try:
+                for item in fn(*args, **kwargs):
+                    if stop.is_set():
+                        return
+                    items.put((True, item))
+            except Exception as e:
+                items.put((False, e))
+                return
+            items.put((False, None))
+
+        self._submit(produce)
+        deadline = time.monotonic() + self.timeout
+        received = False
+        try:
+            while True:
+                try:
+                    ok, item = items.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    self._count("timeouts")
+                    self.breaker.record_failure()
+                    raise DeadlineExceeded(f"stream not finished within {self.timeout}s") from None
+                if ok:
+                    received = True
+                    yield item
+                elif item is None:
+                    break
+                else:
+                    self._count("failures")
+                    self.breaker.record_failure()
+                    raise item
+        except GeneratorExit:
+            # Stopped by the consumer: healthy if the service was answering
+            if received:
+                self._count("successes")
+                self.breaker.record_success()
+            else:
+                self.breaker.release_probe()
+            raise
+        finally:
+            stop.set()
+        self._count("successes")
+        self.breaker.record_success()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["in_flight"] = self._in_flight
+        # Every rejected or timed-out call is answered by the caller's fallback
+        stats["fallbacks"] = stats["short_circuited"] + stats["bulkhead_rejected"] + stats["timeouts"]
+        stats["max_concurrent"] = self.max_concurrent
+        stats["timeout"] = self.timeout
+        stats["breaker_state"] = self.breaker.state
+        stats["breaker_opened"] = self.breaker.times_opened
+        return stats
+
+
+class AsyncGuardedCall(GuardedCall):
+    """``GuardedCall`` for coroutines awaited on an event loop.
+
+    Calls run on the loop itself, not on a pool, so a slow service ties up
+    only memory, never threads; ``max_concurrent`` can be in the thousands.
+    A call that misses its deadline is cancelled, which frees its slot.
+    """
+
+    def __init__(self, timeout, max_concurrent, failure_threshold, reset_timeout,
+                 clock=time.monotonic):
+        super().__init__(timeout, max_concurrent, failure_threshold, reset_timeout, clock)
+        self._slots = None
+
+    async def call(self, fn, *args, **kwargs):
+        """Return ``await fn(*args, **kwargs)`` or raise like ``GuardedCall.call``."""
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpen("circuit breaker is open")
+        with self._lock:
+            if self._in_flight >= self.max_concurrent:
+                self.counters["bulkhead_rejected"] += 1
+                full = True
+            else:
+                self._in_flight += 1
+                self.counters["calls"] += 1
+                full = False
+        if full:
+            self.breaker.release_probe()
+            raise BulkheadFull(f"{self.max_concurrent} calls already in flight")
+        try:
+            result = await asyncio.wait_for(fn(*args, **kwargs), self.timeout)
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            self.breaker.record_failure()
+            raise DeadlineExceeded(f"no response within {self.timeout}s") from None
+        except asyncio.CancelledError:
+            # The client went away; says nothing about the service's health
+            self.breaker.release_probe()
+            raise
+        except Exception:
+            self._count("failures")
+            self.breaker.record_failure()
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        self._count("successes")
+        self.breaker.record_success()
+        return result
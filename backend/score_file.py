@@ -0,0 +1,439 @@
+# backend/score_file.py
+"""Score a large CSV or Parquet file offline, in parallel, without the web app.
+
+    python score_file.py students.csv scores.csv --workers 8 --suggestions 3
+
+The input is cut into shards:
+
+- CSV: byte ranges of about ``--shard-mb`` MB, each ending on a line break.
+  The shards are found with a few seeks, so nothing is read twice. Quoted
+  fields must not contain line breaks.
+- Parquet: runs of whole row groups with about ``--shard-rows`` rows in
+  total.
+
+By default a file is cut into about 64 shards, so workers stay evenly busy.
+
+Each worker process loads the model once (memory-mapped, so workers share
+its pages) and scores its shards ``--chunk-rows`` rows at a time, with the
+same validation as ``/api/predict/csv``. Every finished shard is renamed
+into ``<output>.parts/``. The parts are merged in input order at the end.
+After an interruption, ``--resume`` skips the finished shards, provided the
+input, model and options are unchanged.
+
+Output has one row per input data row, in order: the ``--keep`` columns,
+``prediction`` (empty for rejected rows), ``error`` and, with
+``--suggestions K``, ``suggestions`` (the score-band line plus up to K - 1
+ranked changes, as a JSON list in CSV). Parquet input or output needs
+pyarrow, from ``requirements-optional.txt``.
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import pandas as pd
+
+from compiled_model import UnsupportedPipeline, compile_pipeline, verify_compiled
+from model_registry import MODEL_SUFFIX, file_signature
+from scoring import clamp_scores, iter_csv_chunks, predict_frame, prepare_frame
+from suggestion_rules import SuggestionRanker, columns_from_frame, headline
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(BASE_DIR, "models")
+
+MANIFEST = "manifest.json"
+# Default shard count target: enough shards to keep many workers busy and
+# balanced, each still big enough that per-shard overhead doesn't matter
+TARGET_SHARDS = 64
+MAX_SHARD_BYTES = 32 * 2 ** 20
+MIN_SHARD_BYTES = 2 ** 20
+MAX_SHARD_ROWS = 500000
+
+
+def _is_parquet(path):
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+# --------------------------
+#  Sharding
+# --------------------------
+def csv_shards(path, shard_bytes):
+    """``[(start, end), ...]`` byte ranges of whole data lines (header excluded)."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        shards = []
+        while start < size:
+            end = min(start + shard_bytes, size)
+            if end < size:
+                f.seek(end)
+                f.readline()  # finish the line the cut landed in
+                end = f.tell()
+            shards.append((start, end))
+            start = end
+    return shards
+
+
+def parquet_shards(path, shard_rows):
+    """``[[row group, ...], ...]`` with about ``shard_rows`` rows per shard."""
+    import pyarrow.parquet as pq
+
+    metadata = pq.ParquetFile(path).metadata
+    shards, current, rows = [], [], 0
+    for group in range(metadata.num_row_groups):
+        current.append(group)
+        rows += metadata.row_group(group).num_rows
+        if rows >= shard_rows:
+            shards.append(current)
+            current, rows = [], 0
+    if current:
+        shards.append(current)
+    return shards
+
+
+def default_shard_bytes(path):
+    """About ``TARGET_SHARDS`` shards, within the min/max shard size.
+
+    Depends on the file only (not ``--workers``), so a run can be resumed
+    with a different number of workers.
+    """
+    return min(MAX_SHARD_BYTES, max(MIN_SHARD_BYTES, os.path.getsize(path) // TARGET_SHARDS))
+
+
+def default_shard_rows(path):
+    import pyarrow.parquet as pq
+
+    rows = pq.ParquetFile(path).metadata.num_rows
+    return min(MAX_SHARD_ROWS, max(1, rows // TARGET_SHARDS))
+
+
+def shard_weights(path, shards):
+    """Relative size of each shard, for progress: bytes (CSV) or rows (Parquet)."""
+    if not _is_parquet(path):
+        return [end - start for start, end in shards]
+    import pyarrow.parquet as pq
+
+    metadata = pq.ParquetFile(path).metadata
+    return [sum(metadata.row_group(g).num_rows for g in groups) for groups in shards]
+
+
+# --------------------------
+#  Worker side
+# --------------------------
+_worker = {}
+
+
+def build_scorer(pipeline, backend):
+    """The compiled model when it can be verified against ``pipeline`` (same rule as the app)."""
+    if backend != "compiled":
+        return pipeline
+    try:
+        compiled = compile_pipeline(pipeline)
+        verify_compiled(compiled, pipeline)
+    except UnsupportedPipeline:
+        return pipeline
+    return compiled
+
+
+def init_worker(model_path, backend, suggestions, keep, chunk_rows, schema=None):
+    """Process-pool initializer: load the model once per worker process."""
+    pipeline = joblib.load(model_path, mmap_mode="r")
+    scorer = build_scorer(pipeline, backend)
+    ranker = None
+    if suggestions:
+        model = scorer
+        if not hasattr(model, "contributions"):
+            try:
+                model = compile_pipeline(pipeline)
+            except UnsupportedPipeline:
+                model = None
+        ranker = SuggestionRanker(model)
+    _worker.update(scorer=scorer, ranker=ranker, suggestions=suggestions, keep=keep, chunk_rows=chunk_rows,
+                   schema=schema)
+
+
+def _read_chunks(input_path, shard, chunk_rows):
+    """``(raw, features, errors)`` per chunk of one shard."""
+    if _is_parquet(input_path):
+        import pyarrow.parquet as pq
+
+        table = pq.ParquetFile(input_path).read_row_groups(shard)
+        for offset in range(0, table.num_rows, chunk_rows):
+            raw = table.slice(offset, chunk_rows).to_pandas()
+            features, errors = prepare_frame(raw)
+            yield raw, features, errors
+        return
+    start, end = shard
+    with open(input_path, "rb") as f:
+        header = f.readline()
+        f.seek(start)
+        data = f.read(end - start)
+    yield from iter_csv_chunks(io.BytesIO(header + data), chunk_rows)
+
+
+def _score_chunk(raw, features, errors):
+    """Output frame for one chunk, one row per input row in order."""
+    scores = clamp_scores(predict_frame(_worker["scorer"], features))
+    out = pd.DataFrame(index=raw.index)
+    for column in _worker["keep"]:
+        out[column] = raw[column] if column in raw else None
+    out["prediction"] = pd.Series(scores, index=features.index, dtype=float).reindex(raw.index)
+    out["error"] = pd.Series(errors, dtype=object).reindex(raw.index)
+    k = _worker["suggestions"]
+    if k:
+        ranked = _worker["ranker"].suggest(columns_from_frame(features), k=k - 1)
+        lists = [[headline(score)] + rest for score, rest in zip(scores.tolist(), ranked)]
+        out["suggestions"] = pd.Series(lists, index=features.index, dtype=object).reindex(raw.index)
+    return out.reset_index(drop=True)
+
+
+def _scored_chunks(input_path, shard, counts):
+    for raw, features, errors in _read_chunks(input_path, shard, _worker["chunk_rows"]):
+        out = _score_chunk(raw, features, errors)
+        counts[0] += len(out)
+        counts[1] += len(errors)
+        yield out
+
+
+def score_shard(input_path, shard, out_path):
+    """Score one shard into ``out_path``; returns ``(rows, rejected)``.
+
+    The file is written under a temporary name and renamed when complete,
+    so a part file that exists is a finished shard.
+    """
+    counts = [0, 0]
+    chunks = _scored_chunks(input_path, shard, counts)
+    tmp_path = out_path + ".tmp"
+    if _is_parquet(out_path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = _worker["schema"]
+        frames = list(chunks)
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=schema.names)
+        pq.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False), tmp_path)
+    else:
+        with open(tmp_path, "w", newline="") as f:
+            for out in chunks:
+                if "suggestions" in out:
+                    present = out["suggestions"].notna()
+                    out.loc[present, "suggestions"] = [json.dumps(s) for s in out.loc[present, "suggestions"]]
+                out.to_csv(f, header=False, index=False)
+    os.replace(tmp_path, out_path)
+    return tuple(counts)
+
+
+def output_schema(input_path, keep, suggestions):
+    """Arrow schema of the Parquet output; kept columns keep their input type."""
+    import pyarrow as pa
+
+    source = None
+    if _is_parquet(input_path):
+        import pyarrow.parquet as pq
+
+        source = pq.ParquetFile(input_path).schema_arrow
+    fields = [source.field(c) if source is not None and c in source.names else pa.field(c, pa.string())
+              for c in keep]
+    fields += [pa.field("prediction", pa.float64()), pa.field("error", pa.string())]
+    if suggestions:
+        fields.append(pa.field("suggestions", pa.list_(pa.string())))
+    return pa.schema(fields)
+
+
+# --------------------------
+#  Driver
+# --------------------------
+def _manifest(args, model_path, shards):
+    return {
+        "input": os.path.abspath(args.input),
+        "input_signature": list(file_signature(args.input)),
+        "model": model_path,
+        "model_signature": list(file_signature(model_path)),
+        "backend": args.backend,
+        "suggestions": args.suggestions,
+        "keep": args.keep,
+        "output_format": "parquet" if _is_parquet(args.output) else "csv",
+        "shards": shards,
+    }
+
+
+def _prepare_parts(args, parts_dir, manifest):
+    """Create or validate the parts directory; returns the finished shard indexes."""
+    manifest_path = os.path.join(parts_dir, MANIFEST)
+    if os.path.isdir(parts_dir):
+        if not args.resume:
+            print(f"Discarding partial results in {parts_dir} (pass --resume to continue them)", file=sys.stderr)
+            shutil.rmtree(parts_dir)
+        else:
+            try:
+                with open(manifest_path) as f:
+                    previous = json.load(f)
+            except (OSError, ValueError):
+                previous = None
+            if previous != json.loads(json.dumps(manifest)):
+                raise SystemExit(f"Cannot resume: input, model or options changed since {parts_dir} was written")
+            suffix = ".parquet" if manifest["output_format"] == "parquet" else ".csv"
+            return {i for i in range(len(manifest["shards"]))
+                    if os.path.exists(_part_path(parts_dir, i, suffix))}
+    os.makedirs(parts_dir)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    return set()
+
+
+def _part_path(parts_dir, index, suffix):
+    return os.path.join(parts_dir, f"part-{index:05d}{suffix}")
+
+
+def _output_columns(args):
+    columns = list(args.keep) + ["prediction", "error"]
+    if args.suggestions:
+        columns.append("suggestions")
+    return columns
+
+
+def merge_parts(parts, output, columns):
+    """Concatenate the part files in order into ``output`` (atomically)."""
+    tmp_path = output + ".tmp"
+    if _is_parquet(output):
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for part in parts:
+                table = pq.read_table(part)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(tmp_path, "wb") as out:
+            out.write((",".join(columns) + "\n").encode())
+            for part in parts:
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, out, 1024 * 1024)
+    os.replace(tmp_path, output)
+
+
+class Progress:
+    """Throttled progress lines on stderr, weighted by shard size."""
+
+    def __init__(self, weights, done, interval=1.0, stream=None):
+        self.total = sum(weights) or 1
+        self.weights = weights
+        self.done = sum(weights[i] for i in done)
+        self.resumed = self.done
+        self.shards_done = len(done)
+        self.rows = 0
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.started = time.perf_counter()
+        self._last = 0.0
+
+    def update(self, index, rows, force=False):
+        self.done += self.weights[index]
+        self.shards_done += 1
+        self.rows += rows
+        now = time.perf_counter()
+        if not force and now - self._last < self.interval and self.done < self.total:
+            return
+        self._last = now
+        elapsed = now - self.started
+        fraction = self.done / self.total
+        rate = (self.done - self.resumed) / elapsed if elapsed else 0
+        eta = (self.total - self.done) / rate if rate else float("nan")
+        print(f"{fraction:6.1%}  {self.shards_done}/{len(self.weights)} shards  {self.rows:,} rows  "
+              f"{self.rows / elapsed if elapsed else 0:,.0f} rows/s  ETA {eta:.0f}s", file=self.stream)
+
+
+def run(args):
+    started = time.perf_counter()
+    model_path = os.path.abspath(os.path.join(args.models_dir, args.model_version + MODEL_SUFFIX))
+    if not os.path.exists(model_path):
+        raise SystemExit(f"Model not found: {model_path}")
+    if args.input.lower().endswith(".gz"):
+        raise SystemExit("Compressed CSV can't be split into byte ranges; decompress it first")
+    if _is_parquet(args.input) or _is_parquet(args.output):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet input or output needs pyarrow (see requirements-optional.txt)") from None
+    if _is_parquet(args.input):
+        shard_rows = args.shard_rows or default_shard_rows(args.input)
+        shards = parquet_shards(args.input, shard_rows)
+    else:
+        shard_bytes = int(args.shard_mb * 2 ** 20) if args.shard_mb else default_shard_bytes(args.input)
+        shards = csv_shards(args.input, shard_bytes)
+    parts_dir = args.output + ".parts"
+    manifest = _manifest(args, model_path, shards)
+    done = _prepare_parts(args, parts_dir, manifest)
+    suffix = ".parquet" if _is_parquet(args.output) else ".csv"
+    parts = [_part_path(parts_dir, i, suffix) for i in range(len(shards))]
+    pending = [i for i in range(len(shards)) if i not in done]
+    print(f"{len(shards)} shards ({len(done)} already done), {args.workers} workers", file=sys.stderr)
+
+    schema = output_schema(args.input, args.keep, args.suggestions) if _is_parquet(args.output) else None
+    progress = Progress(shard_weights(args.input, shards), done)
+    rows = failed = 0
+    if pending:
+        # Workers start from a clean process rather than a fork of this one,
+        # which may hold locks taken by its own threads (e.g. when imported)
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with ProcessPoolExecutor(
+            args.workers, mp_context=multiprocessing.get_context(method), initializer=init_worker,
+            initargs=(model_path, args.backend, args.suggestions, args.keep, args.chunk_rows, schema),
+        ) as pool:
+            futures = {pool.submit(score_shard, args.input, shards[i], parts[i]): i for i in pending}
+            for future in as_completed(futures):
+                shard_rows, shard_failed = future.result()
+                rows += shard_rows
+                failed += shard_failed
+                progress.update(futures[future], shard_rows)
+
+    merge_parts(parts, args.output, _output_columns(args))
+    if not args.keep_parts:
+        shutil.rmtree(parts_dir)
+    elapsed = time.perf_counter() - started
+    print(f"Scored {rows:,} rows ({failed:,} rejected) in {elapsed:.1f}s, "
+          f"{rows / elapsed if elapsed else 0:,.0f} rows/s -> {args.output}", file=sys.stderr)
+    return rows, failed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of students in parallel.")
+    parser.add_argument("input", help="CSV or Parquet (.parquet) file with the model's input columns")
+    parser.add_argument("output", help="CSV or Parquet (.parquet) file to write")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPUs)")
+    parser.add_argument("--shard-mb", type=float, help="CSV shard size in MB (default: 1/64 of the file, 1-32 MB)")
+    parser.add_argument("--shard-rows", type=int,
+                        help="rows per Parquet shard (default: 1/64 of the rows, at most 500000)")
+    parser.add_argument("--chunk-rows", type=int, default=100000, help="rows scored per call (default 100000)")
+    parser.add_argument("--suggestions", type=int, default=0, metavar="K",
+                        help="add up to K basic suggestions per row (default 0, none)")
+    parser.add_argument("--keep", type=lambda s: [c for c in s.split(",") if c], default=[],
+                        help="comma-separated input columns to copy to the output (e.g. an id)")
+    parser.add_argument("--model-version", default=os.environ.get("MODEL_VERSION", "ridge_pipeline"))
+    parser.add_argument("--models-dir", default=MODELS_DIR)
+    parser.add_argument("--backend", choices=("compiled", "sklearn"),
+                        default=os.environ.get("MODEL_BACKEND", "compiled"))
+    parser.add_argument("--resume", action="store_true", help="continue from the finished shards of a previous run")
+    parser.add_argument("--keep-parts", action="store_true", help="keep the per-shard files after merging")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    run(parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
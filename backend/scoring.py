@@ -0,0 +1,144 @@
+# backend/scoring.py
+"""Feature handling and vectorized scoring shared by the prediction endpoints."""
+
+import gzip
+
+import numpy as np
+import pandas as pd
+
+from feature_schema import FEATURE_SCHEMA, RecordDecoder, SchemaError, normalize_str  # noqa: F401
+
+# Model input columns, in the order the pipeline was trained on
+FEATURE_COLUMNS = [f.name for f in FEATURE_SCHEMA]
+REQUIRED_FIELDS = [f.name for f in FEATURE_SCHEMA if f.required]
+INT_FIELDS = [f.name for f in FEATURE_SCHEMA if f.kind is int]
+FLOAT_FIELDS = [f.name for f in FEATURE_SCHEMA if f.kind is float]
+NUMERIC_FIELDS = [f.name for f in FEATURE_SCHEMA if f.numeric]
+CATEGORICAL_FIELDS = [f.name for f in FEATURE_SCHEMA if not f.numeric]
+FIELD_RANGES = {f.name: (f.minimum, f.maximum) for f in FEATURE_SCHEMA if f.minimum is not None}
+
+RECORD_DECODER = RecordDecoder()
+
+
+def parse_record(record):
+    """Validate one student record and convert it to model feature values.
+
+    Raises SchemaError (a ValueError) listing every missing, unparseable or
+    out-of-range field.
+    """
+    return RECORD_DECODER.decode(record)
+
+
+def feature_key(features):
+    """Hashable canonical form of a parsed record, in model column order."""
+    return tuple(features.get(f) for f in FEATURE_COLUMNS)
+
+
+def _normalize_column(values):
+    """Column-wise ``normalize_str``: strip + title-case, missing values stay missing."""
+    present = values.notna()
+    out = pd.Series(None, index=values.index, dtype=object)
+    if present.any():
+        out[present] = values[present].astype(str).str.strip().str.title()
+    return out
+
+
+def prepare_frame(raw):
+    """Validate and normalize a frame of raw student rows in one pass.
+
+    Returns ``(features, errors)``: ``features`` holds the model-ready rows that
+    passed validation (original index preserved) and ``errors`` maps the index
+    of every rejected row to a message.
+    """
+    raw = raw.reindex(columns=FEATURE_COLUMNS)
+    errors = {}
+
+    missing = pd.DataFrame({f: _is_blank(raw[f]) for f in REQUIRED_FIELDS})
+    rejected = missing.any(axis=1)
+    for idx in rejected[rejected].index:
+        fields = [f for f in REQUIRED_FIELDS if missing.at[idx, f]]
+        errors[idx] = f"Missing required fields: {', '.join(fields)}"
+
+    features = {}
+    for field in FEATURE_COLUMNS:
+        if field in CATEGORICAL_FIELDS:
+            features[field] = _normalize_column(raw[field])
+            continue
+        numbers = pd.to_numeric(raw[field], errors="coerce")
+        invalid = numbers.isna() & raw[field].notna() & ~rejected
+        for idx in invalid[invalid].index:
+            errors[idx] = f"Invalid value for {field}: {raw.at[idx, field]!r}"
+        rejected = rejected | invalid
+        if field in FIELD_RANGES:
+            low, high = FIELD_RANGES[field]
+            outside = numbers.notna() & ~numbers.between(low, high) & ~rejected
+            for idx in outside[outside].index:
+                value = raw.at[idx, field]
+                # Typed (e.g. Parquet) columns hold numpy scalars; report the plain value
+                value = value.item() if isinstance(value, np.generic) else value
+                errors[idx] = f"{field} must be between {low} and {high}, got {value!r}"
+            rejected = rejected | outside
+        if field in INT_FIELDS:
+            # Same truncation as int() on the single-row path
+            numbers = np.trunc(numbers)
+        features[field] = numbers
+
+    features = pd.DataFrame(features, index=raw.index)[~rejected]
+    features = features.astype({f: "int64" for f in INT_FIELDS})
+    return features, errors
+
+
+def _is_blank(values):
+    if pd.api.types.is_numeric_dtype(values):
+        return values.isna()
+    return values.isna() | (values.astype(str).str.strip() == "")
+
+
+def clamp_scores(raw_scores):
+    """Clamp raw model outputs to the 0-100 exam range and round to 2 decimals."""
+    return np.round(np.clip(np.asarray(raw_scores, dtype=float), 0, 100), 2)
+
+
+def predict_record(model, features):
+    """Raw (unclamped) prediction for one parsed record.
+
+    Uses the compiled single-row path when the model has one, otherwise builds
+    a one-row frame for the sklearn pipeline.
+    """
+    if hasattr(model, "predict_one"):
+        return float(model.predict_one(features))
+    return float(model.predict(pd.DataFrame({k: [v] for k, v in features.items()}))[0])
+
+
+def predict_frame(model, features):
+    """Raw (unclamped) scores for a prepared frame, one pipeline call."""
+    if features.empty:
+        return np.empty(0)
+    return np.asarray(model.predict(features[FEATURE_COLUMNS]), dtype=float)
+
+
+def score_frame(model, features):
+    """Run the pipeline once over a prepared frame, returning clamped scores."""
+    return clamp_scores(predict_frame(model, features))
+
+
+def iter_csv_chunks(stream, chunksize, compressed=False):
+    """Read a (optionally gzip) CSV stream lazily, ``chunksize`` rows at a time.
+
+    Yields ``(raw, features, errors)`` per chunk, where ``raw.index`` numbers
+    the data rows from 0 across the whole file.
+    """
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+    reader = pd.read_csv(
+        stream,
+        chunksize=chunksize,
+        dtype=str,
+        keep_default_na=False,
+        skipinitialspace=True,
+        index_col=False,
+    )
+    with reader:
+        for raw in reader:
+            features, errors = prepare_frame(raw)
+            yield raw, features, errors
@@ -0,0 +1,338 @@
+# backend/shadow.py
+"""Shadow scoring: candidate models compared with the serving model on live traffic.
+
+The request path only calls ``offer``, which samples the record and appends
+it to an in-memory queue together with the version that served it and its
+raw prediction. Nothing is scored there and nothing waits. A background
+thread drains the queue in batches. Each candidate scores a whole batch
+with one vectorized ``predict``, and the result is folded into fixed-size
+aggregates per candidate:
+
+- count, mean, RMSE and max of the raw prediction delta (candidate minus
+  serving model);
+- the share of records where the two clamped scores agree within
+  ``agree_within`` points, with a histogram of the absolute delta;
+- mean and std of both score distributions, and their population
+  stability index (PSI) over ten 10-point bins, as a measure of drift.
+
+The queue is bounded (``max_queue`` records); when it is full a sample is
+dropped and counted, so memory stays flat however far the worker falls
+behind. Records the candidate itself served (pinned requests) are skipped.
+Candidates are loaded through the model registry by the worker on first
+use, so their load time never lands on a request. A candidate whose file
+changes (hot reload) starts its comparison over.
+"""
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from background import LazyThread
+from scoring import FEATURE_COLUMNS, clamp_scores, predict_frame
+
+# Upper edges of the absolute-delta histogram (score points)
+DELTA_EDGES = (0.1, 0.5, 1, 2, 5, 10, float("inf"))
+# Score bins for the PSI: ten 10-point bins over 0-100
+SCORE_BINS = np.linspace(0, 100, 11)
+# Share floor per bin so an empty bin doesn't make the PSI infinite
+PSI_EPSILON = 1e-4
+# Seconds before loading a candidate that failed to load is tried again
+RETRY_SECONDS = 60
+
+# A queued entry holding many rows of a scored frame
+_FRAME = object()
+
+
+class Comparison:
+    """Running agreement and drift statistics of one candidate against the serving model."""
+
+    def __init__(self, version, signature=None):
+        self.version = version
+        self.signature = signature
+        self.compared = 0
+        self.agreed = 0
+        self.sum_delta = 0.0
+        self.sum_sq_delta = 0.0
+        self.sum_abs_delta = 0.0
+        self.max_abs_delta = 0.0
+        self.moments = np.zeros((2, 2))  # [serving, candidate] x [sum, sum of squares]
+        self.score_hist = np.zeros((2, len(SCORE_BINS) - 1), dtype=np.int64)
+        self.delta_hist = np.zeros(len(DELTA_EDGES), dtype=np.int64)
+        self.errors = 0
+        self.last_error = None
+
+    def add(self, serving_raw, candidate_raw, agree_within):
+        delta = candidate_raw - serving_raw
+        abs_delta = np.abs(delta)
+        scores = np.vstack([clamp_scores(serving_raw), clamp_scores(candidate_raw)])
+        self.compared += len(delta)
+        self.agreed += int(np.count_nonzero(np.abs(scores[1] - scores[0]) <= agree_within))
+        self.sum_delta += float(delta.sum())
+        self.sum_sq_delta += float(delta @ delta)
+        self.sum_abs_delta += float(abs_delta.sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(abs_delta.max()))
+        self.moments += np.column_stack([scores.sum(axis=1), (scores * scores).sum(axis=1)])
+        for row in (0, 1):
+            self.score_hist[row] += np.histogram(scores[row], SCORE_BINS)[0]
+        self.delta_hist += np.bincount(np.searchsorted(DELTA_EDGES, abs_delta), minlength=len(DELTA_EDGES))
+
+    def psi(self):
+        shares = np.maximum(self.score_hist / self.compared, PSI_EPSILON)
+        return float(np.sum((shares[1] - shares[0]) * np.log(shares[1] / shares[0])))
+
+    def report(self, agree_within):
+        report = {
+            "version": self.version,
+            "compared": self.compared,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+        if not self.compared:
+            return report
+        n = self.compared
+        means = self.moments[:, 0] / n
+        stds = np.sqrt(np.maximum(self.moments[:, 1] / n - means ** 2, 0))
+        report.update({
+            "agreement": round(self.agreed / n, 4),
+            "agree_within": agree_within,
+            "mean_delta": round(self.sum_delta / n, 4),
+            "mean_abs_delta": round(self.sum_abs_delta / n, 4),
+            "rmse": round((self.sum_sq_delta / n) ** 0.5, 4),
+            "max_abs_delta": round(self.max_abs_delta, 4),
+            "serving_mean": round(float(means[0]), 2),
+            "serving_std": round(float(stds[0]), 2),
+            "candidate_mean": round(float(means[1]), 2),
+            "candidate_std": round(float(stds[1]), 2),
+            "psi": round(self.psi(), 4),
+            "abs_delta_histogram": {
+                f"<={edge:g}" if edge != float("inf") else f">{DELTA_EDGES[-2]:g}": int(count)
+                for edge, count in zip(DELTA_EDGES, self.delta_hist)
+            },
+        })
+        return report
+
+
+class ShadowScorer:
+    """Sampled queue plus a background thread scoring it with the candidate versions.
+
+    ``resolve(version)`` returns a loaded model entry (``.scorer``,
+    ``.signature``), i.e. ``ModelRegistry.get``. Shadowing is off without
+    candidates or with a zero ``sample_rate``. The worker is a
+    ``LazyThread`` started by the first sample. ``rng`` draws the samples:
+    anything with ``random(size=None)``, such as ``np.random`` (the default,
+    safe to share between threads) or a seeded generator in tests.
+    """
+
+    def __init__(self, resolve, candidates, sample_rate=0.0, max_queue=10000, batch_size=512,
+                 flush_interval=0.5, agree_within=1.0, rng=np.random):
+        self.resolve = resolve
+        self.candidates = tuple(candidates)
+        self.sample_rate = sample_rate
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.agree_within = agree_within
+        self._rng = rng
+        self.comparisons = {version: Comparison(version) for version in self.candidates}
+        self._failed_at = {}  # candidate -> when it last failed to load
+        self._report_lock = threading.Lock()
+        self._queue = deque()
+        self._queued = 0  # rows, counting each frame entry's rows
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._drained = threading.Condition()
+        self._worker = LazyThread(self._run, "shadow-scoring", on_start=self._prepare)
+        self._stopping = False
+        self._flushing = False
+        self.sampled = 0
+        self.dropped = 0
+        self.scored = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.score_seconds = 0.0
+
+    @property
+    def enabled(self):
+        return bool(self.candidates) and self.sample_rate > 0
+
+    # ----- hot path -----
+
+    def offer(self, features, version, raw_prediction):
+        """Maybe queue one scored record; True if it was sampled and queued."""
+        if not self.enabled or self._rng.random() >= self.sample_rate:
+            return False
+        return self._put((features, version, raw_prediction), 1)
+
+    def offer_frame(self, features, version, raw_scores):
+        """Queue a sample of the rows of a scored feature frame; returns how many."""
+        if not self.enabled or not len(features):
+            return 0
+        rows = np.flatnonzero(self._rng.random(len(features)) < self.sample_rate)
+        if not len(rows):
+            return 0
+        if self._put((_FRAME, features.iloc[rows], version, np.asarray(raw_scores)[rows]), len(rows)):
+            return len(rows)
+        return 0
+
+    def _put(self, item, rows):
+        self._worker.ensure_started()
+        with self._lock:
+            if self._queued + rows > self.max_queue:
+                self.dropped += rows
+                return False
+            self._queue.append(item)
+            self._queued += rows
+            self.sampled += rows
+            full = self._queued >= self.batch_size
+        if full:
+            self._wakeup.set()
+        return True
+
+    # ----- worker -----
+
+    def _prepare(self):
+        self._stopping = False
+
+    def _run(self):
+        while True:
+            woken = self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            # Only full batches while samples keep coming: scoring a few
+            # records at a time would cost nearly as much per batch
+            while self._queued >= self.batch_size:
+                self._score_batch()
+            if not woken or self._flushing or self._stopping:
+                while self._queue:
+                    self._score_batch()
+            with self._drained:
+                self._drained.notify_all()
+            if self._stopping and not self._queue:
+                break
+
+    def _take(self):
+        items, rows = [], 0
+        with self._lock:
+            while self._queue and rows < self.batch_size:
+                item = self._queue.popleft()
+                items.append(item)
+                rows += len(item[1]) if item[0] is _FRAME else 1
+        return items, rows
+
+    def _score_batch(self):
+        items, rows = self._take()
+        started = time.perf_counter()
+        try:
+            frame, versions, serving = self._assemble(items)
+            for candidate in self.candidates:
+                self._compare(candidate, frame, versions, serving)
+            self.scored += rows
+            self.batches += 1
+        except Exception as e:
+            # A batch that can't be assembled or compared is lost, the worker is not
+            self.failed_batches += 1
+            print(f"Shadow scoring failed, {rows} records skipped: {e!r}")
+        finally:
+            with self._lock:
+                self._queued -= rows
+            self.score_seconds += time.perf_counter() - started
+
+    @staticmethod
+    def _assemble(items):
+        """One feature frame for the batch, plus each row's serving version and raw prediction."""
+        records = [item for item in items if item[0] is not _FRAME]
+        frames = [item for item in items if item[0] is _FRAME]
+        parts, versions, serving = [], [], []
+        if records:
+            parts.append(pd.DataFrame.from_records([r[0] for r in records], columns=FEATURE_COLUMNS))
+            versions += [r[1] for r in records]
+            serving.append(np.array([r[2] for r in records], dtype=float))
+        for _, features, version, raw in frames:
+            parts.append(features[FEATURE_COLUMNS])
+            versions += [version] * len(features)
+            serving.append(np.asarray(raw, dtype=float))
+        frame = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+        return frame, np.array(versions, dtype=object), np.concatenate(serving)
+
+    def _compare(self, candidate, frame, versions, serving):
+        comparison = self.comparisons[candidate]
+        failed_at = self._failed_at.get(candidate)
+        if failed_at is not None and time.monotonic() - failed_at < RETRY_SECONDS:
+            return
+        try:
+            entry = self.resolve(candidate)
+        except Exception as e:
+            self._failed_at[candidate] = time.monotonic()
+            comparison.errors += 1
+            comparison.last_error = str(e)
+            print(f"Shadow model {candidate} unavailable: {e}")
+            return
+        self._failed_at.pop(candidate, None)
+        if entry.signature != comparison.signature:
+            # New or reloaded artifact: its numbers start from scratch
+            comparison = self.comparisons[candidate] = Comparison(candidate, entry.signature)
+        rows = versions != candidate
+        if not rows.any():
+            return
+        try:
+            scores = predict_frame(entry.scorer, frame if rows.all() else frame[rows])
+        except Exception as e:
+            comparison.errors += 1
+            comparison.last_error = str(e)
+            print(f"Shadow scoring with {candidate} failed for {int(rows.sum())} records: {e}")
+            return
+        with self._report_lock:
+            comparison.add(serving[rows], scores, self.agree_within)
+
+    def flush(self, timeout=5.0):
+        """Wait until everything sampled so far is scored; False on timeout."""
+        if not self._worker.started:
+            return not self._queued
+        self._flushing = True
+        self._wakeup.set()
+        try:
+            with self._drained:
+                return self._drained.wait_for(lambda: not self._queued, timeout)
+        finally:
+            self._flushing = False
+
+    def close(self, timeout=5.0):
+        """Score what is queued and stop the worker thread."""
+        if not self._worker.started:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._worker.join(timeout)
+
+    def reset(self):
+        """Start every comparison over."""
+        self.comparisons = {version: Comparison(version) for version in self.candidates}
+
+    # ----- reporting -----
+
+    def report(self):
+        """Agreement and drift per candidate, plus the queue counters."""
+        with self._report_lock:
+            models = [self.comparisons[c].report(self.agree_within) for c in self.candidates]
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "queue": self.stats(),
+            "models": models,
+        }
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "candidates": len(self.candidates),
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "scored": self.scored,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "queued": self._queued,
+            "max_queue": self.max_queue,
+            "score_seconds": round(self.score_seconds, 4),
+        }
@@ -0,0 +1,166 @@
+# backend/static_assets.py
+"""In-memory manifest of the frontend files with precompressed variants.
+
+Every file under the frontend directory is read once, hashed (SHA-256) and,
+when it is text-like and compresses well, gzip- and brotli-compressed ahead
+of time, so serving an asset is a dict lookup plus a header check instead of
+filesystem calls and per-request compression. brotli is optional.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Directories never served (and never scanned)
+EXCLUDED_DIRS = {"node_modules", "__pycache__", "__tests__", ".next", ".git"}
+
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+    "text/javascript",
+}
+
+# Files smaller than this aren't worth a compressed variant
+MIN_COMPRESS_SIZE = 256
+
+# "app.3f9a1c2b.js", "main-3f9a1c2b7d.css": fingerprinted files never change
+HASHED_NAME = re.compile(r"[.-][0-9a-f]{8,}\.[A-Za-z0-9]+$")
+
+
+class Asset:
+    """One file: its bytes per content-coding plus the headers that describe it."""
+
+    def __init__(self, path, data, mimetype, mtime):
+        self.path = path
+        self.mimetype = mimetype
+        self.mtime = mtime
+        self.digest = hashlib.sha256(data).hexdigest()
+        self.hashed_name = bool(HASHED_NAME.search(path))
+        self.variants = {"identity": data}
+        if len(data) >= MIN_COMPRESS_SIZE and _compressible(mimetype):
+            self._add_variant("gzip", gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                self._add_variant("br", brotli.compress(data, quality=11))
+
+    def _add_variant(self, encoding, body):
+        # Keep it only if it actually saves bytes
+        if len(body) < len(self.variants["identity"]) * 0.9:
+            self.variants[encoding] = body
+
+    def etag(self, encoding="identity"):
+        # Strong validators must differ per representation, so include the coding
+        tag = self.digest[:20]
+        return tag if encoding == "identity" else f"{tag}-{encoding}"
+
+    @property
+    def etags(self):
+        return {self.etag(encoding) for encoding in self.variants}
+
+
+def _compressible(mimetype):
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+class AssetManifest:
+    """Path -> Asset for everything under ``root``, built lazily on first use.
+
+    ``reload()`` rebuilds it; ``reload_if_changed()`` does so only when a
+    file was added, removed or modified, and checks at most every
+    ``check_interval`` seconds (for development auto-reload).
+    """
+
+    def __init__(self, root, max_file_size=5 * 1024 * 1024, check_interval=1.0):
+        self.root = root
+        self.max_file_size = max_file_size
+        self.check_interval = check_interval
+        self._assets = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.build_seconds = 0.0
+
+    def _scan(self):
+        """``{relative path: (full path, mtime_ns, size)}`` for every servable file."""
+        files = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS and not d.startswith(".")]
+            for name in filenames:
+                if name.startswith("."):
+                    continue
+                full = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(full)
+                except OSError:
+                    continue
+                if stat.st_size <= self.max_file_size:
+                    rel = os.path.relpath(full, self.root).replace(os.sep, "/")
+                    files[rel] = (full, stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def load(self):
+        """Build the manifest now if it hasn't been built yet."""
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    self._build(self._scan())
+        return self._assets
+
+    def _build(self, files):
+        started = time.perf_counter()
+        assets = {}
+        for rel, (full, mtime_ns, _size) in files.items():
+            try:
+                with open(full, "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            mimetype = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+            assets[rel] = Asset(rel, data, mimetype, mtime_ns / 1e9)
+        self._assets = assets
+        self._signature = {rel: meta[1:] for rel, meta in files.items()}
+        self.builds += 1
+        self.build_seconds = time.perf_counter() - started
+
+    def reload(self):
+        with self._lock:
+            self._build(self._scan())
+        return self._assets
+
+    def reload_if_changed(self):
+        """Rebuild when the files on disk differ from the manifest (throttled)."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        files = self._scan()
+        if {rel: meta[1:] for rel, meta in files.items()} == self._signature:
+            return False
+        with self._lock:
+            self._build(files)
+        return True
+
+    def get(self, path):
+        return self.load().get(path)
+
+    def stats(self):
+        assets = self._assets or {}
+        return {
+            "files": len(assets),
+            "bytes": sum(len(a.variants["identity"]) for a in assets.values()),
+            "gzip_variants": sum("gzip" in a.variants for a in assets.values()),
+            "br_variants": sum("br" in a.variants for a in assets.values()),
+            "builds": self.builds,
+            "build_seconds": round(self.build_seconds, 4),
+        }
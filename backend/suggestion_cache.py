@@ -0,0 +1,126 @@
+# backend/suggestion_cache.py
+"""Persistent cache of Gemini suggestions keyed on a bucketed student profile.
+
+Advice for 5.4 vs 5.5 study hours (same categoricals, similar score) is the
+same advice, so profiles are snapped to coarse bins before lookup. Entries
+live in a small SQLite file so they survive restarts.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from scoring import CATEGORICAL_FIELDS, normalize_str
+
+# Bin width per numeric field; values are snapped to the nearest bin centre
+NUMERIC_BINS = {
+    "age": 1,
+    "study_hours_per_day": 0.5,
+    "social_media_hours": 0.5,
+    "attendance_percentage": 5,
+    "sleep_hours": 0.5,
+    "exercise_frequency": 1,
+}
+SCORE_BIN = 5
+
+
+def _snap(value, width):
+    return int(math.floor(float(value) / width + 0.5))
+
+
+def profile_key(form_data, prediction):
+    """Bucketed cache key for a raw form/JSON submission, or None if it can't be binned."""
+    try:
+        parts = [f"{field}={_snap(form_data.get(field), width)}" for field, width in NUMERIC_BINS.items()]
+        parts.append(f"score={_snap(prediction, SCORE_BIN)}")
+    except (TypeError, ValueError):
+        return None
+    parts.extend(f"{field}={normalize_str(form_data.get(field))}" for field in CATEGORICAL_FIELDS)
+    return "|".join(parts)
+
+
+class SuggestionStore:
+    """SQLite-backed ``profile key -> suggestions`` store with hit/miss counters.
+
+    The database is opened lazily on first use; an empty ``path`` disables the store.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS suggestions ("
+                " key TEXT PRIMARY KEY, suggestions TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        if not self.enabled or key is None:
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT suggestions, created_at FROM suggestions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl and row[1] + self.ttl < time.time()):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key, suggestions):
+        if not self.enabled or key is None or not suggestions:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO suggestions (key, suggestions, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(suggestions), time.time()),
+            )
+            conn.commit()
+            self.writes += 1
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM suggestions")
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,112 @@
+# backend/suggestion_jobs.py
+"""Background generation of suggestions so /api/predict can answer immediately."""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+
+class SuggestionJobs:
+    """Bounded worker pool plus a table of job results that expire after ``ttl`` seconds.
+
+    ``submit`` refuses new work (returns None) once ``max_pending`` jobs are
+    queued or running, so a slow LLM can't grow the backlog without bound.
+    The pool threads are only started on first submit.
+    """
+
+    def __init__(self, workers, max_pending, ttl, clock=time.monotonic):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._clock = clock
+        self._executor = None
+        self._jobs = {}  # id -> {"status", "result", "error", "finished_at"}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+
+    def _purge(self):
+        cutoff = self._clock() - self.ttl
+        stale = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] != PENDING and job["finished_at"] <= cutoff
+        ]
+        for job_id in stale:
+            del self._jobs[job_id]
+        self.expired += len(stale)
+
+    def submit(self, fn, *args, on_done=None):
+        """Run ``fn(*args)`` in the background; returns the job id or None if full.
+
+        ``on_done(result)`` is called from the worker after a successful run.
+        """
+        with self._lock:
+            self._purge()
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="suggestions"
+                )
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {"status": PENDING, "result": None, "error": None, "finished_at": None}
+            self._pending += 1
+            self.submitted += 1
+        self._executor.submit(self._run, job_id, fn, args, on_done)
+        return job_id
+
+    def _run(self, job_id, fn, args, on_done):
+        status, result, error = READY, None, None
+        try:
+            result = fn(*args)
+            if result is None:
+                status, error = FAILED, "Suggestion generation failed"
+            elif on_done is not None:
+                on_done(result)
+        except Exception as e:
+            status, error = FAILED, str(e)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(status=status, result=result, error=error, finished_at=self._clock())
+            self._pending -= 1
+            if status == READY:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def get(self, job_id):
+        """Snapshot of a job (status/result/error), or None if unknown or expired."""
+        with self._lock:
+            self._purge()
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "stored": len(self._jobs),
+                "max_pending": self.max_pending,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "expired": self.expired,
+            }
@@ -0,0 +1,242 @@
+# backend/suggestion_rules.py
+"""Basic suggestions ranked by what the loaded model expects each change to gain.
+
+Each ``Rule`` proposes one change a student controls (study two more hours,
+sleep 7.5 hours, eat well ...). ``SuggestionRanker`` prices every rule for a
+whole cohort at once: the model is linear, so a change's expected gain is
+the difference between the field's contribution at the target and at the
+current value, one vectorized expression per rule. The top ``k`` rules by
+gain are kept per row, and only those are formatted into text.
+"""
+
+import numpy as np
+
+from feature_schema import normalize_str
+
+
+class Rule:
+    """One actionable change to a single input field.
+
+    Numeric rules move the value by ``change``, then at least to ``at_least``
+    and at most to ``at_most``, never against the direction of the change.
+    Categorical rules propose ``category``. ``message`` is formatted with
+    ``current`` and ``target``.
+
+    An ``unpriced`` rule covers harm the linear model can't see (it only
+    ever rewards more sleep, say): it is suggested whenever it applies,
+    ranks as zero gain and shows no points.
+    """
+
+    def __init__(self, field, message, change=0, at_least=None, at_most=None, category=None,
+                 unpriced=False):
+        self.field = field
+        self.message = message
+        self.change = change
+        self.at_least = at_least
+        self.at_most = at_most
+        self.category = category
+        self.unpriced = unpriced
+
+    @property
+    def categorical(self):
+        return self.category is not None
+
+    def target(self, current, maximum=max, minimum=min):
+        """Proposed value; pass ``np.maximum``/``np.minimum`` for an array of values."""
+        target = current + self.change
+        if self.at_least is not None:
+            target = maximum(target, self.at_least)
+        if self.at_most is not None:
+            target = minimum(target, self.at_most)
+        return minimum(target, current) if self.change < 0 else maximum(target, current)
+
+
+# The changes a student can act on; demographics and background are left out
+RULES = [
+    Rule("study_hours_per_day",
+         "Increase your daily study hours from {current:g} to {target:g} and keep them consistent.",
+         change=2, at_most=8),
+    Rule("attendance_percentage",
+         "Improve your attendance from {current:g}% to {target:g}% to stay on track with coursework.",
+         change=10, at_least=90, at_most=100),
+    Rule("social_media_hours",
+         "Reduce social media usage from {current:g} to {target:g} hours a day to free up study time.",
+         change=-2, at_least=1),
+    Rule("sleep_hours",
+         "Get {target:g} hours of sleep instead of {current:g}; a consistent sleep schedule helps focus.",
+         at_least=7.5, at_most=9),
+    # change=-inf: straight down to at_least, the top of the healthy band
+    Rule("sleep_hours",
+         "Cut back from {current:g} to {target:g} hours of sleep; oversleeping can leave you groggy.",
+         change=-float("inf"), at_least=9, unpriced=True),
+    Rule("exercise_frequency",
+         "Exercise {target:g} times a week instead of {current:g} to improve focus and reduce stress.",
+         change=2, at_most=5),
+    Rule("diet_quality", "Move towards a good-quality diet.", category="Good"),
+    Rule("part_time_job", "Cut back on part-time work to make room for studying.", category="No"),
+    Rule("extracurricular_participation", "Join an extracurricular activity.", category="Yes"),
+]
+
+# Opening line by predicted score band (low, medium, high)
+SCORE_BANDS = (
+    (60, "Focus on improving your study habits; the changes below are ranked by how much they are expected to help."),
+    (80, "Maintain consistent study hours and a structured study schedule, and build on them with the changes below."),
+    (float("inf"), "Continue maintaining your excellent study habits and academic performance."),
+)
+
+
+def headline(prediction):
+    for upper, text in SCORE_BANDS:
+        if prediction < upper:
+            return text
+
+
+class SuggestionRanker:
+    """Top-k rules per student by expected score gain under ``model``.
+
+    ``model`` needs ``contributions(field, values)`` (the compiled linear
+    model). Without one, rules keep their listed order and no gain is shown.
+    Changes expected to gain less than ``min_gain`` points are not suggested.
+
+    ``suggest`` ranks a whole cohort with array operations; ``suggest_one``
+    is the same ranking for a single record in plain Python, which is
+    cheaper than building one-row arrays.
+    """
+
+    def __init__(self, model=None, rules=RULES, min_gain=0.25):
+        self.model = model if hasattr(model, "contributions") else None
+        self.rules = rules
+        self.min_gain = min_gain
+        # Points per unit for numeric fields, the target's contribution for categorical ones
+        self._slopes = []
+        # field -> {category: contribution}, filled on first use by suggest_one
+        self._contributions = {rule.field: {} for rule in rules if rule.categorical}
+        for rule in rules:
+            if self.model is None:
+                self._slopes.append(None)
+            elif rule.categorical:
+                self._slopes.append(float(self.model.contributions(rule.field, [rule.category])[0]))
+            else:
+                self._slopes.append(float(self.model.contributions(rule.field, [1.0])[0]))
+
+    def gains(self, columns):
+        """``(gains, targets)``: an ``(n_rows, n_rules)`` gain matrix (-inf where a
+        rule doesn't apply or gains too little) and each rule's proposed values."""
+        n = len(next(iter(columns.values())))
+        gains = np.full((n, len(self.rules)), -np.inf)
+        targets = []
+        for j, (rule, slope) in enumerate(zip(self.rules, self._slopes)):
+            current = columns.get(rule.field)
+            if current is None:
+                targets.append(None)
+                continue
+            if rule.categorical:
+                proposed = np.full(n, rule.category, dtype=object)
+                applicable = (current != proposed) & np.array([v is not None for v in current], dtype=bool)
+            else:
+                proposed = rule.target(current, np.maximum, np.minimum)
+                applicable = ~np.isnan(current) & (proposed != current)
+            targets.append(proposed)
+            if self.model is None or rule.unpriced:
+                gains[applicable, j] = 0.0
+                continue
+            if rule.categorical:
+                # Only known values are looked up (strict encoders reject the rest)
+                gain = np.zeros(n)
+                if applicable.any():
+                    gain[applicable] = slope - self.model.contributions(rule.field, current[applicable])
+            else:
+                gain = slope * (proposed - current)
+            gains[:, j] = np.where(applicable & (gain >= self.min_gain), gain, -np.inf)
+        return gains, targets
+
+    def suggest(self, columns, k=4):
+        """Suggestion texts per row, best first (no score-band headline)."""
+        gains, targets = self.gains(columns)
+        # Stable sort keeps the listed order among equal gains
+        order = np.argsort(-gains, axis=1, kind="stable")[:, :min(k, len(self.rules))]
+        picked = np.take_along_axis(gains, order, axis=1)
+        results = []
+        for i in range(len(order)):
+            row = []
+            for j, gain in zip(order[i].tolist(), picked[i].tolist()):
+                if gain == -np.inf:
+                    break
+                row.append(self._format(self.rules[j], columns[self.rules[j].field][i], targets[j][i], gain))
+            results.append(row)
+        return results
+
+    def suggest_one(self, record, k=4):
+        """``suggest`` for one raw record (JSON, form or decoded)."""
+        ranked = []
+        for j, (rule, slope) in enumerate(zip(self.rules, self._slopes)):
+            value = record.get(rule.field)
+            if value is None or value == "":
+                continue
+            if rule.categorical:
+                current = normalize_str(value)
+                target = rule.category
+                if current == target:
+                    continue
+                gain = 0.0 if slope is None else slope - self._contribution(rule.field, current)
+            else:
+                current = _to_float(value)
+                if current != current:  # NaN
+                    continue
+                target = rule.target(current)
+                if target == current:
+                    continue
+                gain = 0.0 if slope is None or rule.unpriced else slope * (target - current)
+            if slope is None or rule.unpriced or gain >= self.min_gain:
+                ranked.append((-gain, j, current, target))
+        ranked.sort()
+        return [self._format(self.rules[j], current, target, -gain) for gain, j, current, target in ranked[:k]]
+
+    def _contribution(self, field, category):
+        known = self._contributions[field]
+        value = known.get(category)
+        if value is None:
+            value = float(self.model.contributions(field, [category])[0])
+            # Bounded: arbitrary unknown strings are looked up but not remembered
+            if len(known) < 64:
+                known[category] = value
+        return value
+
+    def _format(self, rule, current, target, gain):
+        text = rule.message.format(current=current, target=target)
+        if self.model is not None and not rule.unpriced:
+            text = f"{text[:-1]} (about +{gain:.1f} points predicted)."
+        return text
+
+
+def columns_from_records(records, rules=RULES):
+    """Rule input columns from raw records (JSON, form or decoded); blanks become NaN / None."""
+    columns = {}
+    for field, categorical in {r.field: r.categorical for r in rules}.items():
+        values = [record.get(field) for record in records]
+        if categorical:
+            columns[field] = np.array([normalize_str(v) if v not in (None, "") else None for v in values],
+                                      dtype=object)
+        else:
+            columns[field] = np.array([_to_float(v) for v in values], dtype=float)
+    return columns
+
+
+def columns_from_frame(frame, rules=RULES):
+    """Rule input columns from a prepared feature frame (``scoring.prepare_frame``)."""
+    columns = {}
+    for rule in rules:
+        if rule.field in frame:
+            values = frame[rule.field]
+            if rule.categorical:
+                columns[rule.field] = values.astype(object).where(values.notna(), None).to_numpy()
+            else:
+                columns[rule.field] = values.to_numpy(dtype=float)
+    return columns
+
+
+def _to_float(value):
+    try:
+        return float(value) if value not in (None, "") else np.nan
+    except (TypeError, ValueError):
+        return np.nan
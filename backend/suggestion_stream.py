@@ -0,0 +1,70 @@
+# backend/suggestion_stream.py
+"""Incremental parsing of Gemini's suggestion list, and Server-Sent Events framing.
+
+``SuggestionParser`` is fed the answer in arbitrary chunks and returns each
+suggestion as soon as its line is complete. The cleanup rules:
+
+- Numbered or bulleted lines lose their markers.
+- If the answer has no such line, every non-empty line is a suggestion.
+- At most ``limit`` suggestions are returned.
+
+These rules are exactly the ones ``parse_suggestions`` applied to the whole
+answer, and ``parse_suggestions`` now uses this parser. Plain lines can only
+be returned once the answer has ended, because a bulleted line arriving later
+would discard them.
+"""
+
+import json
+
+# Characters stripped from the start of a numbered or bulleted line
+MARKERS = "0123456789.-) "
+
+
+class SuggestionParser:
+    def __init__(self, limit=5):
+        self.limit = limit
+        self.count = 0
+        self._partial = ""
+        self._plain = []  # used only if no bulleted line ever comes
+        self._bulleted = False
+
+    def feed(self, text):
+        """Suggestions completed by the next chunk of the answer."""
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        return self._take(lines)
+
+    def close(self):
+        """Suggestions left once the answer has ended."""
+        suggestions = self._take([self._partial])
+        self._partial = ""
+        if not self._bulleted:
+            rest = self._plain[:self.limit - self.count]
+            self.count += len(rest)
+            suggestions += rest
+            self._plain = []
+        return suggestions
+
+    def _take(self, lines):
+        suggestions = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line[0].isdigit() or line.startswith('•') or line.startswith('-'):
+                suggestion = line.lstrip(MARKERS).strip()
+                if suggestion:
+                    self._bulleted = True
+                    self._plain = []
+                    if self.count < self.limit:
+                        suggestions.append(suggestion)
+                        self.count += 1
+                    continue
+            if not self._bulleted and len(self._plain) < self.limit:
+                self._plain.append(line)
+        return suggestions
+
+
+def sse_event(event, data):
+    """One Server-Sent Events message with ``data`` as JSON."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
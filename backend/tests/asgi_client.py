@@ -0,0 +1,86 @@
+"""
+In-process test client for an ASGI app with the Flask test client's interface.
+
+Requests are built with werkzeug's ``EnvironBuilder`` (so ``json=``,
+``data=``, ``content_type=``, ``headers=`` and ``query_string=`` work as in
+Flask tests), sent through the ASGI app on an event loop, and answered with
+a Flask ``Response``. ``request`` is the coroutine behind it, for driving
+many requests concurrently on one loop.
+"""
+
+import asyncio
+
+from flask import Response
+from werkzeug.test import EnvironBuilder
+
+
+class ASGITestClient:
+    def __init__(self, app):
+        self.app = app
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    async def request(self, path, method="GET", **kwargs):
+        builder = EnvironBuilder(path=path, method=method, **kwargs)
+        try:
+            environ = builder.get_environ()
+            body = environ["wsgi.input"].read()
+        finally:
+            builder.close()
+        headers = [
+            (name[5:].replace("_", "-").lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in environ.items() if name.startswith("HTTP_")
+        ]
+        if environ.get("CONTENT_TYPE"):
+            headers.append((b"content-type", environ["CONTENT_TYPE"].encode("latin-1")))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": environ["REQUEST_METHOD"],
+            "scheme": "http",
+            "path": builder.path,
+            "query_string": environ["QUERY_STRING"].encode("latin-1"),
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("localhost", 80),
+        }
+        received = []
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            received.append(message)
+
+        await self.app(scope, receive, send)
+        start = next(m for m in received if m["type"] == "http.response.start")
+        data = b"".join(m.get("body", b"") for m in received if m["type"] == "http.response.body")
+        headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in start["headers"]]
+        return Response(data, status=start["status"], headers=headers)
+
+    def open(self, path, method="GET", **kwargs):
+        return asyncio.run(self.request(path, method, **kwargs))
+
+    def get(self, path, **kwargs):
+        return self.open(path, "GET", **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.open(path, "POST", **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.open(path, "DELETE", **kwargs)
+
+    def head(self, path, **kwargs):
+        return self.open(path, "HEAD", **kwargs)
+
+    def options(self, path, **kwargs):
+        return self.open(path, "OPTIONS", **kwargs)
@@ -0,0 +1,85 @@
+"""
+Shared fixtures for the backend tests.
+"""
+
+import importlib
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+import asgi
+from suggestion_cache import SuggestionStore
+from tests.asgi_client import ASGITestClient
+from tests.fake_gemini import FakeGemini
+
+_ABSENT = object()
+
+
+class FakeClock:
+    """A clock for code that takes ``clock=``: returns ``now``, which the test sets."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def hide_module():
+    """``hide_module(name, *modules)``: run the test as if ``name`` were not installed.
+
+    ``import name`` raises ImportError until the test ends, and each of
+    ``modules`` is imported again so it takes its fallback path. The
+    reloaded modules are returned; they are reloaded once more afterwards.
+    """
+    hidden, reloaded = {}, []
+
+    def hide(name, *modules):
+        hidden.setdefault(name, sys.modules.get(name, _ABSENT))
+        sys.modules[name] = None
+        reloaded.extend(modules)
+        return [importlib.reload(module) for module in modules]
+
+    yield hide
+    for name, module in hidden.items():
+        if module is _ABSENT:
+            del sys.modules[name]
+        else:
+            sys.modules[name] = module
+    for module in reloaded:
+        importlib.reload(module)
+
+
+@pytest.fixture
+def gemini_app(monkeypatch):
+    """The app set up as if Gemini were configured, answered by a ``FakeGemini`` (yielded).
+
+    Suggestions are cached in memory only, ``ADMIN_TOKEN`` is ``"secret"``
+    and the prediction cache is emptied before and after the test. Tests
+    that need another fake or store patch over these.
+    """
+    fake = FakeGemini()
+    monkeypatch.setattr(app_module, "GEMINI_API_KEY", "test-key")
+    monkeypatch.setattr(app_module, "_gemini_model", fake)
+    monkeypatch.setattr(app_module, "suggestion_store", SuggestionStore("", 60))
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+    app_module.prediction_cache.clear()
+    yield fake
+    app_module.prediction_cache.clear()
+
+
+@pytest.fixture(params=["wsgi", "asgi"])
+def api_client(request, gemini_app):
+    """A client for ``gemini_app``: the test runs once against Flask and once against asgi.py."""
+    return ASGITestClient(asgi.app) if request.param == "asgi" else app_module.app.test_client()
@@ -0,0 +1,78 @@
+"""
+Local stand-in for google.generativeai.GenerativeModel.
+
+Mimics the parts of the client the backend uses (``generate_content`` and
+``generate_content_async`` returning an object with ``.text``, or with
+``stream=True`` an iterator of such chunks) with configurable latency,
+failures and blocking, so tests and benchmarks never need network access
+or an API key.
+"""
+
+import asyncio
+import threading
+import time
+
+DEFAULT_TEXT = "1. Study more.\n2. Sleep 8 hours.\n3. Attend every class."
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGemini:
+    """Configurable fake Gemini model.
+
+    ``delay`` sleeps before answering, ``error`` (an exception instance) is
+    raised instead of answering, and ``gate`` (a threading.Event) blocks each
+    call until it is set. Streamed answers come in ``chunk_size``-character
+    chunks with ``delay`` spread evenly over them, like a model generating
+    at a steady rate; ``error_after`` chunks are sent before ``error``.
+    """
+
+    def __init__(self, text=DEFAULT_TEXT, delay=0.0, error=None, gate=None, chunk_size=16, error_after=0):
+        self.text = text
+        self.delay = delay
+        self.error = error
+        self.gate = gate
+        self.chunk_size = chunk_size
+        self.error_after = error_after
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if stream:
+            return self._stream()
+        if self.gate is not None:
+            self.gate.wait(10)
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return FakeResponse(self.text)
+
+    def _stream(self):
+        if self.gate is not None:
+            self.gate.wait(10)
+        chunks = [self.text[i:i + self.chunk_size] for i in range(0, len(self.text), self.chunk_size)]
+        for index, chunk in enumerate(chunks):
+            if self.error is not None and index == self.error_after:
+                raise self.error
+            if self.delay:
+                time.sleep(self.delay / len(chunks))
+            yield FakeResponse(chunk)
+        if self.error is not None:
+            raise self.error
+
+    async def generate_content_async(self, prompt, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.gate is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.gate.wait, 10)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return FakeResponse(self.text)
@@ -0,0 +1,16 @@
+"""
+Valid student records shared by the tests and benchmarks.
+"""
+
+import app as app_module
+
+STUDENT = dict(app_module.WARMUP_RECORD)
+
+
+def student(i):
+    """The ``i``-th of 700 distinct records (age and study hours vary), repeating after that."""
+    return dict(STUDENT, age=18 + i % 7, study_hours_per_day=round(1 + (i % 700) * 0.01, 2))
+
+
+def students(n):
+    return [student(i) for i in range(n)]
@@ -0,0 +1,126 @@
+"""
+Tests for admission control and the degradation ladder on /api/predict.
+"""
+
+import pytest
+
+import app as app_module
+from admission import BASIC, FULL, PREDICTION_ONLY, AdmissionController, Rejected, TokenBuckets
+from tests.samples import STUDENT, student
+
+
+class TestTokenBuckets:
+    """Test per-client rate limiting."""
+
+    def test_burst_then_steady_rate_per_client(self, clock):
+        buckets = TokenBuckets(rate=2, burst=3, clock=clock)
+        assert [buckets.take("a") for _ in range(3)] == [0, 0, 0]
+        assert buckets.take("a") == pytest.approx(0.5)
+        assert buckets.take("b") == 0
+        clock.now = 0.5
+        assert buckets.take("a") == 0 and buckets.take("a") > 0
+
+    def test_idle_clients_are_pruned(self, clock):
+        buckets = TokenBuckets(rate=1, burst=2, max_clients=10, clock=clock)
+        for i in range(10):
+            buckets.take(i)
+        clock.now = 5
+        buckets.take("new")
+        assert len(buckets) == 1
+
+
+class TestAdmissionController:
+    """Test the in-flight cap and the ladder's thresholds and hysteresis."""
+
+    def test_in_flight_cap_sheds_with_503(self):
+        controller = AdmissionController(max_in_flight=2)
+        controller.admit("a")
+        controller.admit("a")
+        with pytest.raises(Rejected) as e:
+            controller.admit("a")
+        assert (e.value.status, e.value.retry_after) == (503, 1)
+        controller.release(0.01)
+        assert controller.admit("a") == FULL
+        assert controller.stats()["overloaded"] == controller.stats()["shed"] == 1
+
+    def test_ladder_climbs_at_once_and_recovers_one_step_at_a_time(self, clock):
+        controller = AdmissionController(in_flight_thresholds=(4, 8), recover_seconds=10, clock=clock)
+        levels = [controller.admit("a") for _ in range(9)]
+        assert levels[:3] == [FULL] * 3 and levels[3] == BASIC and levels[7:] == [PREDICTION_ONLY] * 2
+
+        # Between the recovery and entry thresholds: stays put however long it takes
+        for _ in range(4):
+            controller.release(0.01)
+        clock.now = 60
+        controller.release(0.01)
+        assert controller.level == PREDICTION_ONLY
+
+        # Below half the thresholds (< 2 in flight) for recover_seconds: one step per period
+        for _ in range(3):
+            controller.release(0.01)
+        assert controller.level == PREDICTION_ONLY
+        clock.now = 75
+        controller.admit("a")
+        assert controller.level == BASIC
+        clock.now = 80
+        controller.release(0.01)
+        assert controller.level == BASIC
+        clock.now = 86
+        controller.release(0.01)
+        assert controller.level == FULL
+        stats = controller.stats()
+        assert stats["level_changes"] == 4 and stats["degraded_prediction_only"] == 2
+
+    def test_latency_threshold(self, clock):
+        controller = AdmissionController(latency_thresholds=(1.0, 0), recover_seconds=5, clock=clock)
+        controller.admit("a")
+        controller.release(3.0)
+        assert controller.admit("a") == BASIC
+        for _ in range(20):
+            controller.release(0.01)
+            controller.admit("a")
+        assert controller.level == BASIC
+        clock.now = 6
+        controller.release(0.01)
+        assert controller.level == FULL and controller.stats()["latency_ms"] < 500
+
+
+class TestPredictAdmission:
+    """Test shedding and degraded responses on /api/predict (both servers)."""
+
+    def test_rate_limit_per_client(self, api_client, monkeypatch):
+        monkeypatch.setattr(app_module, "admission", AdmissionController(rate=0.1, burst=2))
+        monkeypatch.setattr(app_module, "ADMISSION_CLIENT_HEADER", "X-Forwarded-For")
+        one = {"X-Forwarded-For": "10.0.0.1, 172.16.0.1"}
+        assert [api_client.post("/api/predict", json=student(i), headers=one).status_code
+                for i in range(2)] == [200, 200]
+        limited = api_client.post("/api/predict", json=student(3), headers=one)
+        assert limited.status_code == 429 and 1 < int(limited.headers["Retry-After"]) <= 10
+        assert limited.get_json() == {"success": False, "error": "Rate limit exceeded"}
+        other = api_client.post("/api/predict", json=student(3), headers={"X-Forwarded-For": "10.0.0.2"})
+        assert other.status_code == 200
+        assert api_client.get("/api/stats").get_json()["admission"]["rate_limited"] == 1
+
+    @pytest.mark.parametrize("level", [BASIC, PREDICTION_ONLY])
+    def test_degraded_levels_skip_gemini(self, api_client, gemini_app, monkeypatch, level):
+        controller = AdmissionController(in_flight_thresholds=(1, 1 if level == PREDICTION_ONLY else 0))
+        monkeypatch.setattr(app_module, "admission", controller)
+        data = api_client.post("/api/predict", json=STUDENT).get_json()
+        expected = app_module.generate_basic_suggestions(STUDENT, data["prediction"]) if level == BASIC else []
+        assert data["suggestions"] == expected
+        assert data["service_level"] == ("basic" if level == BASIC else "prediction_only")
+        assert gemini_app.calls == 0
+        # Degraded answers are not cached: once load is gone Gemini is used again
+        monkeypatch.setattr(app_module, "admission", AdmissionController())
+        recovered = api_client.post("/api/predict", json=STUDENT).get_json()
+        assert recovered["suggestions"] == ["Study more.", "Sleep 8 hours.", "Attend every class."]
+        assert "service_level" not in recovered and gemini_app.calls == 1
+
+    def test_in_flight_cap(self, api_client, monkeypatch):
+        controller = AdmissionController(max_in_flight=1)
+        monkeypatch.setattr(app_module, "admission", controller)
+        controller.admit("someone else")
+        overloaded = api_client.post("/api/predict", json=STUDENT)
+        assert overloaded.status_code == 503 and overloaded.headers["Retry-After"] == "1"
+        controller.release(0.01)
+        assert controller.stats()["in_flight"] == 0
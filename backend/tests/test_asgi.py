@@ -0,0 +1,208 @@
+"""
+Tests for the ASGI entry point (asgi.py).
+
+The shared API behaviour is covered by running tests/test_integration.py
+against both servers; these tests cover what only the ASGI side does:
+awaited Gemini calls, delegation to Flask, static files and lifespan.
+"""
+
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import app as app_module
+import asgi
+from model_registry import ModelRegistry
+from resilience import AsyncGuardedCall, BulkheadFull, DeadlineExceeded
+from suggestion_cache import SuggestionStore
+from tests.asgi_client import ASGITestClient
+from tests.samples import STUDENT, student, students
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def client(gemini_app, monkeypatch):
+    monkeypatch.setattr(app_module, "gemini_async_guard", AsyncGuardedCall(
+        timeout=2, max_concurrent=1000, failure_threshold=3, reset_timeout=60))
+    return ASGITestClient(asgi.app)
+
+
+class TestAsyncSuggestions:
+    """Test Gemini calls are awaited on the loop, not run on threads."""
+
+    def test_gemini_suggestions(self, client, gemini_app):
+        gemini_app.text = "1. Read daily.\n- Sleep more."
+        data = client.post('/api/predict', json=STUDENT).get_json()
+        assert data["success"] and data["suggestions"] == ["Read daily.", "Sleep more."]
+        assert app_module.gemini_async_guard.stats()["successes"] == 1
+
+    def test_concurrent_slow_calls_hold_no_threads(self, client, gemini_app):
+        gemini_app.delay = 0.3
+        threads = []
+
+        async def run():
+            async def one(student):
+                return await client.request('/api/predict', "POST", json=student)
+
+            tasks = [asyncio.ensure_future(one(s)) for s in students(500)]
+            await asyncio.sleep(0.15)
+            threads.append(threading.active_count())
+            return await asyncio.gather(*tasks)
+
+        responses = asyncio.run(run())
+        assert gemini_app.calls == 500
+        assert all(r.get_json()["suggestions"] == ["Study more.", "Sleep 8 hours.", "Attend every class."]
+                   for r in responses)
+        # All 500 calls were in flight at once without a thread each
+        assert threads[0] < 50
+
+    def test_slow_gemini_falls_back(self, client, gemini_app, monkeypatch):
+        gemini_app.delay = 1
+        monkeypatch.setattr(app_module, "gemini_async_guard", AsyncGuardedCall(
+            timeout=0.05, max_concurrent=10, failure_threshold=3, reset_timeout=60))
+        data = client.post('/api/predict', json=STUDENT).get_json()
+        assert data["suggestions"] == app_module.generate_basic_suggestions(STUDENT, data["prediction"])
+        assert app_module.gemini_async_guard.stats()["timeouts"] == 1
+        # The fallback isn't cached: once Gemini is healthy the same request gets its answer
+        gemini_app.delay = 0
+        again = client.post('/api/predict', json=STUDENT).get_json()
+        assert again["suggestions"] == ["Study more.", "Sleep 8 hours.", "Attend every class."]
+        assert gemini_app.calls == 2
+
+
+    def test_gemini_client_is_created_off_the_event_loop(self, client, gemini_app, monkeypatch):
+        threads = []
+
+        def get_gemini_model():
+            threads.append(threading.current_thread())
+            return gemini_app
+
+        monkeypatch.setattr(app_module, "_gemini_model", None)
+        monkeypatch.setattr(app_module, "get_gemini_model", get_gemini_model)
+        data = client.post('/api/predict', json=STUDENT).get_json()
+        assert data["suggestions"] == ["Study more.", "Sleep 8 hours.", "Attend every class."]
+        assert threads and threading.main_thread() not in threads
+
+
+class TestAsyncGuardedCall:
+    """Test the deadline and concurrency cap for awaited calls."""
+
+    def test_deadline_and_bulkhead(self):
+        guard = AsyncGuardedCall(timeout=0.05, max_concurrent=1, failure_threshold=5, reset_timeout=60)
+
+        async def run():
+            slow = asyncio.ensure_future(guard.call(asyncio.sleep, 1))
+            await asyncio.sleep(0)
+            with pytest.raises(BulkheadFull):
+                await guard.call(asyncio.sleep, 0)
+            with pytest.raises(DeadlineExceeded):
+                await slow
+            return await guard.call(asyncio.sleep, 0, "done")
+
+        assert asyncio.run(run()) == "done"
+        stats = guard.stats()
+        assert (stats["timeouts"], stats["bulkhead_rejected"], stats["successes"], stats["in_flight"]) == (1, 1, 1, 0)
+
+
+class TestRouting:
+    """Test static files, delegated routes and lifespan."""
+
+    def test_static_file_with_etag(self, client):
+        response = client.get('/', headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        etag = response.headers["ETag"]
+        again = client.get('/', headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert again.status_code == 304 and again.data == b""
+
+    def test_other_routes_served_by_flask(self, client):
+        batch = client.post('/api/predict/batch', json=[STUDENT, STUDENT]).get_json()
+        assert batch["success"] and batch["count"] == 2
+        csv = client.post('/api/predict/csv', data="age\n20\n", content_type="text/csv")
+        assert csv.status_code == 200
+        assert client.get('/api/stats').get_json()["gemini_async"]["max_concurrent"] == 1000
+        assert client.get('/no/such/file.js').status_code == 404
+
+    def test_uploads_stream_into_flask(self, monkeypatch):
+        """A delegated CSV upload is answered while most of it is still unsent,
+        and no Content-Length (chunked upload) is needed."""
+        monkeypatch.setattr(app_module, "CSV_CHUNK_SIZE", 100)
+        header = ",".join(STUDENT) + "\n"
+        row = ",".join(str(v) for v in STUDENT.values()) + "\n"
+        messages = [header.encode()] + [(row * 100).encode() for _ in range(200)]
+        received, body, first_output_at = [], [], []
+
+        async def receive():
+            chunk = messages[len(received)]
+            received.append(chunk)
+            return {"type": "http.request", "body": chunk, "more_body": len(received) < len(messages)}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                first_output_at.append(len(received))
+                body.append(message["body"])
+
+        scope = {"type": "http", "method": "POST", "path": "/api/predict/csv", "query_string": b"",
+                 "headers": [(b"content-type", b"text/csv")]}
+        asyncio.run(asgi.app(scope, receive, send))
+        assert len(received) == len(messages)
+        assert first_output_at[0] < len(messages) / 2
+        assert b"".join(body).count(b"\n") == 20000
+
+    def test_blocking_lookups_run_off_the_loop(self, client, monkeypatch, tmp_path):
+        threads = []
+
+        class RecordingStore(SuggestionStore):
+            def get(self, key):
+                threads.append(threading.current_thread())
+                return super().get(key)
+
+            def put(self, key, suggestions):
+                threads.append(threading.current_thread())
+                return super().put(key, suggestions)
+
+        monkeypatch.setattr(app_module, "suggestion_store", RecordingStore(str(tmp_path / "s.sqlite3"), 60))
+        shutil.copy(app_module.MODEL_PATH, tmp_path / "v1.joblib")
+        shutil.copy(app_module.MODEL_PATH, tmp_path / "v2.joblib")
+        registry = ModelRegistry(str(tmp_path), "v1", app_module.build_predictor, app_module.WARMUP_RECORD)
+        registry.activate("v1")
+        monkeypatch.setattr(app_module, "model_registry", registry)
+        loaded = []
+        real_load = registry.load
+        monkeypatch.setattr(registry, "load", lambda v: loaded.append(threading.current_thread()) or real_load(v))
+
+        assert client.post('/api/predict', json=STUDENT, headers={"X-Model-Version": "v2"}).status_code == 200
+        assert client.post('/api/predict?suggestions=async', json=student(1)).status_code == 200
+        # get + put for the first request, get for the second (its job adds more, on its own thread)
+        assert len(threads) >= 3 and len(loaded) == 1
+        assert threading.main_thread() not in threads + loaded  # the event loop's thread
+
+    def test_lifespan(self, monkeypatch):
+        closed = []
+        monkeypatch.setattr(app_module.audit_log, "close", lambda: closed.append(True))
+        messages = [{"type": "lifespan.shutdown"}, {"type": "lifespan.startup"}]
+        sent = []
+
+        async def receive():
+            return messages.pop()
+
+        async def send(message):
+            sent.append(message["type"])
+
+        monkeypatch.setattr(asgi, "predict_executor", asgi.ThreadPoolExecutor(1))
+        monkeypatch.setattr(asgi, "wsgi_executor", asgi.ThreadPoolExecutor(1))
+        asyncio.run(asgi.app({"type": "lifespan"}, receive, send))
+        assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"] and closed
+
+    def test_imports_without_an_asgi_server(self):
+        # uvicorn is optional (requirements-optional.txt): only the command line uses it
+        code = "import sys; sys.modules['uvicorn'] = None; import asgi; print(callable(asgi.app))"
+        out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True,
+                             check=True)
+        assert out.stdout.splitlines()[-1] == "True"
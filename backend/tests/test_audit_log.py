@@ -0,0 +1,116 @@
+"""
+Tests for the batched prediction audit log.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from audit_log import AuditLog
+
+COLUMNS = ("age", "gender")
+
+
+def make_log(tmp_path, **kwargs):
+    return AuditLog(str(tmp_path / "audit.sqlite3"), COLUMNS, **kwargs)
+
+
+class TestAuditLog:
+    """Test buffering, overflow policies, rotation and reading back."""
+
+    def test_round_trip_and_filters(self, tmp_path):
+        log = make_log(tmp_path)
+        log.record("/api/predict", "v1", {"age": 20, "gender": "Male", "other": 1}, 101.5, 100.0, "basic", 1.5)
+        log.record("/api/predict", "v2", {"age": 30, "gender": None}, 55.0, 55.0, "gemini", 2.0)
+        frame = pd.DataFrame({"age": [18, 19], "gender": ["Female", None]}, index=[4, 7])
+        log.record_frame("/api/predict/batch", "v1", frame, np.array([-3.0, 40.0]), np.array([0.0, 40.0]), 3.0)
+        assert log.flush()
+        newest = log.query(limit=2)
+        assert [r["features"]["age"] for r in newest] == [19, 18]
+        assert newest[1]["raw_prediction"] == -3.0 and newest[1]["prediction"] == 0.0
+        assert newest[0]["features"]["gender"] is None
+        first = next(log.replay(model_version="v1"))
+        assert first == {
+            "ts": first["ts"], "endpoint": "/api/predict", "model_version": "v1",
+            "features": {"age": 20, "gender": "Male"}, "raw_prediction": 101.5, "prediction": 100.0,
+            "suggestion_source": "basic", "latency_ms": 1.5,
+        }
+        assert len(list(log.replay(endpoint="/api/predict/batch"))) == 2
+        assert log.stats()["written"] == 4
+        log.close()
+
+    def test_drop_when_full(self, tmp_path):
+        # The writer only wakes for a full batch or after the interval, so nothing drains
+        log = make_log(tmp_path, max_buffer=3, batch_size=100, flush_interval=60)
+        accepted = [log.record("/api/predict", "v", {"age": i}, 1.0, 1.0) for i in range(5)]
+        assert accepted == [True, True, True, False, False]
+        assert log.stats()["dropped"] == 2
+        log.flush()
+        assert log.stats()["written"] == 3
+        log.close()
+
+    def test_block_waits_for_the_writer(self, tmp_path):
+        log = make_log(tmp_path, max_buffer=3, batch_size=100, flush_interval=60,
+                       overflow="block", block_timeout=5)
+        assert all(log.record("/api/predict", "v", {"age": i}, 1.0, 1.0) for i in range(10))
+        log.flush()
+        assert log.stats()["dropped"] == 0 and log.stats()["written"] == 10
+        log.close()
+
+    def test_bad_record_loses_its_batch_not_the_writer(self, tmp_path):
+        log = make_log(tmp_path)
+        log.record("/api/predict", "v", ["not", "a", "mapping"], 1.0, 1.0)
+        assert log.flush()
+        log.record("/api/predict", "v", {"age": 21}, 1.0, 1.0)
+        assert log.flush()
+        stats = log.stats()
+        assert (stats["write_errors"], stats["dropped"], stats["written"]) == (1, 1, 1)
+        assert [r["features"]["age"] for r in log.replay()] == [21]
+        log.close()
+
+    def test_rotation_keeps_history_in_order(self, tmp_path):
+        log = make_log(tmp_path, batch_size=2, rotate_bytes=1, keep=2)
+        for i in range(8):
+            log.record("/api/predict", "v", {"age": i}, 1.0, 1.0)
+            log.flush()
+        log.close()
+        assert log.stats()["rotations"] >= 2
+        assert len(log.files()) <= 3
+        ages = [r["features"]["age"] for r in log.replay()]
+        assert ages == sorted(ages) and ages[-1] == 7
+
+
+class TestAuditEndpoints:
+    """Test what the prediction endpoints log."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        log = AuditLog(str(tmp_path / "app.sqlite3"), app_module.FEATURE_COLUMNS)
+        monkeypatch.setattr(app_module, "audit_log", log)
+        monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(app_module, "GEMINI_API_KEY", "")
+        app_module.prediction_cache.clear()
+        yield app_module.app.test_client()
+        log.close()
+
+    def test_predictions_are_logged(self, client):
+        student = dict(app_module.WARMUP_RECORD)
+        prediction = client.post('/api/predict', json=student).get_json()["prediction"]
+        client.post('/api/predict', json=student)  # served from the prediction cache
+        client.post('/api/predict/batch', json=[student, {"age": 1}, student])
+
+        assert client.get('/api/audit').status_code == 401
+        records = client.get('/api/audit', headers={"X-Admin-Token": "secret"}).get_json()["records"]
+        assert [r["endpoint"] for r in records] == ["/api/predict/batch"] * 2 + ["/api/predict"] * 2
+        cached, first = records[2], records[3]
+        assert first["prediction"] == prediction and first["suggestion_source"] == "basic"
+        assert first["features"]["study_hours_per_day"] == student["study_hours_per_day"]
+        assert first["latency_ms"] > 0
+        assert cached["suggestion_source"] == "prediction_cache" and cached["raw_prediction"] is None
+        assert records[0]["raw_prediction"] == pytest.approx(first["raw_prediction"])
@@ -0,0 +1,36 @@
+"""
+Tests for the benchmark baseline comparison.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from regression import compare
+
+
+def run(**values):
+    better = {"latency_ms": "lower", "throughput_rps": "higher", "new_metric": "lower"}
+    return {"metrics": {k: {"value": v, "better": better[k]} for k, v in values.items()}}
+
+
+class TestCompare:
+    """Test regression detection in both directions."""
+
+    def test_within_threshold(self):
+        rows = compare(run(latency_ms=11, throughput_rps=95), run(latency_ms=10, throughput_rps=100), 0.25)
+        assert [r[4] for r in rows] == [False, False]
+
+    def test_slower_latency_and_lower_throughput_regress(self):
+        rows = dict((r[0], r) for r in compare(
+            run(latency_ms=13, throughput_rps=70), run(latency_ms=10, throughput_rps=100), 0.25))
+        assert rows["latency_ms"][3] == pytest.approx(0.3) and rows["latency_ms"][4]
+        assert rows["throughput_rps"][3] == pytest.approx(0.3) and rows["throughput_rps"][4]
+
+    def test_improvements_and_new_metrics_never_regress(self):
+        rows = compare(run(latency_ms=5, throughput_rps=300, new_metric=1), run(latency_ms=10, throughput_rps=100), 0.25)
+        assert [r[0] for r in rows] == ["latency_ms", "throughput_rps"]
+        assert all(r[3] < 0 and not r[4] for r in rows)
@@ -0,0 +1,42 @@
+"""
+Unit tests for the LRU/TTL cache.
+"""
+
+from cache import MISSING, TTLCache
+
+
+class TestTTLCache:
+    """Test eviction, expiry and counters."""
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # "b" is now least recently used
+        cache.set("c", 3)
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_entries_expire(self, clock):
+        cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+        cache.set("a", 1)
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5.0
+        assert cache.get("a") is MISSING
+        assert cache.stats()["expirations"] == 1
+
+    def test_hit_miss_counters(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.get("a")
+        cache.set("a", 1)
+        cache.get("a")
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+    def test_zero_size_disables(self):
+        cache = TTLCache(maxsize=0, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") is MISSING
+        assert len(cache) == 0
@@ -0,0 +1,144 @@
+"""
+Tests for the streaming cohort aggregates and /api/analytics/cohort.
+"""
+
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from cohort_stats import MISSING_GROUP, OTHER_GROUP, CohortAnalysis, ScoreSummary
+
+QS = (0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0)
+
+
+def rounded_scores(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.round(np.clip(rng.normal(65, 20, n), 0, 100), 2)
+
+
+def cohort_csv(n, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "age": rng.integers(17, 25, n),
+        "gender": rng.choice(["Male", "Female", "Other", ""], n),
+        "study_hours_per_day": rng.uniform(0, 8, n).round(1),
+        "social_media_hours": rng.uniform(0, 6, n).round(1),
+        "part_time_job": rng.choice(["Yes", "No"], n),
+        "attendance_percentage": rng.uniform(50, 100, n).round(1),
+        "sleep_hours": rng.uniform(4, 10, n).round(1),
+        "diet_quality": rng.choice(["Good", "Fair", "Poor"], n),
+        "exercise_frequency": rng.integers(0, 8, n),
+        "parental_education_level": rng.choice(["High School", "Bachelor", "Master"], n),
+        "internet_Resource_accessibility": "Good",
+        "extracurricular_participation": "No",
+    })
+    frame.loc[::50, "sleep_hours"] = -1  # out of range: counted as failed
+    return frame
+
+
+class TestScoreSummary:
+    """Test the aggregates against exact pandas computations."""
+
+    def test_matches_pandas(self):
+        scores = rounded_scores(20000)
+        summary = ScoreSummary()
+        for chunk in np.array_split(scores, 7):
+            summary.update(chunk)
+        series = pd.Series(scores)
+        report = summary.report()
+        assert summary.count == len(scores)
+        assert summary.mean == pytest.approx(series.mean(), abs=1e-9)
+        assert report["std"] == pytest.approx(series.std(), abs=1e-4)
+        assert summary.at_risk == int((series < 60).sum())
+        for q, value in summary.quantiles(QS).items():
+            assert value == pytest.approx(series.quantile(q), abs=1e-9)
+        assert sum(b["count"] for b in report["histogram"]) == len(scores)
+        assert report["histogram"][-1]["count"] == int((series >= 90).sum())
+
+    def test_coarse_resolution_error_bound(self):
+        scores = np.clip(np.random.default_rng(1).normal(65, 20, 5000), 0, 100)  # unrounded
+        summary = ScoreSummary(resolution=0.5)
+        summary.update(scores)
+        for q, value in summary.quantiles(QS).items():
+            assert abs(value - pd.Series(scores).quantile(q)) <= 0.25 + 1e-9
+
+    def test_merge_equals_single_pass_and_survives_state_round_trip(self):
+        scores = rounded_scores(3000, seed=2)
+        whole, left, right = ScoreSummary(), ScoreSummary(), ScoreSummary()
+        whole.update(scores)
+        left.update(scores[:1000])
+        right.update(scores[1000:])
+        merged = ScoreSummary.from_state(left.to_state()).merge(ScoreSummary.from_state(right.to_state()))
+        assert merged.report()["percentiles"] == whole.report()["percentiles"]
+        assert (merged.count, merged.at_risk, merged.min, merged.max) == \
+            (whole.count, whole.at_risk, whole.min, whole.max)
+        assert merged.mean == pytest.approx(whole.mean) and merged.m2 == pytest.approx(whole.m2)
+        assert (merged.counts == whole.counts).all()
+
+
+class TestCohortAnalysis:
+    """Test group breakdowns."""
+
+    def test_groups_match_pandas_groupby(self):
+        frame = cohort_csv(3000)
+        features, errors = app_module.prepare_frame(frame.astype(str))
+        scores = app_module.score_frame(app_module.require_model().scorer, features)
+        analysis = CohortAnalysis()
+        for part in np.array_split(np.arange(len(features)), 4):
+            analysis.update(features.iloc[part], scores[part])
+        report = analysis.report()
+        expected = pd.Series(scores, index=features.index).groupby(
+            features["gender"].replace("", MISSING_GROUP))
+        for label, group in expected:
+            assert report["groups"]["gender"][label]["count"] == len(group)
+            assert report["groups"]["gender"][label]["percentiles"]["p50"] == pytest.approx(group.median())
+
+    def test_group_count_is_bounded(self):
+        analysis = CohortAnalysis(group_by=["gender"], max_groups=3)
+        features = pd.DataFrame({"gender": [f"g{i}" for i in range(10)]})
+        analysis.update(features, np.linspace(10, 90, 10))
+        assert len(analysis.groups["gender"]) == 3
+        assert analysis.groups["gender"][OTHER_GROUP].count == 8
+
+
+class TestCohortEndpoint:
+    """Test /api/analytics/cohort."""
+
+    def test_report(self):
+        frame = cohort_csv(2500, seed=3)
+        client = app_module.app.test_client()
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(app_module, "CSV_CHUNK_SIZE", 400)
+            response = client.post('/api/analytics/cohort?threshold=50&group_by=gender,part_time_job',
+                                   data=frame.to_csv(index=False), content_type='text/csv')
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data["rows"] == 2500 and data["failed"] == 50
+        assert set(data["groups"]) == {"gender", "part_time_job"}
+        assert MISSING_GROUP in data["groups"]["gender"]
+        features, _ = app_module.prepare_frame(frame.astype(str))
+        scores = pd.Series(app_module.score_frame(app_module.require_model().scorer, features))
+        assert data["overall"]["at_risk"] == int((scores < 50).sum())
+        assert data["overall"]["percentiles"]["p90"] == pytest.approx(scores.quantile(0.9))
+
+    def test_bad_parameters(self):
+        client = app_module.app.test_client()
+        assert client.post('/api/analytics/cohort?group_by=age', data="").status_code == 400
+        assert client.post('/api/analytics/cohort?bin_width=0', data="").status_code == 400
+        assert client.post('/api/analytics/cohort?bin_width=0.071', data="").status_code == 400
+
+    def test_hundredths_bin_width(self):
+        client = app_module.app.test_client()
+        response = client.post('/api/analytics/cohort?bin_width=0.07',
+                               data=cohort_csv(50, seed=1).to_csv(index=False), content_type='text/csv')
+        assert response.status_code == 200
+        histogram = response.get_json()["overall"]["histogram"]
+        assert histogram[1] == {"from": 0.07, "to": 0.14, "count": histogram[1]["count"]}
+        assert histogram[-1]["to"] == 100
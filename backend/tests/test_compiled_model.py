@@ -0,0 +1,66 @@
+"""
+Tests for the compiled NumPy fast path of the ridge pipeline.
+"""
+
+import os
+import sys
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import PolynomialFeatures
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from compiled_model import (
+    CompiledLinearModel,
+    UnsupportedPipeline,
+    compile_pipeline,
+    verification_frame,
+    verify_compiled,
+)
+from scoring import parse_record, predict_record
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return joblib.load(app_module.MODEL_PATH)
+
+
+class TestCompiledModel:
+    """Compiled model must agree with the sklearn pipeline."""
+
+    def test_matches_pipeline_on_generated_data(self, pipeline):
+        compiled = compile_pipeline(pipeline)
+        frame = verification_frame(pipeline, n_rows=1000, seed=7)
+        np.testing.assert_allclose(compiled.predict(frame), pipeline.predict(frame), rtol=1e-9, atol=1e-9)
+        assert verify_compiled(compiled, pipeline) < 1e-9
+
+    def test_single_row_matches_pipeline(self, pipeline):
+        compiled = compile_pipeline(pipeline)
+        features = parse_record({
+            "age": 19, "gender": "female", "study_hours_per_day": 2.5,
+            "social_media_hours": 4, "part_time_job": "yes", "attendance_percentage": 71,
+            "sleep_hours": 6, "diet_quality": "Excellent", "exercise_frequency": 1,
+            "parental_education_level": "high school",
+            "internet_Resource_accessibility": "Poor",
+            "extracurricular_participation": None,
+        })
+        assert predict_record(compiled, features) == pytest.approx(
+            predict_record(pipeline, features), abs=1e-9
+        )
+
+    def test_unsupported_pipeline_raises(self):
+        X = np.arange(20, dtype=float).reshape(10, 2)
+        poly = Pipeline([("poly", PolynomialFeatures()), ("model", Ridge())]).fit(X, X[:, 0])
+        with pytest.raises(UnsupportedPipeline):
+            compile_pipeline(poly)
+
+    def test_build_predictor_respects_backend_setting(self, pipeline, monkeypatch):
+        monkeypatch.setattr(app_module, "MODEL_BACKEND", "compiled")
+        assert isinstance(app_module.build_predictor(pipeline), CompiledLinearModel)
+        monkeypatch.setattr(app_module, "MODEL_BACKEND", "sklearn")
+        assert app_module.build_predictor(pipeline) is pipeline
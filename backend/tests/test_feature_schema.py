@@ -0,0 +1,157 @@
+"""
+Tests for the declarative feature schema, its decoder and the JSON provider.
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+import asgi
+import fast_json
+from fast_json import FastJSONProvider
+from feature_schema import RecordDecoder, SchemaError
+from scoring import FEATURE_COLUMNS, prepare_frame
+from tests.asgi_client import ASGITestClient
+
+
+@pytest.fixture
+def record():
+    return {
+        "age": 20, "gender": " male", "study_hours_per_day": "5.5",
+        "social_media_hours": 2.0, "part_time_job": "No", "attendance_percentage": 90,
+        "sleep_hours": 7.5, "diet_quality": "Good", "exercise_frequency": 3.9,
+        "parental_education_level": "Bachelor", "internet_Resource_accessibility": "Good",
+        "extracurricular_participation": "Yes",
+    }
+
+
+@pytest.fixture
+def client():
+    app_module.app.config['TESTING'] = True
+    app_module.prediction_cache.clear()
+    with app_module.app.test_client() as client:
+        yield client
+
+
+class TestRecordDecoder:
+    """Test single-pass decoding and structured errors."""
+
+    def test_converts_in_model_column_order(self, record):
+        features = RecordDecoder().decode(record)
+        assert list(features) == FEATURE_COLUMNS
+        assert features["gender"] == "Male"
+        assert features["study_hours_per_day"] == 5.5
+        assert features["exercise_frequency"] == 3  # int() truncation, as before
+
+    def test_collects_every_error(self, record):
+        record.update(age="", sleep_hours=None, attendance_percentage=150, social_media_hours="lots")
+        with pytest.raises(SchemaError) as info:
+            RecordDecoder().decode(record)
+        codes = {e["field"]: e["code"] for e in info.value.errors}
+        assert codes == {
+            "age": "missing",
+            "sleep_hours": "missing",
+            "attendance_percentage": "out_of_range",
+            "social_media_hours": "invalid",
+        }
+        assert str(info.value) == "Missing required fields: age, sleep_hours"
+
+    def test_unknown_categories_only_rejected_when_strict(self, record):
+        record["diet_quality"] = "excellent"
+        assert RecordDecoder().decode(record)["diet_quality"] == "Excellent"
+        with pytest.raises(SchemaError) as info:
+            RecordDecoder(strict_categories=True).decode(record)
+        assert info.value.errors[0]["code"] == "unknown_category"
+
+    def test_infinite_numbers_are_invalid_not_a_crash(self, record):
+        with pytest.raises(SchemaError) as info:
+            RecordDecoder().decode(dict(record, age=float("inf"), sleep_hours=float("inf")))
+        errors = {e["field"]: e["code"] for e in info.value.errors}
+        assert errors == {"age": "invalid", "sleep_hours": "out_of_range"}
+
+    def test_non_object_body(self):
+        with pytest.raises(SchemaError) as info:
+            RecordDecoder().decode([1, 2, 3])
+        assert info.value.errors[0]["code"] == "invalid_body"
+
+    def test_batch_path_applies_the_same_ranges(self, record):
+        frame = pd.DataFrame([record, dict(record, sleep_hours=30)])
+        features, errors = prepare_frame(frame)
+        assert list(features.index) == [0]
+        assert "sleep_hours must be between" in errors[1]
+
+
+class TestPredictBodies:
+    """Test the JSON, form and MessagePack request bodies."""
+
+    def test_form_and_json_agree(self, client, record):
+        record["exercise_frequency"] = 3
+        from_json = json.loads(client.post('/api/predict', json=record).data)
+        from_form = json.loads(client.post('/api/predict', data=record).data)
+        assert from_json["prediction"] == from_form["prediction"]
+
+    def test_structured_errors_in_response(self, client, record):
+        record["attendance_percentage"] = 150
+        response = client.post('/api/predict', json=record)
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert data["success"] is False
+        assert data["errors"][0]["field"] == "attendance_percentage"
+
+    def test_msgpack_body(self, client, record):
+        msgpack = pytest.importorskip("msgpack")
+        expected = json.loads(client.post('/api/predict', json=record).data)["prediction"]
+        response = client.post('/api/predict', data=msgpack.packb(record),
+                               content_type='application/msgpack')
+        assert response.status_code == 200
+        assert json.loads(response.data)["prediction"] == expected
+
+    def test_infinite_msgpack_value_gets_structured_errors(self, client, record):
+        msgpack = pytest.importorskip("msgpack")
+        response = client.post('/api/predict', data=msgpack.packb(dict(record, age=float("inf"))),
+                               content_type='application/msgpack')
+        assert response.status_code == 400
+        assert json.loads(response.data)["errors"] == [
+            {"field": "age", "code": "invalid", "message": "Invalid value for age: inf"}]
+
+    def test_msgpack_body_without_msgpack(self, client, hide_module):
+        hide_module("msgpack")
+        for server in (client, ASGITestClient(asgi.app)):
+            response = server.post('/api/predict', data=b"\x80", content_type='application/msgpack')
+            assert response.status_code == 415
+            assert "msgpack" in json.loads(response.data)["error"]
+
+    def test_schema_endpoint(self, client):
+        data = json.loads(client.get('/api/schema').data)
+        assert [f["name"] for f in data["fields"]] == FEATURE_COLUMNS
+        age = data["fields"][0]
+        assert age["type"] == "int" and age["required"] is True
+
+
+class TestFastJSONProvider:
+    """Test response encoding with and without orjson."""
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_encodes_numpy_values(self, use_orjson):
+        provider = FastJSONProvider(app_module.app)
+        provider.use_orjson = use_orjson and provider.use_orjson
+        payload = {"prediction": np.float64(81.5), "rows": [1, 2], "ok": True}
+        with app_module.app.app_context():
+            body = provider.response(payload).get_data()
+        assert json.loads(body) == {"prediction": 81.5, "rows": [1, 2], "ok": True}
+
+    def test_stdlib_fallback_without_orjson(self, hide_module):
+        (module,) = hide_module("orjson", fast_json)
+        provider = module.FastJSONProvider(app_module.app)
+        assert provider.name == "stdlib"
+        with app_module.app.app_context():
+            body = provider.response({"prediction": np.float64(81.5)}).get_data()
+        assert body == b'{"prediction":81.5}\n'
+        assert provider.loads(body) == {"prediction": 81.5}
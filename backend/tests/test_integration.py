@@ -5,6 +5,7 @@ Tests the Flask API endpoints and integration with the ML model.
 Run with: pytest tests/test_integration.py --cov
 """
 
+import gzip
 import json
 import os
 import pytest
@@ -18,13 +19,20 @@ from unittest.mock import patch, MagicMock
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import app as app_module
+import asgi
 from app import app, generate_suggestions, generate_basic_suggestions, normalize_str
+from tests.asgi_client import ASGITestClient
 
 
-@pytest.fixture
-def client():
-    """Create a test client for the Flask app."""
+@pytest.fixture(params=["wsgi", "asgi"])
+def client(request):
+    """Create a test client for the Flask app, or for the ASGI variant of it."""
     app.config['TESTING'] = True
+    app_module.prediction_cache.clear()
+    if request.param == "asgi":
+        yield ASGITestClient(asgi.app)
+        return
     with app.test_client() as client:
         yield client
 
@@ -152,6 +160,164 @@ class TestAPIEndpoints:
         assert response.status_code in [200, 400]
 
 
+class TestBatchPrediction:
+    """Test the vectorized batch prediction endpoint."""
+
+    def test_batch_matches_single_predictions(self, client, sample_json_data):
+        """Test batch scores agree with the single-row endpoint."""
+        other = sample_json_data.copy()
+        other['study_hours_per_day'] = 1
+        other['gender'] = '  female '
+        response = client.post('/api/predict/batch', json=[sample_json_data, other])
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['success'] is True
+        assert data['count'] == 2
+        assert data['failed'] == 0
+        for record, result in zip([sample_json_data, other], data['results']):
+            single = json.loads(client.post('/api/predict', json=record).data)
+            assert result['success'] is True
+            assert result['prediction'] == pytest.approx(single['prediction'])
+
+    def test_batch_reports_row_errors(self, client, sample_json_data):
+        """Test invalid rows are reported without failing the batch."""
+        missing = sample_json_data.copy()
+        del missing['age']
+        invalid = sample_json_data.copy()
+        invalid['sleep_hours'] = 'lots'
+        response = client.post(
+            '/api/predict/batch',
+            json=[sample_json_data, missing, invalid, "not a record"]
+        )
+        assert response.status_code == 200
+        results = json.loads(response.data)['results']
+        assert results[0]['success'] is True
+        assert results[1]['success'] is False
+        assert 'age' in results[1]['error']
+        assert results[2]['success'] is False
+        assert 'sleep_hours' in results[2]['error']
+        assert results[3]['success'] is False
+
+    def test_batch_accepts_students_key(self, client, sample_json_data):
+        """Test the records can be wrapped in a {"students": [...]} object."""
+        response = client.post('/api/predict/batch', json={"students": [sample_json_data]})
+        assert response.status_code == 200
+        assert json.loads(response.data)['count'] == 1
+
+    def test_empty_batch(self, client):
+        """Test an empty batch, bare or wrapped, gets an empty result list."""
+        for body in ([], {"students": []}):
+            response = client.post('/api/predict/batch', json=body)
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert (data['success'], data['count'], data['failed'], data['results']) == (True, 0, 0, [])
+
+    def test_batch_rejects_non_array(self, client, sample_json_data):
+        """Test a non-array body is rejected."""
+        response = client.post('/api/predict/batch', json=sample_json_data)
+        assert response.status_code == 400
+
+    def test_batch_size_limit(self, client, sample_json_data):
+        """Test batches above MAX_BATCH_SIZE are refused."""
+        with patch.object(app_module, 'MAX_BATCH_SIZE', 2):
+            response = client.post('/api/predict/batch', json=[sample_json_data] * 3)
+        assert response.status_code == 413
+
+
+def _to_csv(records):
+    """Render student records as a CSV upload body."""
+    return pd.DataFrame(records).to_csv(index=False)
+
+
+class TestCSVStreaming:
+    """Test the streaming CSV bulk-scoring endpoint."""
+
+    def test_csv_ndjson_stream(self, client, sample_json_data):
+        """Test every row comes back as one NDJSON line, in order."""
+        records = [sample_json_data] * 5
+        response = client.post(
+            '/api/predict/csv?chunksize=2',
+            data=_to_csv(records),
+            content_type='text/csv'
+        )
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        lines = [json.loads(l) for l in response.data.decode().splitlines()]
+        assert [l['row'] for l in lines] == list(range(5))
+        single = json.loads(client.post('/api/predict', json=sample_json_data).data)
+        assert all(l['prediction'] == pytest.approx(single['prediction']) for l in lines)
+
+    def test_csv_reports_bad_rows_inline(self, client, sample_json_data):
+        """Test invalid rows are reported without aborting the stream."""
+        bad = sample_json_data.copy()
+        bad['attendance_percentage'] = 'n/a'
+        records = [sample_json_data, bad, sample_json_data]
+        response = client.post('/api/predict/csv', data=_to_csv(records), content_type='text/csv')
+        lines = [json.loads(l) for l in response.data.decode().splitlines()]
+        assert [l['success'] for l in lines] == [True, False, True]
+        assert 'attendance_percentage' in lines[1]['error']
+
+    def test_csv_gzip_upload_csv_output(self, client, sample_json_data):
+        """Test gzip bodies are accepted and CSV output is available."""
+        body = gzip.compress(_to_csv([sample_json_data] * 3).encode())
+        response = client.post(
+            '/api/predict/csv?format=csv',
+            data=body,
+            content_type='text/csv',
+            headers={'Content-Encoding': 'gzip'}
+        )
+        assert response.status_code == 200
+        rows = response.data.decode().splitlines()
+        assert rows[0] == 'row,prediction,error'
+        assert len(rows) == 4
+
+
+class TestPredictionCache:
+    """Test the prediction/suggestion cache on /api/predict."""
+
+    def test_repeat_request_hits_cache(self, client, sample_json_data):
+        """Test a repeated submission skips the model and suggestion generation."""
+        first = json.loads(client.post('/api/predict', json=sample_json_data).data)
+        with patch('app.generate_suggestions') as gen, patch.object(app_module.micro_batcher, 'predict') as pred:
+            second = json.loads(client.post('/api/predict', json=sample_json_data).data)
+        gen.assert_not_called()
+        pred.assert_not_called()
+        assert second == first
+        assert app_module.prediction_cache.hits >= 1
+
+    def test_cache_key_is_normalized(self, client, sample_json_data, sample_form_data):
+        """Test equivalent JSON and form submissions share one cache entry."""
+        client.post('/api/predict', json=sample_json_data)
+        shouty = dict(sample_form_data, gender='  MALE ')
+        with patch('app.generate_suggestions') as gen:
+            response = client.post('/api/predict', data=shouty)
+        gen.assert_not_called()
+        assert response.status_code == 200
+
+    def test_fallback_suggestions_not_cached(self, client, sample_json_data):
+        """Test hard-coded fallback responses are retried on the next request."""
+        with patch('app.generate_suggestions', return_value=None):
+            client.post('/api/predict', json=sample_json_data)
+        assert len(app_module.prediction_cache) == 0
+
+    def test_model_change_invalidates_cache(self, client, sample_json_data, monkeypatch):
+        """Test a changed model file clears cached predictions."""
+        client.post('/api/predict', json=sample_json_data)
+        assert len(app_module.prediction_cache) == 1
+        monkeypatch.setattr(app_module, 'MODEL_CHECK_INTERVAL', 0)
+        monkeypatch.setattr(app_module.model_registry.active, 'signature', (0, 0))
+        assert app_module.reload_model_if_changed(wait=True) is True
+        assert len(app_module.prediction_cache) == 0
+
+    def test_stats_endpoint(self, client, sample_json_data):
+        """Test cache counters are exposed."""
+        client.post('/api/predict', json=sample_json_data)
+        client.post('/api/predict', json=sample_json_data)
+        stats = json.loads(client.get('/api/stats').data)['prediction_cache']
+        assert stats['hits'] >= 1
+        assert stats['misses'] >= 1
+
+
 class TestUtilityFunctions:
     """Test utility functions."""
 
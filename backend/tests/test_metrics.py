@@ -0,0 +1,115 @@
+"""
+Tests for the in-process metrics and the /metrics endpoint.
+"""
+
+import os
+import re
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from metrics import MetricsRegistry
+
+
+@pytest.fixture
+def student():
+    return {
+        "age": 20, "gender": "Male", "study_hours_per_day": 5.5,
+        "social_media_hours": 2.0, "part_time_job": "No", "attendance_percentage": 90,
+        "sleep_hours": 7.5, "diet_quality": "Good", "exercise_frequency": 3,
+        "parental_education_level": "Bachelor", "internet_Resource_accessibility": "Good",
+        "extracurricular_participation": "Yes",
+    }
+
+
+@pytest.fixture
+def client():
+    app_module.app.config['TESTING'] = True
+    app_module.prediction_cache.clear()
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def sample(text, name, **labels):
+    """Value of one sample in a text-format scrape (0 if absent)."""
+    for line in text.splitlines():
+        if line.startswith("#") or not line.startswith(name):
+            continue
+        series, value = line.rsplit(" ", 1)
+        found = dict(re.findall(r'(\w+)="([^"]*)"', series))
+        if series.split("{")[0] == name and all(found.get(k) == v for k, v in labels.items()):
+            return float(value)
+    return 0.0
+
+
+class TestMetricsRegistry:
+    """Test the text exposition format."""
+
+    def test_counter_and_histogram_render(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("jobs_total", "Jobs", ("kind",))
+        histogram = registry.histogram("job_seconds", "Job time", buckets=(0.1, 1.0))
+        counter.inc("a")
+        counter.inc("a", amount=2)
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+        text = registry.render()
+        assert "# TYPE jobs_total counter" in text
+        assert 'jobs_total{kind="a"} 3' in text
+        # Buckets are cumulative and end with +Inf == count
+        assert 'job_seconds_bucket{le="0.1"} 1' in text
+        assert 'job_seconds_bucket{le="1"} 2' in text
+        assert 'job_seconds_bucket{le="+Inf"} 3' in text
+        assert "job_seconds_count 3" in text
+        assert "job_seconds_sum 5.55" in text
+
+    def test_timer_observes_even_on_error(self):
+        registry = MetricsRegistry()
+        child = registry.histogram("block_seconds", "Block").labels()
+        with pytest.raises(RuntimeError):
+            with child.time():
+                raise RuntimeError("boom")
+        assert sum(child.counts) == 1
+
+    def test_label_count_is_checked(self):
+        registry = MetricsRegistry()
+        with pytest.raises(ValueError):
+            registry.counter("c", "C", ("a", "b")).labels("only-one")
+
+
+class TestMetricsEndpoint:
+    """Test what /api/predict records."""
+
+    def test_requests_stages_and_sources(self, client, student):
+        before = client.get('/metrics').get_data(as_text=True)
+        client.post('/api/predict', json=student)
+        client.post('/api/predict', json={"age": 20})
+        text = client.get('/metrics').get_data(as_text=True)
+
+        def delta(name, **labels):
+            return sample(text, name, **labels) - sample(before, name, **labels)
+
+        assert delta("http_requests_total", endpoint="/api/predict", method="POST", status="200") == 1
+        assert delta("http_requests_total", endpoint="/api/predict", method="POST", status="400") == 1
+        for stage in ("parse", "predict", "suggestions", "serialize"):
+            assert delta("request_stage_duration_seconds_count", endpoint="/api/predict", stage=stage) >= 1
+        assert delta("suggestions_total", source="basic") == 1
+        assert delta("predictions_total", model_version=app_module.MODEL_VERSION) == 1
+        assert sample(text, "model_info", version=app_module.MODEL_VERSION, active="1") == 1
+
+    def test_hard_coded_fallback_is_counted(self, client, student):
+        before = client.get('/metrics').get_data(as_text=True)
+        with patch.object(app_module, 'generate_suggestions', return_value=None):
+            client.post('/api/predict', json=student)
+        text = client.get('/metrics').get_data(as_text=True)
+        assert sample(text, "suggestions_total", source="fallback") - \
+            sample(before, "suggestions_total", source="fallback") == 1
+
+    def test_content_type(self, client):
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
@@ -0,0 +1,107 @@
+"""
+Tests for micro-batching of concurrent single predictions.
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from micro_batch import MicroBatcher
+
+
+class SlowModel:
+    """Pipeline stand-in: a fixed cost per call, whatever the batch size."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.calls = []
+
+    def predict(self, frame):
+        self.calls.append(len(frame))
+        if (frame["age"] < 0).any():
+            raise ValueError("negative age")
+        time.sleep(self.delay)
+        return frame["age"].to_numpy(dtype=float) * 2
+
+
+class TestMicroBatcher:
+    """Test batching, result fan-out, error isolation and the wait window."""
+
+    def test_concurrent_requests_share_batches(self):
+        model = SlowModel()
+        batcher = MicroBatcher(max_size=8, max_wait=0.005)
+        with ThreadPoolExecutor(16) as pool:
+            results = list(pool.map(lambda age: batcher.predict(model, {"age": age}), range(16)))
+        assert results == [age * 2.0 for age in range(16)]
+        stats = batcher.stats()
+        assert stats["scored"] == 16
+        assert stats["batches"] < 16 and 1 < stats["largest_batch"] <= 8
+        assert max(model.calls) <= 8
+
+    def test_bad_record_fails_alone(self):
+        model = SlowModel(delay=0.05)
+        batcher = MicroBatcher(max_size=8, max_wait=0.005)
+        # Occupy the dispatcher so the next two requests queue up together
+        blocker = threading.Thread(target=batcher.predict, args=(model, {"age": 1}))
+        blocker.start()
+        time.sleep(0.01)
+        with ThreadPoolExecutor(2) as pool:
+            good = pool.submit(batcher.predict, model, {"age": 3})
+            bad = pool.submit(batcher.predict, model, {"age": -1})
+            assert good.result() == 6.0
+            with pytest.raises(ValueError, match="negative age"):
+                bad.result()
+        blocker.join()
+        assert batcher.stats()["fallbacks"] == 1
+
+    def test_window_adapts_to_load(self):
+        batcher = MicroBatcher(max_size=8, max_wait=0.002, min_wait=0.0001)
+        assert batcher.window == 0
+        for expected in (0.0001, 0.0002, 0.0004, 0.0008, 0.0016, 0.002, 0.002):
+            batcher._adapt(3)
+            assert batcher.window == pytest.approx(expected)
+        for _ in range(4):
+            batcher._adapt(1)
+        assert batcher.window == pytest.approx(0.000125)
+        batcher._adapt(1)
+        assert batcher.window == 0
+
+    def test_single_row_models_and_disabled_bypass(self):
+        class Compiled(SlowModel):
+            def predict_one(self, features):
+                return 42.0
+
+        batcher = MicroBatcher(max_size=8)
+        assert batcher.predict(Compiled(), {"age": 1}) == 42.0
+        disabled = MicroBatcher(max_size=0)
+        assert disabled.predict(SlowModel(delay=0), {"age": 4}) == 8.0
+        assert not batcher._dispatcher.started and not disabled._dispatcher.started
+
+    def test_predict_endpoint_with_sklearn_backend(self, monkeypatch):
+        monkeypatch.setattr(app_module, "GEMINI_API_KEY", "")
+        monkeypatch.setattr(app_module, "micro_batcher", MicroBatcher(max_size=8))
+        app_module.prediction_cache.clear()
+        client = app_module.app.test_client()
+        student = dict(app_module.WARMUP_RECORD, age=21)
+        compiled = client.post('/api/predict', json=student).get_json()["prediction"]
+
+        app_module.prediction_cache.clear()
+        entry = app_module.require_model()
+        monkeypatch.setattr(entry, "scorer", entry.pipeline)
+        students = [dict(student, study_hours_per_day=h) for h in (1, 2, 3, 4)]
+        with ThreadPoolExecutor(4) as pool:
+            responses = list(pool.map(lambda s: client.post('/api/predict', json=s).get_json(), students))
+        assert all(r["success"] for r in responses)
+        assert responses[0]["prediction"] == pytest.approx(
+            client.post('/api/predict', json=students[0]).get_json()["prediction"])
+        assert client.post('/api/predict', json=student).get_json()["prediction"] == pytest.approx(compiled)
+        stats = client.get('/api/stats').get_json()["micro_batch"]
+        assert stats["enabled"] and stats["scored"] >= 5
+        app_module.prediction_cache.clear()
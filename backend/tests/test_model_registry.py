@@ -0,0 +1,140 @@
+"""
+Tests for the versioned model registry and hot-swapping.
+"""
+
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from model_registry import ModelLoadError, ModelRegistry, UnknownModelVersion
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    shutil.copy(app_module.MODEL_PATH, tmp_path / "v1.joblib")
+    shutil.copy(app_module.MODEL_PATH, tmp_path / "v2.joblib")
+    return tmp_path
+
+
+@pytest.fixture
+def registry(models_dir):
+    registry = ModelRegistry(str(models_dir), "v1", app_module.build_predictor, app_module.WARMUP_RECORD)
+    registry.activate("v1")
+    return registry
+
+
+class TestModelRegistry:
+    """Test loading, validation and swapping."""
+
+    def test_lists_versions(self, registry):
+        info = registry.info()
+        assert info["available"] == ["v1", "v2"]
+        assert info["active"] == "v1"
+
+    def test_activate_swaps_reference(self, registry):
+        old = registry.active
+        registry.activate("v2")
+        assert registry.active.version == "v2"
+        assert registry.get("v1") is old  # still loaded for pinned requests
+
+    def test_invalid_artifact_is_rejected(self, registry, models_dir):
+        (models_dir / "broken.joblib").write_bytes(b"not a pickle")
+        with pytest.raises(ModelLoadError):
+            registry.activate("broken")
+        assert registry.active.version == "v1"
+
+    def test_load_failure_is_remembered_until_retry_or_file_change(self, models_dir, clock, monkeypatch):
+        registry = ModelRegistry(str(models_dir), "v1", app_module.build_predictor, app_module.WARMUP_RECORD,
+                                 retry_failed_after=30, clock=clock)
+        broken = models_dir / "broken.joblib"
+        broken.write_bytes(b"not a pickle")
+        loads = []
+        load = registry.load
+        monkeypatch.setattr(registry, "load", lambda version: loads.append(version) or load(version))
+        with pytest.raises(ModelLoadError) as first:
+            registry.get("broken")
+        with pytest.raises(ModelLoadError) as second:
+            registry.get("broken")
+        assert second.value is first.value and len(loads) == 1
+        clock.now = 31
+        with pytest.raises(ModelLoadError):
+            registry.get("broken")
+        assert len(loads) == 2
+        shutil.copy(models_dir / "v1.joblib", broken)
+        assert registry.get("broken").version == "broken"
+        assert len(loads) == 3
+
+    def test_unknown_and_unsafe_versions(self, registry):
+        with pytest.raises(UnknownModelVersion):
+            registry.get("missing")
+        with pytest.raises(UnknownModelVersion):
+            registry.get("../models/v1")
+
+    def test_memory_mapped_load_scores_the_same(self, registry, models_dir):
+        import numpy as np
+
+        mapped = ModelRegistry(str(models_dir), "v1", app_module.build_predictor,
+                               app_module.WARMUP_RECORD, mmap_mode="r")
+        entry = mapped.activate("v1")
+        ridge = entry.pipeline.named_steps[list(entry.pipeline.named_steps)[-1]]
+        assert isinstance(ridge.coef_, np.memmap)
+        features = app_module.parse_record(app_module.WARMUP_RECORD)
+        assert entry.scorer.predict_one(features) == pytest.approx(
+            registry.active.scorer.predict_one(features))
+
+    def test_changed_file_is_detected_and_reloaded(self, registry, models_dir):
+        old = registry.active
+        os.utime(models_dir / "v1.joblib", ns=(0, 0))
+        assert list(registry.changed_versions()) == ["v1"]
+        registry.reload("v1")
+        assert registry.active is not old
+        assert registry.changed_versions() == {}
+
+
+@pytest.fixture
+def client(registry, monkeypatch):
+    monkeypatch.setattr(app_module, "model_registry", registry)
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+    app_module.prediction_cache.clear()
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+    app_module.prediction_cache.clear()
+
+
+class TestModelVersionsAPI:
+    """Test version pinning and activation over HTTP."""
+
+    def test_response_carries_model_version(self, client):
+        data = json.loads(client.post('/api/predict', json=app_module.WARMUP_RECORD).data)
+        assert data['model_version'] == 'v1'
+
+    def test_pin_version_by_header_and_query(self, client):
+        by_header = client.post(
+            '/api/predict', json=app_module.WARMUP_RECORD, headers={'X-Model-Version': 'v2'}
+        )
+        assert json.loads(by_header.data)['model_version'] == 'v2'
+        by_query = client.post('/api/predict/batch?model_version=v2', json=[app_module.WARMUP_RECORD])
+        assert json.loads(by_query.data)['model_version'] == 'v2'
+
+    def test_unknown_version_is_404(self, client):
+        response = client.post(
+            '/api/predict', json=app_module.WARMUP_RECORD, headers={'X-Model-Version': 'nope'}
+        )
+        assert response.status_code == 404
+
+    def test_activate_requires_admin_token(self, client):
+        assert client.post('/api/models/activate', json={'version': 'v2'}).status_code == 401
+        response = client.post(
+            '/api/models/activate', json={'version': 'v2'}, headers={'X-Admin-Token': 'secret'}
+        )
+        assert response.status_code == 200
+        assert json.loads(client.get('/api/models').data)['active'] == 'v2'
+        data = json.loads(client.post('/api/predict', json=app_module.WARMUP_RECORD).data)
+        assert data['model_version'] == 'v2'
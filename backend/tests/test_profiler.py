@@ -0,0 +1,132 @@
+"""
+Tests for the on-demand sampling profiler and the /api/profile endpoint.
+"""
+
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+import app as app_module
+from profiler import ProfilerBusy, SamplingProfiler
+from tests.samples import STUDENT
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture(autouse=True)
+def warm_app():
+    """Wait for the app's background model warm-up, which would otherwise take
+    the GIL from the sampler and show up among the traced allocations."""
+    assert app_module.model_ready.wait(30)
+
+
+def busy_handler(profiler, label, seconds, tagged=False):
+    """A request thread spending ``seconds`` in ``spin``."""
+    def spin(until):
+        while time.perf_counter() < until:
+            pass
+
+    def run():
+        profiler.enter(label, tagged)
+        spin(time.perf_counter() + seconds)
+        profiler.leave()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def start_session(profiler, seconds, **kwargs):
+    """Run a session on a background thread; returns once it is active."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(report=profiler.run(seconds, **kwargs)))
+    thread.start()
+    while not profiler.active:
+        time.sleep(0.001)
+    return thread, result
+
+
+class TestSamplingProfiler:
+    """Test stack sampling, request counting and allocation tracing."""
+
+    def test_collapsed_stacks_of_requests_in_flight(self):
+        profiler = SamplingProfiler()
+        session, result = start_session(profiler, 5, requests=2, interval=0.002)
+        workers = [busy_handler(profiler, "POST /api/predict", 0.1) for _ in range(2)]
+        for thread in workers + [session]:
+            thread.join()
+        report = result["report"]
+        assert report["stopped_by"] == "requests" and report["requests"] == 2
+        lines = report["collapsed"].splitlines()
+        assert lines and all(line.startswith("POST /api/predict;") for line in lines)
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == report["samples"] > 10
+        assert any(";spin (test_profiler.py:" in line for line in lines)
+        assert not profiler.active
+
+    def test_tagged_only_ignores_other_requests(self):
+        profiler = SamplingProfiler()
+        session, result = start_session(profiler, 0.3, interval=0.002, tagged_only=True)
+        untagged = busy_handler(profiler, "POST /api/predict", 0.1)
+        untagged.join()
+        session.join()
+        assert result["report"]["samples"] == 0 and result["report"]["requests"] == 0
+
+    def test_one_session_at_a_time_and_allocations(self):
+        profiler = SamplingProfiler()
+        session, result = start_session(profiler, 0.2, allocations=True, top=5)
+        with pytest.raises(ProfilerBusy):
+            profiler.run(0.1)
+        kept = [bytearray(1000) for _ in range(200)]
+        session.join()
+        allocations = result["report"]["allocations"]
+        assert 1 <= len(allocations["top"]) <= 5 and allocations["peak_kb"] > 190
+        assert "test_profiler.py" in allocations["top"][0]["site"]
+        assert not tracemalloc.is_tracing() and kept
+
+
+class TestProfileEndpoint:
+    """Test /api/profile against live requests."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(app_module, "ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(app_module, "GEMINI_API_KEY", "")
+        app_module.prediction_cache.clear()
+        return app_module.app.test_client()
+
+    def profile(self, client, options, query=""):
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(
+            response=client.post("/api/profile" + query, json=options, headers=ADMIN)))
+        thread.start()
+        while not app_module.profiler.active:
+            time.sleep(0.001)
+        return thread, result
+
+    def test_profiles_requests_until_count(self, client):
+        thread, result = self.profile(client, {"seconds": 10, "requests": 5, "interval_ms": 1})
+        for i in range(5):
+            assert client.post("/api/predict", json=dict(STUDENT, age=18 + i)).status_code == 200
+        thread.join()
+        data = result["response"].get_json()
+        assert data["success"] and data["stopped_by"] == "requests" and data["requests"] == 5
+        assert all(line.startswith("POST /api/predict;") for line in data["collapsed"].splitlines())
+        assert client.get("/api/stats").get_json()["profiler"]["sessions"] >= 1
+
+    def test_collapsed_format_with_opt_in_header(self, client):
+        thread, result = self.profile(client, {"seconds": 10, "requests": 1, "tagged_only": True}, "?format=collapsed")
+        client.post("/api/predict", json=STUDENT)
+        assert app_module.profiler.active
+        client.post("/api/predict", json=STUDENT, headers={"X-Profile": "1"})
+        thread.join()
+        response = result["response"]
+        assert response.status_code == 200 and response.mimetype == "text/plain"
+
+    def test_guarded_and_validated(self, client):
+        assert client.post("/api/profile", json={"seconds": 1}).status_code == 401
+        too_long = client.post("/api/profile", json={"seconds": 3600}, headers=ADMIN)
+        assert too_long.status_code == 400
+        assert client.post("/api/profile", json={"seconds": "x"}, headers=ADMIN).status_code == 400
+        assert not app_module.profiler.active
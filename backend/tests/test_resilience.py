@@ -0,0 +1,157 @@
+"""
+Tests for the Gemini deadline / bulkhead / circuit breaker guard.
+"""
+
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    BulkheadFull,
+    CircuitBreaker,
+    CircuitOpen,
+    DeadlineExceeded,
+    GuardedCall,
+)
+from tests.fake_gemini import FakeGemini
+from tests.samples import STUDENT
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+
+    def test_opens_after_consecutive_failures(self, clock):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.allow() is False
+
+    def test_half_open_probe_closes_on_success(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow() is True
+        assert breaker.allow() is False  # only one probe at a time
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_reopens(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        assert breaker.allow() is True
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.times_opened == 2
+
+
+class TestGuardedCall:
+    """Test deadline and bulkhead behaviour."""
+
+    def test_deadline(self):
+        gate = threading.Event()
+        guard = GuardedCall(timeout=0.05, max_concurrent=2, failure_threshold=5, reset_timeout=10)
+        with pytest.raises(DeadlineExceeded):
+            guard.call(gate.wait, 5)
+        assert guard.stats()["timeouts"] == 1
+        gate.set()
+
+    def test_timed_out_calls_hold_their_slot(self):
+        gate = threading.Event()
+        guard = GuardedCall(timeout=0.05, max_concurrent=1, failure_threshold=5, reset_timeout=10)
+        with pytest.raises(DeadlineExceeded):
+            guard.call(gate.wait, 5)
+        with pytest.raises(BulkheadFull):
+            guard.call(lambda: "ok")
+        gate.set()
+        deadline = time.monotonic() + 5
+        while guard.stats()["in_flight"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert guard.call(lambda: "ok") == "ok"
+
+    def test_breaker_short_circuits(self):
+        guard = GuardedCall(timeout=1, max_concurrent=2, failure_threshold=2, reset_timeout=60)
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                guard.call(FakeGemini(error=RuntimeError("boom")).generate_content, "p")
+        with pytest.raises(CircuitOpen):
+            guard.call(lambda: "never called")
+        stats = guard.stats()
+        assert stats["breaker_state"] == OPEN
+        assert stats["short_circuited"] == 1
+        assert stats["fallbacks"] == 1
+
+    def test_stream_shares_one_deadline(self):
+        guard = GuardedCall(timeout=0.2, max_concurrent=1, failure_threshold=5, reset_timeout=60)
+
+        def slow_items(n, pause):
+            for i in range(n):
+                time.sleep(pause)
+                yield i
+
+        assert list(guard.stream(slow_items, 3, 0.01)) == [0, 1, 2]
+        received = []
+        with pytest.raises(DeadlineExceeded):
+            for item in guard.stream(slow_items, 10, 0.05):
+                received.append(item)
+        assert 1 <= len(received) < 10
+        # The timed-out producer keeps its slot until it notices it was stopped
+        with pytest.raises(BulkheadFull):
+            list(guard.stream(slow_items, 1, 0))
+        time.sleep(0.1)
+        stats = guard.stats()
+        assert (stats["successes"], stats["timeouts"], stats["in_flight"]) == (1, 1, 0)
+
+
+@pytest.fixture
+def guarded_app(gemini_app, monkeypatch):
+    """``gemini_app`` behind a 50 ms, two-failure guard; returns its FakeGemini."""
+    monkeypatch.setattr(
+        app_module, "gemini_guard",
+        GuardedCall(timeout=0.05, max_concurrent=2, failure_threshold=2, reset_timeout=60)
+    )
+    return gemini_app
+
+
+class TestGeminiFallbacks:
+    """Test generate_suggestions falls back to basic suggestions when Gemini is unhealthy."""
+
+    form_data = {
+        'study_hours_per_day': '2', 'attendance_percentage': '70',
+        'social_media_hours': '5', 'sleep_hours': '5', 'exercise_frequency': '0'
+    }
+
+    def test_slow_gemini_falls_back(self, guarded_app):
+        gate = guarded_app.gate = threading.Event()
+        suggestions = app_module.generate_suggestions(self.form_data, 50)
+        gate.set()
+        assert suggestions == app_module.generate_basic_suggestions(self.form_data, 50)
+
+    def test_open_breaker_skips_gemini(self, guarded_app):
+        guarded_app.error = RuntimeError("503")
+        assert app_module.generate_suggestions(self.form_data, 50) is None
+        assert app_module.generate_suggestions(self.form_data, 50) is None
+        suggestions = app_module.generate_suggestions(self.form_data, 50)
+        assert guarded_app.calls == 2
+        assert suggestions == app_module.generate_basic_suggestions(self.form_data, 50)
+        assert app_module.gemini_guard.stats()["breaker_state"] == OPEN
+
+    def test_fallback_response_is_not_cached(self, guarded_app):
+        client = app_module.app.test_client()
+        guarded_app.delay = 0.5
+        first = client.post('/api/predict', json=STUDENT).get_json()
+        assert first["suggestions"] == app_module.generate_basic_suggestions(STUDENT, first["prediction"])
+        # Gemini recovers: the same request must reach it instead of the cached fallback
+        guarded_app.delay = 0
+        second = client.post('/api/predict', json=STUDENT).get_json()
+        assert second["suggestions"] == ["Study more.", "Sleep 8 hours.", "Attend every class."]
+        assert guarded_app.calls == 2
@@ -0,0 +1,114 @@
+"""
+Tests for the offline parallel scoring CLI (score_file.py).
+"""
+
+import json
+import os
+
+import joblib
+import pandas as pd
+import pytest
+
+import score_file
+from scoring import prepare_frame, score_frame
+from tests.samples import STUDENT
+
+
+def students(n):
+    rows = [dict(STUDENT, id=i, age=17 + i % 8, study_hours_per_day=round(i % 80 * 0.1, 1)) for i in range(n)]
+    rows[3]["age"] = -1
+    return pd.DataFrame(rows)
+
+
+def expected_scores(frame):
+    model = joblib.load(os.path.join(score_file.MODELS_DIR, "ridge_pipeline.joblib"))
+    features, errors = prepare_frame(frame)
+    return pd.Series(score_frame(model, features), index=features.index).reindex(frame.index), errors
+
+
+def score(*argv):
+    return score_file.run(score_file.parse_args([str(a) for a in argv]))
+
+
+@pytest.fixture
+def csv_input(tmp_path):
+    frame = students(3000)
+    path = tmp_path / "students.csv"
+    frame.to_csv(path, index=False)
+    return frame, path
+
+
+class TestCsvScoring:
+    """Test sharded CSV scoring against the in-process pipeline."""
+
+    def test_shards_merge_in_input_order(self, csv_input, tmp_path):
+        frame, path = csv_input
+        shards = score_file.csv_shards(path, 20000)
+        assert len(shards) > 3
+        assert shards[0][0] > 0 and shards[-1][1] == os.path.getsize(path)
+
+        output = tmp_path / "scores.csv"
+        rows, rejected = score(path, output, "--workers", 2, "--shard-mb", 0.02, "--chunk-rows", 250,
+                               "--keep", "id")
+        assert (rows, rejected) == (3000, 1)
+        result = pd.read_csv(output)
+        expected, _ = expected_scores(frame)
+        assert list(result.columns) == ["id", "prediction", "error"]
+        assert result["id"].tolist() == list(range(3000))
+        assert result["prediction"].round(6).equals(expected.round(6).rename("prediction"))
+        assert result.loc[3, "error"] == "age must be between 5 and 100, got '-1'"
+        assert not os.path.exists(str(output) + ".parts")
+
+    def test_suggestions_column(self, csv_input, tmp_path):
+        _, path = csv_input
+        output = tmp_path / "scores.csv"
+        score(path, output, "--workers", 1, "--suggestions", 3)
+        result = pd.read_csv(output)
+        lists = [json.loads(s) for s in result["suggestions"].dropna()]
+        assert len(lists) == 2999 and all(1 <= len(s) <= 3 for s in lists)
+        assert pd.isna(result.loc[3, "suggestions"])
+
+    def test_resume_skips_finished_shards(self, csv_input, tmp_path):
+        _, path = csv_input
+        output = tmp_path / "scores.csv"
+        args = [path, output, "--workers", 1, "--shard-mb", 0.05, "--keep-parts"]
+        score(*args)
+        first = output.read_bytes()
+        parts_dir = str(output) + ".parts"
+        parts = sorted(p for p in os.listdir(parts_dir) if p.startswith("part-"))
+        os.remove(os.path.join(parts_dir, parts[1]))
+
+        rows, _ = score(*args, "--resume")
+        assert rows < 3000 / len(parts) * 2
+        assert output.read_bytes() == first
+
+        with pytest.raises(SystemExit):
+            score(path, output, "--workers", 1, "--shard-mb", 0.05, "--keep", "id", "--resume")
+
+
+class TestParquetScoring:
+    """Test row-group shards and Parquet output."""
+
+    def test_parquet_round_trip(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        frame = students(2000)
+        path = tmp_path / "students.parquet"
+        frame.to_parquet(path, row_group_size=300)
+        assert len(score_file.parquet_shards(path, 600)) == 4
+
+        output = tmp_path / "scores.parquet"
+        score(path, output, "--workers", 2, "--shard-rows", 600, "--keep", "id,gender", "--suggestions", 2)
+        result = pd.read_parquet(output)
+        expected, _ = expected_scores(frame)
+        assert result["id"].tolist() == list(range(2000))
+        assert result["gender"].tolist() == frame["gender"].tolist()
+        assert result["prediction"].round(6).equals(expected.round(6).rename("prediction"))
+        assert result.loc[3, "error"] == "age must be between 5 and 100, got -1"
+        assert result.loc[3, "suggestions"] is None and len(result.loc[0, "suggestions"]) <= 2
+
+    def test_parquet_without_pyarrow(self, csv_input, tmp_path, hide_module):
+        _, path = csv_input
+        hide_module("pyarrow")
+        with pytest.raises(SystemExit, match="needs pyarrow"):
+            score(path, tmp_path / "scores.parquet")
+        assert not os.path.exists(str(tmp_path / "scores.parquet") + ".parts")
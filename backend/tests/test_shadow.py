@@ -0,0 +1,138 @@
+"""
+Tests for shadow scoring of candidate models.
+"""
+
+import shutil
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as app_module
+from model_registry import ModelRegistry
+from shadow import ShadowScorer
+from tests.samples import student, students
+
+SHIFT = 2.0
+
+
+@pytest.fixture
+def registry(tmp_path):
+    shutil.copy(app_module.MODEL_PATH, tmp_path / "v1.joblib")
+    shutil.copy(app_module.MODEL_PATH, tmp_path / "same.joblib")
+    pipeline = joblib.load(app_module.MODEL_PATH)
+    pipeline.steps[-1][1].intercept_ += SHIFT
+    joblib.dump(pipeline, tmp_path / "shift.joblib")
+    registry = ModelRegistry(str(tmp_path), "v1", app_module.build_predictor, app_module.WARMUP_RECORD)
+    registry.activate("v1")
+    return registry
+
+
+def offer_students(shadow, registry, n, version="v1"):
+    for i in range(n):
+        features = app_module.parse_record(student(i))
+        shadow.offer(features, version, app_module.predict_record(registry.get(version).scorer, features))
+
+
+class TestShadowScorer:
+    """Test sampling, the bounded queue and the per-candidate statistics."""
+
+    def test_agreement_and_drift_per_candidate(self, registry):
+        shadow = ShadowScorer(registry.get, ["same", "shift"], sample_rate=1.0, batch_size=16)
+        offer_students(shadow, registry, 40)
+        assert shadow.flush()
+        same, shift = shadow.report()["models"]
+        assert same["compared"] == shift["compared"] == 40
+        assert same["agreement"] == 1.0 and same["max_abs_delta"] == pytest.approx(0, abs=1e-9)
+        assert same["psi"] == pytest.approx(0, abs=1e-9)
+        assert shift["mean_delta"] == pytest.approx(SHIFT) and shift["rmse"] == pytest.approx(SHIFT)
+        assert shift["agreement"] == 0.0
+        assert shift["candidate_mean"] > shift["serving_mean"]
+        assert shift["serving_std"] == same["candidate_std"]
+        assert sum(shift["abs_delta_histogram"].values()) == 40
+        assert shadow.stats()["batches"] >= 3
+        shadow.close()
+
+    def test_sampling(self, registry):
+        shadow = ShadowScorer(registry.get, ["same"], sample_rate=0.5, rng=np.random.default_rng(7))
+        offer_students(shadow, registry, 4)
+        features, _ = app_module.prepare_frame(pd.DataFrame(students(100)))
+        raw = app_module.predict_frame(registry.get("v1").scorer, features)
+        taken = shadow.offer_frame(features, "v1", raw)
+        # Same seed, same draws: the single records take the first 4, the frame the next 100
+        draws = np.random.default_rng(7).random(104)
+        assert taken == int((draws[4:] < 0.5).sum())
+        assert shadow.flush() and shadow.stats()["sampled"] == int((draws < 0.5).sum())
+        assert shadow.report()["models"][0]["compared"] == shadow.stats()["sampled"]
+        assert not ShadowScorer(registry.get, ["same"], sample_rate=0).offer({}, "v1", 1.0)
+        shadow.close()
+
+    def test_failed_batch_does_not_stop_the_worker(self, registry):
+        shadow = ShadowScorer(registry.get, ["shift"], sample_rate=1.0)
+        shadow.offer(42, "v1", 1.0)
+        assert shadow.flush()
+        offer_students(shadow, registry, 3)
+        assert shadow.flush()
+        assert shadow.stats()["failed_batches"] == 1
+        assert shadow.report()["models"][0]["compared"] == 3
+        shadow.close()
+
+    def test_queue_is_bounded(self, registry):
+        gate = threading.Event()
+
+        def slow_resolve(version):
+            gate.wait(5)
+            return registry.get(version)
+
+        shadow = ShadowScorer(slow_resolve, ["shift"], sample_rate=1.0, max_queue=5, batch_size=1)
+        offer_students(shadow, registry, 12)
+        stats = shadow.stats()
+        assert (stats["sampled"], stats["dropped"]) == (5, 7)
+        gate.set()
+        assert shadow.flush()
+        assert shadow.report()["models"][0]["compared"] == 5
+        shadow.close()
+
+    def test_pinned_rows_and_missing_candidates(self, registry):
+        shadow = ShadowScorer(registry.get, ["v1", "missing"], sample_rate=1.0)
+        offer_students(shadow, registry, 3)
+        assert shadow.flush()
+        pinned, missing = shadow.report()["models"]
+        assert pinned["compared"] == 0 and pinned["errors"] == 0
+        assert missing["compared"] == 0 and missing["errors"] == 1 and "missing" in missing["last_error"]
+        shadow.close()
+
+
+@pytest.fixture
+def client(api_client, registry, monkeypatch):
+    monkeypatch.setattr(app_module, "model_registry", registry)
+    monkeypatch.setattr(app_module, "shadow", ShadowScorer(registry.get, ["shift"], sample_rate=1.0))
+    yield api_client
+    app_module.shadow.close()
+
+
+class TestShadowAPI:
+    """Test that live predictions feed the report without changing responses."""
+
+    def test_predictions_are_shadowed_and_reported(self, client):
+        served = client.post("/api/predict", json=student(1)).get_json()
+        expected = round(app_module.predict_record(app_module.model_registry.get("v1").scorer,
+                                                   app_module.parse_record(student(1))), 2)
+        assert served["model_version"] == "v1" and served["prediction"] == expected
+        batch = client.post("/api/predict/batch", json=students(5)[2:])
+        assert batch.status_code == 200
+
+        report = client.get("/api/models/shadow").get_json()
+        assert report["success"] and report["queue"]["sampled"] == 4
+        (shift,) = report["models"]
+        assert shift["version"] == "shift" and shift["compared"] == 4
+        assert shift["mean_delta"] == pytest.approx(SHIFT)
+        assert client.get("/api/stats").get_json()["shadow"]["scored"] == 4
+
+    def test_reset_requires_admin(self, client):
+        client.post("/api/predict", json=student(1))
+        assert client.delete("/api/models/shadow").status_code == 401
+        assert client.delete("/api/models/shadow", headers={"X-Admin-Token": "secret"}).get_json()["success"]
+        assert client.get("/api/models/shadow").get_json()["models"][0]["compared"] == 0
@@ -0,0 +1,55 @@
+"""
+Tests for lazy imports, background model warm-up and the readiness probe.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import app as app_module
+
+
+@pytest.fixture
+def client():
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+class TestStartup:
+    """Test startup behaviour."""
+
+    def test_import_does_not_load_gemini_sdk(self):
+        code = "import sys, app; print('google.generativeai' in sys.modules)"
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True,
+            env=dict(os.environ, GEMINI_API_KEY="dummy-key"), check=True
+        )
+        lines = out.stdout.splitlines()
+        assert "False" in lines
+        assert "True" not in lines
+
+    def test_ready_after_warmup(self, client):
+        assert app_module.model_ready.wait(30)
+        response = client.get('/api/ready')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['ready'] is True
+        for phase in ('import_seconds', 'load_seconds', 'build_seconds', 'smoke_seconds', 'ready_seconds'):
+            assert data['startup'][phase] >= 0
+
+    def test_requests_get_503_while_loading(self, client, monkeypatch):
+        monkeypatch.setattr(app_module, 'model_ready', threading.Event())
+        monkeypatch.setattr(app_module, 'MODEL_READY_TIMEOUT', 0)
+        assert client.get('/api/ready').status_code == 503
+        response = client.post('/api/predict', json=app_module.WARMUP_RECORD)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert client.post('/api/predict/batch', json=[app_module.WARMUP_RECORD]).status_code == 503
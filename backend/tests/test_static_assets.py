@@ -0,0 +1,101 @@
+"""
+Tests for the in-memory frontend asset manifest and how assets are served.
+"""
+
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+import static_assets
+from static_assets import AssetManifest
+
+CSS = ("body { color: #333; margin: 0 auto; }\n" * 40).encode()
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "index.html").write_bytes(b"<html><body>" + b"hello " * 100 + b"</body></html>")
+    (tmp_path / "app.3f9a1c2b.css").write_bytes(CSS)
+    (tmp_path / "tiny.txt").write_bytes(b"x")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "dep.js").write_bytes(b"var x;")
+    return tmp_path
+
+
+@pytest.fixture
+def client(site, monkeypatch):
+    monkeypatch.setattr(app_module, "FRONTEND_DIR", str(site))
+    monkeypatch.setattr(app_module, "frontend_assets", AssetManifest(str(site)))
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+class TestAssetManifest:
+    """Test manifest building and reloading."""
+
+    def test_variants_and_exclusions(self, site):
+        manifest = AssetManifest(str(site))
+        css = manifest.get("app.3f9a1c2b.css")
+        assert gzip.decompress(css.variants["gzip"]) == CSS
+        assert css.hashed_name
+        assert set(manifest.get("tiny.txt").variants) == {"identity"}  # too small to compress
+        assert manifest.get("node_modules/dep.js") is None
+
+    def test_reload_if_changed(self, site):
+        manifest = AssetManifest(str(site), check_interval=0)
+        old = manifest.get("index.html").etag()
+        assert manifest.reload_if_changed() is False
+        (site / "index.html").write_bytes(b"<html>changed</html>")
+        os.utime(site / "index.html", ns=(1, 1))
+        assert manifest.reload_if_changed() is True
+        assert manifest.get("index.html").etag() != old
+
+
+class TestServing:
+    """Test ETags, 304s, content negotiation and cache headers."""
+
+    def test_etag_and_not_modified(self, client):
+        first = client.get('/')
+        assert first.status_code == 200
+        assert first.headers["Cache-Control"] == "no-cache"
+        again = client.get('/', headers={"If-None-Match": first.headers["ETag"]})
+        assert again.status_code == 304
+        assert again.data == b""
+
+    def test_accept_encoding_negotiation(self, client):
+        plain = client.get('/app.3f9a1c2b.css', headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in plain.headers and plain.data == CSS
+        gz = client.get('/app.3f9a1c2b.css', headers={"Accept-Encoding": "gzip"})
+        assert gz.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(gz.data) == CSS
+        assert gz.headers["Vary"] == "Accept-Encoding"
+        assert gz.headers["ETag"] != plain.headers["ETag"]
+        if static_assets.brotli is not None:
+            br = client.get('/app.3f9a1c2b.css', headers={"Accept-Encoding": "gzip, br"})
+            assert br.headers["Content-Encoding"] == "br"
+            refused = client.get('/app.3f9a1c2b.css', headers={"Accept-Encoding": "gzip, br;q=0"})
+            assert refused.headers["Content-Encoding"] == "gzip"
+
+    def test_gzip_only_without_brotli(self, client, site, hide_module, monkeypatch):
+        (module,) = hide_module("brotli", static_assets)
+        monkeypatch.setattr(app_module, "frontend_assets", module.AssetManifest(str(site)))
+        assert set(app_module.frontend_assets.get("app.3f9a1c2b.css").variants) == {"identity", "gzip"}
+        response = client.get('/app.3f9a1c2b.css', headers={"Accept-Encoding": "br, gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.data) == CSS
+
+    def test_hashed_files_are_immutable(self, client):
+        response = client.get('/app.3f9a1c2b.css')
+        assert "immutable" in response.headers["Cache-Control"]
+        digest = app_module.frontend_assets.get("index.html").digest
+        assert "immutable" in client.get(f'/index.html?v={digest[:12]}').headers["Cache-Control"]
+
+    def test_files_outside_manifest_fall_back_to_disk(self, client):
+        assert client.get('/node_modules/dep.js').data == b"var x;"
+        assert client.get('/missing.js').status_code == 404
@@ -0,0 +1,129 @@
+"""
+Tests for streaming suggestions over Server-Sent Events (/api/predict/stream).
+"""
+
+import json
+import random
+import threading
+
+import pytest
+
+import app as app_module
+from resilience import GuardedCall
+from suggestion_stream import SuggestionParser
+from tests.fake_gemini import FakeGemini
+from tests.samples import STUDENT
+
+ANSWER = "Here is my advice:\n1. Study two more hours.\n- Sleep 8 hours.\n• Eat well\n2) Attend class.\n3. Exercise.\n4. Six."
+
+
+def legacy_parse(text):
+    """parse_suggestions as it was before streaming, for comparison."""
+    suggestions_text = text.strip()
+    suggestions = []
+    for line in suggestions_text.split('\n'):
+        line = line.strip()
+        if line and (line[0].isdigit() or line.startswith('•') or line.startswith('-')):
+            suggestion = line.lstrip('0123456789.-) ').strip()
+            if suggestion:
+                suggestions.append(suggestion)
+    if not suggestions:
+        suggestions = [s.strip() for s in suggestions_text.split('\n') if s.strip()]
+    return suggestions[:5]
+
+
+def sse_events(chunks):
+    """``[(event, data), ...]`` from the chunks of an event-stream body."""
+    events = []
+    for block in b"".join(chunks).decode().split("\n\n"):
+        if block:
+            fields = dict(line.split(": ", 1) for line in block.split("\n"))
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def client(gemini_app, monkeypatch):
+    monkeypatch.setattr(app_module, "gemini_guard", GuardedCall(
+        timeout=2, max_concurrent=4, failure_threshold=3, reset_timeout=60))
+    return app_module.app.test_client()
+
+
+class TestSuggestionParser:
+    """Test the incremental parser against the original whole-text parser."""
+
+    @pytest.mark.parametrize("text", [
+        ANSWER,
+        "Plain one\n\nPlain two\r\nPlain three",
+        "Intro\n1.\n-\nnot a list",
+        "1. a\n2. b\n3. c\n4. d\n5. e\n6. f\n7. g",
+        "  - lead\nplain after\n",
+        "",
+    ])
+    def test_any_chunking_matches_parse_suggestions(self, text):
+        rng = random.Random(0)
+        for _ in range(50):
+            parser, streamed, i = SuggestionParser(), [], 0
+            while i < len(text):
+                n = rng.randint(1, 6)
+                streamed += parser.feed(text[i:i + n])
+                i += n
+            streamed += parser.close()
+            assert streamed == legacy_parse(text) == app_module.parse_suggestions(text)
+
+    def test_bulleted_lines_come_out_when_complete(self):
+        parser = SuggestionParser()
+        assert parser.feed("Intro\n1. Stu") == []
+        assert parser.feed("dy more.\n2") == ["Study more."]
+        assert parser.feed(". Sleep.\n") == ["Sleep."]
+        assert parser.close() == []
+
+
+class TestPredictStream:
+    """Test the event sequence, caching and fallbacks of /api/predict/stream."""
+
+    def test_prediction_then_suggestions_then_done(self, client, monkeypatch):
+        monkeypatch.setattr(app_module, "_gemini_model", FakeGemini(ANSWER, chunk_size=5))
+        events = sse_events(client.post("/api/predict/stream", json=STUDENT).response)
+        expected = legacy_parse(ANSWER)
+        assert events[0][0] == "prediction" and events[0][1]["success"]
+        assert events[1:-1] == [("suggestion", {"index": i, "text": t}) for i, t in enumerate(expected)]
+        assert events[-1] == ("done", {"suggestions": expected, "source": "gemini"})
+        prediction = client.post("/api/predict", json=STUDENT).get_json()
+        assert prediction["prediction"] == events[0][1]["prediction"]
+        assert prediction["suggestions"] == expected
+
+    def test_prediction_is_sent_before_gemini_answers(self, client, monkeypatch):
+        gate = threading.Event()
+        monkeypatch.setattr(app_module, "_gemini_model", FakeGemini(gate=gate))
+        response = client.post("/api/predict/stream", json=STUDENT, buffered=False)
+        chunks = response.iter_encoded()
+        first = next(chunks)
+        assert sse_events([first])[0][0] == "prediction"
+        gate.set()
+        events = sse_events(list(chunks))
+        assert events[-1][1]["source"] == "gemini"
+        assert response.headers["Content-Type"].startswith("text/event-stream")
+
+    def test_error_mid_stream_falls_back_to_basic(self, client, monkeypatch):
+        monkeypatch.setattr(app_module, "_gemini_model", FakeGemini(
+            ANSWER, chunk_size=40, error=RuntimeError("stream broke"), error_after=2))
+        events = sse_events(client.post("/api/predict/stream", json=STUDENT).response)
+        prediction = events[0][1]["prediction"]
+        basic = app_module.generate_basic_suggestions(STUDENT, prediction)
+        assert events[1] == ("suggestion", {"index": 0, "text": "Study two more hours."})
+        assert events[-2] == ("fallback", {"suggestions": basic, "reason": "suggestions could not be generated"})
+        assert events[-1] == ("done", {"suggestions": basic, "source": "basic"})
+        # Fallbacks are not cached: the next request asks Gemini again
+        monkeypatch.setattr(app_module, "_gemini_model", FakeGemini(ANSWER))
+        again = sse_events(client.post("/api/predict/stream", json=STUDENT).response)
+        assert again[-1][1]["source"] == "gemini"
+
+    def test_without_api_key_and_bad_input(self, client, monkeypatch):
+        monkeypatch.setattr(app_module, "GEMINI_API_KEY", "")
+        events = sse_events(client.post("/api/predict/stream", json=STUDENT).response)
+        basic = app_module.generate_basic_suggestions(STUDENT, events[0][1]["prediction"])
+        assert [e for e, _ in events] == ["prediction"] + ["suggestion"] * len(basic) + ["done"]
+        assert events[-1][1] == {"suggestions": basic, "source": "basic"}
+        bad = client.post("/api/predict/stream", json=dict(STUDENT, age=-3))
+        assert bad.status_code == 400 and bad.get_json()["errors"]
@@ -0,0 +1,83 @@
+"""
+Tests for the bucketed, persistent Gemini suggestion cache.
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from suggestion_cache import SuggestionStore, profile_key
+from tests.fake_gemini import FakeGemini
+
+
+@pytest.fixture
+def profile():
+    return {
+        "age": 20, "gender": "Male", "study_hours_per_day": 5.4,
+        "social_media_hours": 2.0, "part_time_job": "No", "attendance_percentage": 90,
+        "sleep_hours": 7.5, "diet_quality": "Good", "exercise_frequency": 3,
+        "parental_education_level": "Bachelor", "internet_Resource_accessibility": "Good",
+        "extracurricular_participation": "Yes",
+    }
+
+
+class TestProfileKey:
+    """Test profile bucketing."""
+
+    def test_similar_profiles_share_a_key(self, profile):
+        close = dict(profile, study_hours_per_day="5.5", gender=" male ")
+        assert profile_key(profile, 81.2) == profile_key(close, 80.1)
+
+    def test_different_profiles_get_different_keys(self, profile):
+        assert profile_key(profile, 80) != profile_key(dict(profile, study_hours_per_day=2), 80)
+        assert profile_key(profile, 80) != profile_key(dict(profile, part_time_job="Yes"), 80)
+        assert profile_key(profile, 80) != profile_key(profile, 60)
+
+    def test_unparseable_profile_has_no_key(self, profile):
+        assert profile_key(dict(profile, age="twenty"), 80) is None
+
+
+class TestSuggestionStore:
+    """Test the SQLite-backed store."""
+
+    def test_entries_survive_reopen(self, tmp_path):
+        path = str(tmp_path / "suggestions.sqlite3")
+        store = SuggestionStore(path, ttl=60)
+        store.put("k", ["a", "b"])
+        store.close()
+        reopened = SuggestionStore(path, ttl=60)
+        assert reopened.get("k") == ["a", "b"]
+        assert reopened.stats()["hits"] == 1
+
+    def test_expired_entries_miss(self, tmp_path):
+        store = SuggestionStore(str(tmp_path / "s.sqlite3"), ttl=60)
+        store.put("k", ["a"])
+        with patch("suggestion_cache.time.time", return_value=10 ** 12):
+            assert store.get("k") is None
+
+    def test_empty_path_disables(self):
+        store = SuggestionStore("", ttl=60)
+        store.put("k", ["a"])
+        assert store.get("k") is None
+
+
+class TestGeminiSuggestionCaching:
+    """Test generate_suggestions only calls Gemini once per profile bucket."""
+
+    def test_gemini_called_once_per_bucket(self, profile, tmp_path, monkeypatch):
+        fake = FakeGemini()
+        monkeypatch.setattr(app_module, "GEMINI_API_KEY", "test-key")
+        monkeypatch.setattr(app_module, "_gemini_model", fake)
+        monkeypatch.setattr(
+            app_module, "suggestion_store", SuggestionStore(str(tmp_path / "s.sqlite3"), ttl=60)
+        )
+        first = app_module.generate_suggestions(profile, 81.0)
+        second = app_module.generate_suggestions(dict(profile, study_hours_per_day=5.5), 80.5)
+        assert first == second == ["Study more.", "Sleep 8 hours.", "Attend every class."]
+        assert fake.calls == 1
+        assert app_module.suggestion_store.stats()["hit_ratio"] == 0.5
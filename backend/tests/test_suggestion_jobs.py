@@ -0,0 +1,113 @@
+"""
+Tests for background suggestion jobs and the async /api/predict mode.
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from resilience import GuardedCall
+from suggestion_cache import SuggestionStore
+from suggestion_jobs import FAILED, PENDING, READY, SuggestionJobs
+from tests.fake_gemini import FakeGemini
+from tests.samples import STUDENT
+
+
+def wait_for(jobs, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id)
+        if job["status"] != PENDING:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+class TestSuggestionJobs:
+    """Test the bounded job pool."""
+
+    def test_job_result_and_callback(self):
+        jobs = SuggestionJobs(workers=1, max_pending=5, ttl=60)
+        done = []
+        job_id = jobs.submit(lambda x: [x], "tip", on_done=done.append)
+        assert wait_for(jobs, job_id)["result"] == ["tip"]
+        assert done == [["tip"]]
+        jobs.shutdown()
+
+    def test_failures_are_reported(self):
+        jobs = SuggestionJobs(workers=1, max_pending=5, ttl=60)
+        assert wait_for(jobs, jobs.submit(lambda: None))["status"] == FAILED
+        assert wait_for(jobs, jobs.submit(lambda: 1 / 0))["status"] == FAILED
+        assert jobs.stats()["failed"] == 2
+        jobs.shutdown()
+
+    def test_queue_is_bounded(self):
+        jobs = SuggestionJobs(workers=1, max_pending=1, ttl=60)
+        release = threading.Event()
+        first = jobs.submit(release.wait)
+        assert jobs.submit(lambda: ["x"]) is None
+        assert jobs.stats()["rejected"] == 1
+        release.set()
+        wait_for(jobs, first)
+        jobs.shutdown()
+
+    def test_finished_jobs_expire(self, clock):
+        jobs = SuggestionJobs(workers=1, max_pending=5, ttl=10, clock=clock)
+        job_id = jobs.submit(lambda: ["x"])
+        assert wait_for(jobs, job_id)["status"] == READY
+        clock.now = 11
+        assert jobs.get(job_id) is None
+        jobs.shutdown()
+
+
+@pytest.fixture
+def async_app(gemini_app, tmp_path, monkeypatch):
+    fake = FakeGemini(text="1. Review notes daily.\n2. Sleep more.", gate=threading.Event())
+    monkeypatch.setattr(app_module, "_gemini_model", fake)
+    monkeypatch.setattr(app_module, "suggestion_store", SuggestionStore(str(tmp_path / "s.sqlite3"), 60))
+    monkeypatch.setattr(app_module, "suggestion_jobs", SuggestionJobs(2, 10, 60))
+    yield app_module.app.test_client(), fake
+    fake.gate.set()
+    app_module.suggestion_jobs.shutdown()
+
+
+class TestAsyncPredict:
+    """Test /api/predict?suggestions=async and /api/suggestions/<id>."""
+
+    def test_prediction_returned_before_gemini(self, async_app):
+        client, fake = async_app
+        data = json.loads(client.post('/api/predict?suggestions=async', json=STUDENT).data)
+        assert 0 <= data['prediction'] <= 100
+        assert data['suggestions']  # basic placeholder
+        job = data['suggestions_job']
+        status = json.loads(client.get(job['url']).data)
+        assert status['status'] == 'pending'
+
+        fake.gate.set()
+        wait_for(app_module.suggestion_jobs, job['id'])
+        status = json.loads(client.get(job['url']).data)
+        assert status['status'] == 'ready'
+        assert status['suggestions'] == ["Review notes daily.", "Sleep more."]
+
+        # The finished job also fills the response cache
+        again = json.loads(client.post('/api/predict?suggestions=async', json=STUDENT).data)
+        assert again['suggestions'] == status['suggestions']
+        assert 'suggestions_job' not in again
+
+    def test_fallback_result_is_not_cached(self, async_app, monkeypatch):
+        client, _ = async_app
+        monkeypatch.setattr(app_module, "gemini_guard", GuardedCall(
+            timeout=0.05, max_concurrent=2, failure_threshold=5, reset_timeout=60))
+        data = json.loads(client.post('/api/predict?suggestions=async', json=STUDENT).data)
+        job = wait_for(app_module.suggestion_jobs, data['suggestions_job']['id'])
+        assert job['result'] == app_module.generate_basic_suggestions(STUDENT, data['prediction'])
+        # Gemini timed out, so the next request starts a new job instead of reusing the fallback
+        again = json.loads(client.post('/api/predict?suggestions=async', json=STUDENT).data)
+        assert 'suggestions_job' in again
+
+    def test_unknown_job_is_404(self, async_app):
+        client, _ = async_app
+        assert client.get('/api/suggestions/nope').status_code == 404
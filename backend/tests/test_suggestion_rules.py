@@ -0,0 +1,91 @@
+"""
+Tests for the model-ranked basic suggestions.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from scoring import parse_record, predict_record
+from suggestion_rules import RULES, SuggestionRanker, columns_from_records
+
+STUDENT = {
+    "age": 20, "gender": "Male", "study_hours_per_day": 3,
+    "social_media_hours": 5.0, "part_time_job": "Yes", "attendance_percentage": 70,
+    "sleep_hours": 5, "diet_quality": "Poor", "exercise_frequency": 1,
+    "parental_education_level": "Bachelor", "internet_Resource_accessibility": "Good",
+    "extracurricular_participation": "No",
+}
+
+
+@pytest.fixture(scope="module")
+def model():
+    return app_module.require_model().scorer
+
+
+def cohort(n):
+    return [
+        dict(STUDENT, study_hours_per_day=i % 9, social_media_hours=(i * 7) % 6,
+             attendance_percentage=50 + i % 51, sleep_hours=4 + i % 7, exercise_frequency=i % 8,
+             diet_quality=["Poor", "Fair", "Good", ""][i % 4])
+        for i in range(n)
+    ]
+
+
+class TestSuggestionRanker:
+    """Test gains, ranking and the single-row path."""
+
+    def test_gains_are_model_score_differences(self, model):
+        ranker = SuggestionRanker(model, min_gain=-100)
+        gains, targets = ranker.gains(columns_from_records([STUDENT]))
+        features = parse_record(STUDENT)
+        base = predict_record(model, features)
+        for j, rule in enumerate(RULES):
+            if rule.unpriced:
+                continue
+            changed = dict(features, **{rule.field: targets[j][0]})
+            assert gains[0, j] == pytest.approx(predict_record(model, changed) - base, abs=1e-9)
+
+    def test_ranked_by_gain(self, model):
+        suggestions = SuggestionRanker(model).suggest_one(STUDENT, k=3)
+        assert len(suggestions) == 3
+        assert "study hours from 3 to 5" in suggestions[0]
+        points = [float(s.split("+")[1].split()[0]) for s in suggestions]
+        assert points == sorted(points, reverse=True)
+
+    def test_cohort_matches_single_rows(self, model):
+        students = cohort(300)
+        for ranker in (SuggestionRanker(model), SuggestionRanker(None)):
+            batch = ranker.suggest(columns_from_records(students), k=4)
+            assert batch == [ranker.suggest_one(s, k=4) for s in students]
+
+    def test_oversleeping_is_advised_against(self, model):
+        ranker = SuggestionRanker(model)
+        oversleeper = dict(STUDENT, sleep_hours=11)
+        suggestions = ranker.suggest_one(oversleeper, k=len(RULES))
+        assert "Cut back from 11 to 9 hours of sleep; oversleeping can leave you groggy." in suggestions
+        assert ranker.suggest(columns_from_records([oversleeper]), k=len(RULES))[0] == suggestions
+        for hours in (5, 8, 9):
+            assert not any("Cut back" in s for s in ranker.suggest_one(dict(STUDENT, sleep_hours=hours), k=len(RULES)))
+
+    def test_without_model_rules_keep_listed_order(self):
+        suggestions = SuggestionRanker(None).suggest_one(STUDENT, k=2)
+        assert "study hours" in suggestions[0] and "attendance" in suggestions[1]
+        assert "points" not in suggestions[0]
+
+
+class TestBatchSuggestions:
+    """Test ?suggestions=k on /api/predict/batch."""
+
+    def test_batch_rows_get_ranked_suggestions(self):
+        client = app_module.app.test_client()
+        students = cohort(20)
+        data = client.post('/api/predict/batch?suggestions=3', json=students).get_json()
+        for student, result in zip(students, data["results"]):
+            assert result["suggestions"] == app_module.generate_basic_suggestions(student, result["prediction"])[:3]
+        plain = client.post('/api/predict/batch', json=students).get_json()
+        assert "suggestions" not in plain["results"][0]
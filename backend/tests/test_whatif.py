@@ -0,0 +1,110 @@
+"""
+Tests for what-if grids and the /api/predict/whatif endpoint.
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import joblib
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from compiled_model import compile_pipeline
+from feature_schema import SchemaError
+from scoring import parse_record
+from whatif import GridTooLarge, parse_sweeps, score_grid
+
+STUDENT = {
+    "age": 20, "gender": "Male", "study_hours_per_day": 5.5,
+    "social_media_hours": 2.0, "part_time_job": "No", "attendance_percentage": 90,
+    "sleep_hours": 7.5, "diet_quality": "Good", "exercise_frequency": 3,
+    "parental_education_level": "Bachelor", "internet_Resource_accessibility": "Good",
+    "extracurricular_participation": "Yes",
+}
+
+SWEEPS = [
+    {"field": "study_hours_per_day", "start": 0, "stop": 8, "step": 0.5},
+    {"field": "social_media_hours", "values": [0, 1, 2, 3]},
+    {"field": "diet_quality", "values": ["good", "Fair", "Poor", "Unheard-Of"]},
+]
+
+
+@pytest.fixture
+def client():
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+class TestGrid:
+    """Test sweep parsing and grid scoring."""
+
+    def test_parse_sweeps(self):
+        axes = parse_sweeps(SWEEPS + [{"field": "exercise_frequency", "start": 0, "stop": 3, "step": 0.5}], 10000)
+        study, _, diet, exercise = axes
+        assert study[1][:3] == [0.0, 0.5, 1.0] and study[1][-1] == 8.0
+        assert diet[1] == ["Good", "Fair", "Poor", "Unheard-Of"]
+        assert exercise[1] == [0, 1, 2, 3]  # int field: truncated and de-duplicated
+
+    def test_parse_sweeps_errors(self):
+        with pytest.raises(SchemaError) as excinfo:
+            parse_sweeps([
+                {"field": "nope", "values": [1]},
+                {"field": "age", "values": [200, 300]},
+                {"field": "gender", "start": 0, "stop": 1, "step": 1},
+                {"field": "sleep_hours", "start": 5, "stop": 1, "step": 1},
+            ], 10000)
+        assert [e["code"] for e in excinfo.value.errors] == ["invalid", "out_of_range", "invalid", "invalid"]
+        with pytest.raises(GridTooLarge):
+            parse_sweeps([{"field": "attendance_percentage", "start": 0, "stop": 100, "step": 0.001}], 10000)
+        with pytest.raises(GridTooLarge):
+            parse_sweeps([{"field": "attendance_percentage", "start": 0, "stop": 100, "step": 1e-320}], 10000)
+        with pytest.raises(SchemaError):
+            parse_sweeps([{"field": "attendance_percentage", "start": 0, "stop": 100, "num": float("inf")}], 10000)
+
+    def test_outer_sum_matches_pipeline(self):
+        pipeline = joblib.load(app_module.MODEL_PATH)
+        base = parse_record(STUDENT)
+        axes = parse_sweeps(SWEEPS, 10000)
+        compiled = score_grid(compile_pipeline(pipeline), base, axes)
+        materialized = score_grid(pipeline, base, axes)
+        assert compiled.shape == (17, 4, 4)
+        np.testing.assert_allclose(compiled, materialized, rtol=1e-9, atol=1e-9)
+
+
+class TestWhatIfEndpoint:
+    """Test /api/predict/whatif."""
+
+    def test_cells_match_single_predictions(self, client):
+        response = client.post('/api/predict/whatif', json={"base": STUDENT, "sweeps": SWEEPS})
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data["shape"] == [17, 4, 4]
+        assert data["base_prediction"] == client.post('/api/predict', json=STUDENT).get_json()["prediction"]
+        scenario = dict(STUDENT, study_hours_per_day=1.5, social_media_hours=3, diet_quality="Poor")
+        expected = client.post('/api/predict', json=scenario).get_json()["prediction"]
+        assert data["scores"][3][3][2] == expected
+        assert all(0 <= s <= 100 for s in np.ravel(data["scores"]))
+
+    def test_swept_field_may_be_left_out_of_base(self, client):
+        base = {k: v for k, v in STUDENT.items() if k != "sleep_hours"}
+        response = client.post('/api/predict/whatif', json={
+            "base": base, "sweeps": [{"field": "sleep_hours", "start": 4, "stop": 10, "num": 7}]})
+        assert response.status_code == 200
+        assert response.get_json()["axes"][0]["values"] == [4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
+
+    def test_errors(self, client):
+        response = client.post('/api/predict/whatif', json={"base": {"age": 20}, "sweeps": SWEEPS})
+        assert response.status_code == 400
+        assert {e["field"] for e in response.get_json()["errors"]} >= {"attendance_percentage", "sleep_hours"}
+        assert client.post('/api/predict/whatif', json={"base": STUDENT}).status_code == 400
+        with patch.object(app_module, 'MAX_WHATIF_GRID', 50):
+            response = client.post('/api/predict/whatif', json={"base": STUDENT, "sweeps": SWEEPS})
+        assert response.status_code == 413
+        tiny_step = {"field": "sleep_hours", "start": 4, "stop": 10, "step": 1e-320}
+        response = client.post('/api/predict/whatif', json={"base": STUDENT, "sweeps": [tiny_step]})
+        assert response.status_code == 413 and response.get_json()["success"] is False
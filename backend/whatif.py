@@ -0,0 +1,148 @@
+# backend/whatif.py
+"""What-if grids: one base profile scored under every combination of sweeps.
+
+A sweep varies one input field over explicit ``values`` or an inclusive
+``start``/``stop`` range with a ``step`` (or ``num`` evenly spaced points).
+The cartesian product of all sweeps is scored in one vectorized call. With
+the compiled linear model no grid rows are materialized at all: the score is
+the base score plus one additive term per field, so the grid is an outer sum
+of one short contribution vector per sweep.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from feature_schema import FEATURE_SCHEMA, SchemaError, normalize_str
+
+
+class GridTooLarge(ValueError):
+    """The sweeps expand to more scenarios than the configured cap."""
+
+
+def _error(field, code, message):
+    return {"field": field, "code": code, "message": message}
+
+
+def _range_values(field, spec, max_points):
+    """Explicit list of points for a ``start``/``stop`` sweep (stop included)."""
+    try:
+        start, stop = float(spec["start"]), float(spec["stop"])
+        if "num" in spec:
+            num = int(spec["num"])
+            if num < 1:
+                raise ValueError
+            return num, lambda: np.linspace(start, stop, num).tolist()
+        step = float(spec["step"])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        raise SchemaError([_error(field, "invalid", (
+            f"Sweep for {field} needs 'values', or 'start' and 'stop' with a positive 'step' or 'num'"))]) from None
+    if not step > 0 or stop < start or not math.isfinite(stop - start):
+        raise SchemaError([_error(field, "invalid", f"Sweep for {field} needs start <= stop and step > 0")])
+    # A tiny step makes the quotient huge or infinite: reject it before int()
+    steps = (stop - start) / step + 1e-9
+    if not math.isfinite(steps) or steps >= max_points:
+        raise GridTooLarge(f"What-if grid too large: more than {max_points} scenarios")
+    count = int(math.floor(steps)) + 1
+    # Round away float drift so 0.1 steps come out as 0.3, not 0.30000000000000004
+    return count, lambda: [round(start + i * step, 10) for i in range(count)]
+
+
+def parse_sweeps(sweeps, max_points, schema=FEATURE_SCHEMA, strict_categories=False):
+    """Validate sweep specs into ``[(field, values), ...]``.
+
+    Values are converted and range-checked exactly like a decoded record;
+    duplicates (e.g. a fractional step on an integer field) are dropped.
+    Raises SchemaError for bad specs or values, GridTooLarge when the product
+    of the axis lengths exceeds ``max_points``.
+    """
+    if not isinstance(sweeps, list) or not sweeps:
+        raise SchemaError([_error(None, "invalid_body", "'sweeps' must be a non-empty list")])
+    fields = {f.name: f for f in schema}
+    axes, errors, seen = [], [], set()
+    total = 1
+    for spec in sweeps:
+        name = spec.get("field") if isinstance(spec, dict) else None
+        field = fields.get(name)
+        if field is None:
+            errors.append(_error(name, "invalid", f"Unknown sweep field: {name!r}"))
+            continue
+        if name in seen:
+            errors.append(_error(name, "invalid", f"{name} is swept more than once"))
+            continue
+        seen.add(name)
+
+        if "values" in spec:
+            raw = spec["values"]
+            if not isinstance(raw, list) or not raw:
+                errors.append(_error(name, "invalid", f"'values' for {name} must be a non-empty list"))
+                continue
+            count = len(raw)
+        elif field.numeric:
+            try:
+                count, expand = _range_values(name, spec, max_points)
+            except SchemaError as e:
+                errors.extend(e.errors)
+                continue
+        else:
+            errors.append(_error(name, "invalid", f"Categorical sweep for {name} needs a 'values' list"))
+            continue
+        total *= count
+        if total > max_points:
+            raise GridTooLarge(f"What-if grid too large: more than {max_points} scenarios")
+        if "values" not in spec:
+            raw = expand()
+
+        values, field_errors = _coerce_values(field, raw, strict_categories)
+        errors.extend(field_errors)
+        axes.append((name, values))
+    if errors:
+        raise SchemaError(errors)
+    return axes
+
+
+def _coerce_values(field, raw, strict_categories):
+    """Converted, de-duplicated values, or the first problem found with them."""
+    convert = normalize_str if field.kind is str else field.kind
+    values = []
+    for value in raw:
+        if value is None or value == "":
+            return [], [_error(field.name, "invalid", f"Empty value in sweep for {field.name}")]
+        try:
+            value = convert(value)
+        except (TypeError, ValueError):
+            return [], [_error(field.name, "invalid", f"Invalid value for {field.name}: {value!r}")]
+        if field.minimum is not None and not field.minimum <= value <= field.maximum:
+            return [], [_error(field.name, "out_of_range", (
+                f"{field.name} must be between {field.minimum} and {field.maximum}, got {value!r}"))]
+        if strict_categories and field.categories and value not in field.categories:
+            return [], [_error(field.name, "unknown_category", (
+                f"{field.name} must be one of {', '.join(field.categories)}, got {value!r}"))]
+        values.append(value)
+    return list(dict.fromkeys(values)), []
+
+
+def score_grid(model, base, axes):
+    """Raw (unclamped) scores for every combination of the axes' values.
+
+    ``base`` is a decoded record; the result has shape
+    ``(len(values_1), len(values_2), ...)`` in the order of ``axes``.
+    """
+    if hasattr(model, "contributions"):
+        grid = np.float64(model.predict_one(base))
+        for field, values in axes:
+            delta = model.contributions(field, values) - model.contributions(field, [base[field]])[0]
+            grid = np.add.outer(grid, delta)
+        return np.asarray(grid)
+
+    # Pipeline without an additive form: materialize the grid and score it once
+    shape = tuple(len(values) for _, values in axes)
+    size = math.prod(shape)
+    index = np.indices(shape).reshape(len(axes), size)
+    columns = {field: np.repeat(np.array([value], dtype=object), size) for field, value in base.items()}
+    for (field, values), positions in zip(axes, index):
+        columns[field] = np.asarray(values, dtype=object)[positions]
+    frame = pd.DataFrame(columns, columns=list(base))
+    frame = frame.infer_objects()
+    return np.asarray(model.predict(frame), dtype=float).reshape(shape)
@@ -0,0 +1,18 @@
+# backend/wsgi.py
+"""WSGI entry point for production servers.
+
+The model is loaded synchronously here, before the server forks its
+workers, so every worker shares the parent's copy of it copy-on-write
+(and through the page cache when memory-mapped). Run with:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+
+# Must be decided before app is imported: a background warm-up thread would
+# not survive the fork, and mmap keeps the model arrays in shared pages
+os.environ.setdefault("MODEL_WARMUP", "sync")
+os.environ.setdefault("MODEL_MMAP_MODE", "r")
+
+from app import app  # noqa: E402